@@ -0,0 +1,17 @@
+from .batch_runner import BatchRunner
+from .sinks import (
+    BaseSink,
+    ParquetSink,
+    PostgresSink,
+    SQLiteSink,
+    open_sink,
+)
+
+__all__ = [
+    "BatchRunner",
+    "BaseSink",
+    "ParquetSink",
+    "PostgresSink",
+    "SQLiteSink",
+    "open_sink",
+]
@@ -0,0 +1,97 @@
+"""zipファイルの一覧を処理し、Parquet・SQLite・PostgreSQLに出力する
+
+Examples:
+    $ pyxbrltools-ingest path/to/zips --sink output.db --workers 4
+    $ python -m app.batch urls.txt --sink parquet_dir --resume
+    $ python -m app.batch path/to/zips --sink output.db \\
+        --manifest manifest.db --max-attempts 3
+    $ python -m app.batch path/to/zips --sink "postgresql://user@host/db" \\
+        --tables ix_header ix_non_fraction --batch-size 100
+"""
+
+import argparse
+import sys
+
+from app.batch import BatchRunner, open_sink
+from app.utils import Instrumentation, RunManifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyxbrltools-ingest")
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="zipファイルのディレクトリ、zipファイル、URLの一覧のファイル",
+    )
+    parser.add_argument(
+        "--sink",
+        required=True,
+        help="Parquetのディレクトリ、SQLiteのファイル(.db)、"
+        "PostgreSQLのDSN",
+    )
+    parser.add_argument("--work-dir", default=".batch")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        choices=list(BatchRunner.TABLES),
+        default=BatchRunner.DEFAULT_TABLES,
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="出力先に書き込み済みの書類をスキップする",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="書類ごとの処理状況を記録するSQLiteのファイル"
+        "(完了済みの書類をスキップし、失敗した書類を再処理する)",
+    )
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument(
+        "--xbrl-id",
+        choices=["uuid", "zip", "sm"],
+        default="uuid",
+        help="xbrl_idの生成元(zip, smは書類の内容から決定的に生成し、"
+        "再処理時は同じxbrl_idの行を置き換える)",
+    )
+    parser.add_argument(
+        "--metrics", default=None, help="処理段階ごとの集計の出力先(JSON)"
+    )
+    args = parser.parse_args(argv)
+
+    sources = BatchRunner.sources(args.inputs)
+    manifest = (
+        RunManifest(args.manifest, max_attempts=args.max_attempts)
+        if args.manifest
+        else None
+    )
+    with open_sink(args.sink) as sink:
+        runner = BatchRunner(
+            sink,
+            args.work_dir,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            tables=args.tables,
+            resume=args.resume,
+            manifest=manifest,
+            id_source=None if args.xbrl_id == "uuid" else args.xbrl_id,
+        )
+        summary = runner.run(sources)
+    if manifest is not None:
+        manifest.close()
+
+    for item in summary["errors"]:
+        print(f"{item['source']}: {item['error']}", file=sys.stderr)
+    print(BatchRunner.format_summary(summary))
+
+    if args.metrics:
+        Instrumentation.to_json(args.metrics)
+
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,510 @@
+import hashlib
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from pandas import DataFrame
+
+from app.models import XBRLModel
+from app.utils import Instrumentation, RunManifest, Utils
+
+
+def extract_tables(model, tables):
+    """モデルから指定したテーブルを抽出する
+
+    Args:
+        model (XBRLModel): 書類のモデル
+        tables (list[str]): BatchRunner.TABLESのテーブル名
+
+    Returns:
+        dict[str, DataFrame]: テーブル名とデータ
+    """
+    frames = {}
+    for table in tables:
+        manager_name, method = BatchRunner.TABLES[table]
+        manager = getattr(model, manager_name)
+        if manager is None:
+            continue
+        result = getattr(manager, method)()
+        if isinstance(result, DataFrame):
+            df = result
+        elif isinstance(result, dict):
+            df = DataFrame([result])
+        else:
+            # ジェネレーター(ファイルごとのレコードのリスト)
+            df = DataFrame(
+                [record for records in result for record in records]
+            )
+        frames[table] = df
+    # マネージャーごとのxbrl_idを書類のxbrl_idにそろえる
+    model._get_xbrl_id(tuple(frames.values()))
+    return frames
+
+
+def download_source(source, output_path):
+    """書類のzipファイルのパスを取得する
+
+    sourceがURLの場合は、ファイル名が同じ別のURLと衝突しないよう、
+    output_path配下のdownloadsにURLごとのディレクトリを作成して
+    保存します(保存済みの場合はダウンロードしない)。
+
+    Args:
+        source (str): zipファイルのパスまたはURL
+        output_path (str): ダウンロード先
+
+    Returns:
+        Path: zipファイルのパス
+    """
+    zip_path = Path(source)
+    if source.startswith("http"):
+        download_dir = (
+            Path(output_path)
+            / "downloads"
+            / hashlib.sha256(source.encode()).hexdigest()[:16]
+        )
+        zip_path = download_dir / Path(source).name
+        if not zip_path.exists():
+            download_dir.mkdir(parents=True, exist_ok=True)
+            Utils.download_file_to_dir(source, download_dir.as_posix())
+    return zip_path
+
+
+def new_result(source, content_hash=None):
+    """書類の処理結果の初期値を生成する"""
+    return {
+        "source": source,
+        "content_hash": content_hash,
+        "skipped": False,
+        "xbrl_id": None,
+        "frames": {},
+        "facts": 0,
+        "bytes": 0,
+        "seconds": 0.0,
+        "error": None,
+        "metrics": None,
+    }
+
+
+def process_filing(
+    source, output_path, tables, id_source=None, content_hash=None
+):
+    """1つの書類を処理する(ワーカープロセスで実行する)
+
+    例外は呼び出し側に送出せず、処理結果のerrorに格納します。
+
+    Args:
+        source (str): zipファイルのパスまたはURL
+        output_path (str): 解析結果の出力先
+        tables (list[str]): 抽出するテーブル名
+        id_source (str, optional): xbrl_idの生成元(XBRLModelを参照)
+        content_hash (str, optional): 呼び出し側で算出したzipファイルの
+            内容のハッシュ(処理結果にそのまま格納する)
+
+    Returns:
+        dict: source, content_hash, skipped, xbrl_id, frames, facts,
+            bytes, seconds, error, metrics(書類の計測結果)
+    """
+    start = time.perf_counter()
+    result = new_result(source, content_hash)
+    try:
+        zip_path = download_source(source, output_path)
+        result["bytes"] = zip_path.stat().st_size
+
+        model = XBRLModel(zip_path.as_posix(), output_path, id_source)
+        result["xbrl_id"] = model.xbrl_id
+        try:
+            with Instrumentation.filing(model.xbrl_id), model.profile():
+                frames = extract_tables(model, tables)
+            result["metrics"] = Instrumentation.snapshot(model.xbrl_id)
+        finally:
+            # 解凍したディレクトリを削除する
+            del model
+        result["frames"] = frames
+        result["facts"] = sum(
+            len(frames[table])
+            for table in BatchRunner.FACT_TABLES
+            if table in frames
+        )
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+class BatchRunner:
+    """zipファイルの一覧を並列に処理し、出力先に書き込むクラス
+
+    書類の処理(解凍・解析・テーブルの抽出)はワーカープロセスで並列に
+    実行し、出力先への書き込みはbatch_size件ごとに呼び出し元の
+    プロセスでまとめて行います。処理中の書類はワーカー数の2倍までに
+    制限するため、書類数が多い場合もメモリの使用量は一定です。
+    処理に失敗した書類は記録して処理を続けます。
+
+    Examples:
+        >>> with open_sink("path/to/output.db") as sink:
+        ...     runner = BatchRunner(sink, "path/to/work", workers=4)
+        ...     summary = runner.run(BatchRunner.sources(["path/to/zips"]))
+        >>> print(BatchRunner.format_summary(summary))
+    """
+
+    # テーブル名: (XBRLModelのマネージャー, メソッド)
+    TABLES = {
+        "ix_header": ("ixbrl_manager", "get_ix_header"),
+        "ix_non_fraction": ("ixbrl_manager", "get_ix_non_fraction"),
+        "ix_non_numeric": ("ixbrl_manager", "get_ix_non_numeric"),
+        "label": ("label_manager", "get_label_table"),
+        "cal_link_arcs": ("cal_link_manager", "get_link_arcs"),
+        "def_link_arcs": ("def_link_manager", "get_link_arcs"),
+        "pre_link_arcs": ("pre_link_manager", "get_link_arcs"),
+    }
+
+    DEFAULT_TABLES = ["ix_header", "ix_non_fraction", "ix_non_numeric"]
+
+    # ファクト数として集計するテーブル
+    FACT_TABLES = ["ix_non_fraction", "ix_non_numeric"]
+
+    def __init__(
+        self,
+        sink,
+        output_path,
+        workers=1,
+        batch_size=50,
+        tables=None,
+        resume=False,
+        manifest=None,
+        id_source=None,
+    ) -> None:
+        """
+        Parameters:
+            sink (BaseSink): 出力先
+            output_path (str): 解析結果とダウンロードしたzipの保存先
+            workers (int): ワーカープロセス数(1の場合は同じプロセスで処理)
+            batch_size (int): まとめて書き込む書類数
+            tables (list[str]): 抽出するテーブル名(省略時はDEFAULT_TABLES)
+            resume (bool): 出力先に書き込み済みの書類をスキップする
+            manifest (RunManifest): 書類ごとの処理状況を記録する
+                マニフェスト(指定した場合は完了済みの書類と試行回数の
+                上限に達した書類をスキップし、内容またはパーサーの
+                バージョンが変わった書類を再処理する)
+            id_source (str): xbrl_idの生成元("zip", "sm")。指定した
+                場合は書類の内容から決定的なxbrl_idを生成し、出力先の
+                同じxbrl_idの行を置き換える(再処理しても重複しない)
+        """
+        tables = list(tables or self.DEFAULT_TABLES)
+        unknown = [table for table in tables if table not in self.TABLES]
+        if unknown:
+            raise ValueError(
+                f"テーブル名が不正です。{unknown} "
+                f"{list(self.TABLES)}から指定してください。"
+            )
+        self.sink = sink
+        self.output_path = Path(output_path).as_posix()
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.tables = tables
+        self.resume = resume
+        self.manifest = manifest
+        if id_source not in XBRLModel.ID_SOURCES:
+            raise ValueError(
+                f"xbrl_idの生成元が不正です。[{id_source}] "
+                f"{XBRLModel.ID_SOURCES}から指定してください。"
+            )
+        self.id_source = id_source
+
+    @staticmethod
+    def sources(inputs):
+        """入力の指定から処理する書類の一覧を取得する
+
+        * ディレクトリ: 配下のzipファイル(再帰的に検索)
+        * 拡張子が.zipのファイル: そのzipファイル
+        * それ以外のファイル: 1行に1つのURLまたはパスを記載した一覧
+          (空行と#で始まる行は無視)
+
+        Args:
+            inputs (list[str]): ディレクトリ、zipファイル、一覧のファイル
+
+        Returns:
+            list[str]: zipファイルのパスまたはURL
+        """
+        sources = []
+        for value in inputs:
+            path = Path(value)
+            if path.is_dir():
+                sources += [
+                    zip_file.as_posix()
+                    for zip_file in sorted(path.rglob("*.zip"))
+                ]
+            elif path.suffix == ".zip":
+                sources.append(path.as_posix())
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    sources += [
+                        line.strip()
+                        for line in f
+                        if line.strip() and not line.startswith("#")
+                    ]
+        return sources
+
+    @staticmethod
+    def source_key(source):
+        """再開時の判定に使用する書類のキーを取得する
+
+        ディレクトリが異なる同じ名前のzipファイルを区別するため、
+        URLはそのまま、パスは絶対パスをキーにします。
+        """
+        source = str(source)
+        if source.startswith("http"):
+            return source
+        return Path(source).resolve().as_posix()
+
+    def __jobs(self, sources, skip_hashes):
+        """処理する書類を準備する
+
+        マニフェストを指定した場合は、呼び出し元のプロセスでzipファイルの
+        ハッシュを算出して処理しない書類を除外し、ワーカーに渡す前に
+        処理の開始を記録します。ワーカーが異常終了した書類も
+        試行回数に数えるためです。
+
+        Yields:
+            tuple[dict, bool]: 処理結果の初期値と、ワーカーで処理するか
+        """
+        for source in sources:
+            result = new_result(source)
+            if self.manifest is None:
+                yield result, True
+                continue
+            try:
+                zip_path = download_source(source, self.output_path)
+                result["content_hash"] = RunManifest.content_hash(zip_path)
+            except Exception as error:
+                result["error"] = f"{type(error).__name__}: {error}"
+                yield result, False
+                continue
+            if result["content_hash"] in skip_hashes:
+                result["skipped"] = True
+                yield result, False
+                continue
+            self.manifest.start(result["content_hash"], source)
+            yield result, True
+
+    def __submit(self, executor, result):
+        return executor.submit(
+            process_filing,
+            result["source"],
+            self.output_path,
+            self.tables,
+            self.id_source,
+            result["content_hash"],
+        )
+
+    def __isolate(self, result):
+        """書類を単独のワーカーで処理し直す
+
+        ワーカーが異常終了した場合は、その書類を失敗とします。
+        """
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                return self.__submit(executor, result).result()
+            except BrokenProcessPool as error:
+                result["error"] = f"{type(error).__name__}: {error}"
+                return result
+
+    def __results(self, sources, skip_hashes):
+        """書類を処理し、処理結果を完了した順に取得する
+
+        ワーカーが異常終了(メモリ不足等)した場合は、異常終了の原因と
+        なった書類を特定できないため、処理中だった書類を1件ずつ単独の
+        ワーカーで処理し直し、再度異常終了した書類のみ失敗とします。
+        """
+        jobs = self.__jobs(sources, skip_hashes)
+        if self.workers == 1:
+            for result, runnable in jobs:
+                if runnable:
+                    result = process_filing(
+                        result["source"],
+                        self.output_path,
+                        self.tables,
+                        self.id_source,
+                        result["content_hash"],
+                    )
+                yield result
+            return
+
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            pending = {}
+            while True:
+                suspects = []
+                # 処理中の書類をワーカー数の2倍までに制限する
+                for result, runnable in jobs:
+                    if not runnable:
+                        yield result
+                        continue
+                    try:
+                        future = self.__submit(executor, result)
+                    except BrokenProcessPool:
+                        suspects.append(result)
+                        break
+                    pending[future] = result
+                    if len(pending) >= self.workers * 2:
+                        break
+                if not pending and not suspects:
+                    return
+                if not suspects:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = pending.pop(future)
+                        try:
+                            yield future.result()
+                        except BrokenProcessPool:
+                            suspects.append(result)
+                    if not suspects:
+                        continue
+
+                # 異常終了したワーカーの処理中の書類は全て中断される
+                for future in wait(pending).done:
+                    result = pending.pop(future)
+                    try:
+                        yield future.result()
+                    except BrokenProcessPool:
+                        suspects.append(result)
+                executor.shutdown(wait=False)
+                executor = ProcessPoolExecutor(max_workers=self.workers)
+                for result in suspects:
+                    yield self.__isolate(result)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def run(self, sources):
+        """書類を処理して出力先に書き込む
+
+        Args:
+            sources (list[str]): zipファイルのパスまたはURL
+
+        Returns:
+            dict: 処理件数と処理速度の集計
+        """
+        start = time.perf_counter()
+        skipped = 0
+        if self.resume:
+            completed = self.sink.completed()
+            targets = [
+                source
+                for source in sources
+                if self.source_key(source) not in completed
+            ]
+            skipped = len(sources) - len(targets)
+            sources = targets
+
+        summary = {
+            "filings": 0,
+            "failed": 0,
+            "skipped": skipped,
+            "facts": 0,
+            "bytes": 0,
+            "errors": [],
+        }
+        batch = []
+        skip_hashes = (
+            None if self.manifest is None else self.manifest.skip_hashes()
+        )
+        for result in self.__results(sources, skip_hashes):
+            if self.workers > 1:
+                # ワーカープロセスの計測結果を呼び出し元に集計する
+                Instrumentation.merge(result["metrics"], result["xbrl_id"])
+            if result["skipped"]:
+                summary["skipped"] += 1
+                continue
+            if result["error"] is not None:
+                self.__fail(summary, result)
+                continue
+            result["source"] = self.source_key(result["source"])
+            batch.append(result)
+            if len(batch) >= self.batch_size:
+                self.__write(summary, batch)
+                batch = []
+        if batch:
+            self.__write(summary, batch)
+
+        seconds = time.perf_counter() - start
+        summary["seconds"] = seconds
+        summary["filings_per_second"] = (
+            summary["filings"] / seconds if seconds else 0.0
+        )
+        summary["facts_per_second"] = (
+            summary["facts"] / seconds if seconds else 0.0
+        )
+        summary["mb_per_second"] = (
+            summary["bytes"] / 1024 / 1024 / seconds if seconds else 0.0
+        )
+        return summary
+
+    def __fail(self, summary, result):
+        """処理に失敗した書類を集計とマニフェストに記録する"""
+        summary["failed"] += 1
+        summary["errors"].append(
+            {"source": result["source"], "error": result["error"]}
+        )
+        if self.manifest is not None and result["content_hash"]:
+            self.manifest.fail(
+                result["content_hash"],
+                result["error"],
+                result["xbrl_id"],
+                result["seconds"],
+            )
+
+    def __write(self, summary, batch):
+        """バッチを出力先に書き込む
+
+        書き込みに失敗した場合は、バッチの書類を失敗として記録して
+        処理を続けます(完了を記録しないため、再開時に再処理します)。
+        """
+        try:
+            with Instrumentation.timer("BatchRunner.write"):
+                self.sink.write_batch(
+                    batch, replace=self.id_source is not None
+                )
+        except Exception as error:
+            for result in batch:
+                result["error"] = f"{type(error).__name__}: {error}"
+                self.__fail(summary, result)
+            return
+        summary["filings"] += len(batch)
+        summary["facts"] += sum(result["facts"] for result in batch)
+        summary["bytes"] += sum(result["bytes"] for result in batch)
+        Instrumentation.count("BatchRunner.filings", len(batch))
+        if self.manifest is None:
+            return
+        # 出力先への書き込みが完了した書類のみ完了を記録する
+        for result in batch:
+            self.manifest.complete(
+                result["content_hash"],
+                result["xbrl_id"],
+                result["seconds"],
+                {
+                    "sink": type(self.sink).__name__,
+                    "tables": {
+                        table: len(df)
+                        for table, df in result["frames"].items()
+                    },
+                },
+            )
+
+    @staticmethod
+    def format_summary(summary):
+        """集計を表示用の文字列にする"""
+        return (
+            f"filings: {summary['filings']} "
+            f"(failed: {summary['failed']}, "
+            f"skipped: {summary['skipped']}), "
+            f"facts: {summary['facts']}, "
+            f"elapsed: {summary['seconds']:.2f} s\n"
+            f"throughput: {summary['filings_per_second']:.2f} filings/s, "
+            f"{summary['facts_per_second']:.1f} facts/s, "
+            f"{summary['mb_per_second']:.2f} MB/s"
+        )
@@ -0,0 +1,392 @@
+import json
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from pandas import DataFrame
+
+
+class BaseSink:
+    """バッチ処理の出力先の基底クラス
+
+    書類ごとに抽出したテーブルをバッチ単位で書き込み、書き込みが
+    完了した書類(source)を記録します。resumeの場合は記録済みの
+    書類をスキップします。
+    """
+
+    # 書き込みが完了した書類を記録するテーブル
+    COMPLETED_TABLE = "_batch_filings"
+
+    def write_batch(self, results, replace=False):
+        """バッチ(書類ごとの処理結果)を書き込む
+
+        Args:
+            results (list[dict]): source, xbrl_id, framesを持つ処理結果
+            replace (bool): 同じxbrl_idの既存の行を置き換える
+                (決定的なxbrl_idで再処理した場合に重複させない)
+        """
+        frames = {}
+        for result in results:
+            for table, df in result["frames"].items():
+                if len(df) > 0:
+                    frames.setdefault(table, []).append(df)
+        for table, table_frames in frames.items():
+            self.write(
+                table, pd.concat(table_frames, ignore_index=True), replace
+            )
+        self.mark_completed(results)
+
+    def write(self, table, df: DataFrame, replace=False):
+        raise NotImplementedError
+
+    def mark_completed(self, results):
+        raise NotImplementedError
+
+    def completed(self):
+        """書き込みが完了した書類(source)の集合を取得する"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    @staticmethod
+    def _completed_records(results):
+        completed_at = datetime.now().isoformat(timespec="seconds")
+        return [
+            {
+                "source": result["source"],
+                "xbrl_id": result["xbrl_id"],
+                "completed_at": completed_at,
+            }
+            for result in results
+        ]
+
+    @staticmethod
+    def _validate_table(table):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"テーブル名が不正です。[{table}]")
+        return table
+
+
+class ParquetSink(BaseSink):
+    """テーブルごとのディレクトリにParquetファイルを出力するクラス
+
+    バッチごとに<ディレクトリ>/<テーブル名>/part-00000.parquetの形式で
+    出力します。完了した書類は_completed.jsonlに追記します。
+    Parquetの書き込みにはpyarrowまたはfastparquetが必要です。
+    追記のみのため、replaceは無視します(同じxbrl_idの行が重複する
+    場合は読み込み時にxbrl_idで除外してください)。
+
+    Parquetは1つの列に異なる型の値を持てないため、書き込む前に
+    列の型をそろえます(normalizeを参照)。
+    """
+
+    COMPLETED_FILE = "_completed.jsonl"
+
+    # 数値に変換する列(ix_non_fractionのnumericは負の値のみfloatのため)
+    NUMERIC_COLUMNS = ["numeric"]
+
+    # そのまま書き込めるobject型の列の値の型(pandas.api.types.infer_dtype)
+    OBJECT_TYPES = ["string", "empty", "boolean"]
+
+    def __init__(self, directory) -> None:
+        self.engine = self.__engine()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def __engine():
+        """使用できるParquetのエンジンを取得する"""
+        for engine in ["pyarrow", "fastparquet"]:
+            try:
+                __import__(engine)
+                return engine
+            except ImportError:
+                continue
+        raise ImportError(
+            "Parquetの出力にはpyarrowまたはfastparquetが必要です。"
+        )
+
+    @classmethod
+    def normalize(cls, df: DataFrame):
+        """Parquetに書き込めるよう列の型をそろえる
+
+        * NUMERIC_COLUMNSの列: 数値(変換できない値は欠損値)
+        * 文字列以外の値を含むobject型の列: 文字列(欠損値はNone)
+
+        Args:
+            df (DataFrame): 書き込むデータ
+
+        Returns:
+            DataFrame: 型をそろえたデータ(複製)
+        """
+        df = df.copy()
+        for column in df.columns:
+            series = df[column]
+            if column in cls.NUMERIC_COLUMNS:
+                df[column] = pd.to_numeric(series, errors="coerce")
+            elif series.dtype == object and (
+                pd.api.types.infer_dtype(series, skipna=True)
+                not in cls.OBJECT_TYPES
+            ):
+                df[column] = (
+                    series.map(str, na_action="ignore")
+                    .astype(object)
+                    .where(series.notna(), None)
+                )
+        return df
+
+    def write(self, table, df: DataFrame, replace=False):
+        table_dir = self.directory / self._validate_table(table)
+        table_dir.mkdir(parents=True, exist_ok=True)
+        part = len(list(table_dir.glob("part-*.parquet")))
+        path = table_dir / f"part-{part:05d}.parquet"
+        # 書き込み途中のファイルを読み込まないよう、一時ファイルから置き換える
+        tmp_path = path.with_suffix(".tmp")
+        self.normalize(df).to_parquet(
+            tmp_path, engine=self.engine, index=False
+        )
+        tmp_path.replace(path)
+
+    def mark_completed(self, results):
+        with open(
+            self.directory / self.COMPLETED_FILE, "a", encoding="utf-8"
+        ) as f:
+            for record in self._completed_records(results):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def completed(self):
+        path = self.directory / self.COMPLETED_FILE
+        if not path.exists():
+            return set()
+        with open(path, "r", encoding="utf-8") as f:
+            return {
+                json.loads(line)["source"] for line in f if line.strip()
+            }
+
+
+class SQLiteSink(BaseSink):
+    """SQLiteのファイルにテーブルを出力するクラス
+
+    1つのバッチ(テーブルと完了した書類の記録)を1つのトランザクションで
+    書き込みます。テーブルが存在しない場合は作成し、後のバッチで列が
+    増えた場合は列を追加します。
+    """
+
+    def __init__(self, path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # トランザクションはwrite_batchで明示的に開始する
+        self.connection = sqlite3.connect(
+            self.path.as_posix(), isolation_level=None
+        )
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.COMPLETED_TABLE} "
+            "(source TEXT PRIMARY KEY, xbrl_id TEXT, completed_at TEXT)"
+        )
+
+    def write_batch(self, results, replace=False):
+        self.connection.execute("BEGIN")
+        try:
+            super().write_batch(results, replace)
+        except Exception:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+
+    def __columns(self, table):
+        cursor = self.connection.execute(f"PRAGMA table_info({table})")
+        return [row[1] for row in cursor.fetchall()]
+
+    def write(self, table, df: DataFrame, replace=False):
+        table = self._validate_table(table)
+        columns = self.__columns(table)
+        if columns:
+            for column in df.columns:
+                if column not in columns:
+                    self.connection.execute(
+                        f'ALTER TABLE {table} ADD COLUMN "{column}"'
+                    )
+        if replace and "xbrl_id" in columns and "xbrl_id" in df:
+            self.connection.executemany(
+                f"DELETE FROM {table} WHERE xbrl_id = ?",
+                [(xbrl_id,) for xbrl_id in df["xbrl_id"].unique()],
+            )
+        if not columns:
+            # DataFrame.to_sqlはコミットするため、スキーマのみ生成する
+            self.connection.execute(
+                pd.io.sql.get_schema(df, table, con=self.connection)
+            )
+        # sqlite3が扱えるよう、numpyの値と欠損値を変換する
+        values = df.astype(object).where(df.notna(), None)
+        self.connection.executemany(
+            f"INSERT INTO {table} ("
+            + ", ".join(f'"{column}"' for column in df.columns)
+            + ") VALUES ("
+            + ", ".join("?" for _ in df.columns)
+            + ")",
+            values.itertuples(index=False, name=None),
+        )
+        if replace and "xbrl_id" in df:
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_xbrl_id "
+                f"ON {table} (xbrl_id)"
+            )
+
+    def mark_completed(self, results):
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO {self.COMPLETED_TABLE} "
+            "(source, xbrl_id, completed_at) "
+            "VALUES (:source, :xbrl_id, :completed_at)",
+            self._completed_records(results),
+        )
+
+    def completed(self):
+        cursor = self.connection.execute(
+            f"SELECT source FROM {self.COMPLETED_TABLE}"
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    def close(self):
+        self.connection.close()
+
+
+class PostgresSink(BaseSink):
+    """PostgreSQLにテーブルを出力するクラス
+
+    1つのバッチ(テーブルと完了した書類の記録)を1つのトランザクションで
+    書き込みます。テーブルが存在しない場合は列の型から作成します。
+    """
+
+    # pandasの型からPostgreSQLの型への対応(該当しない場合はTEXT)
+    DTYPE_MAPPING = {
+        "int64": "BIGINT",
+        "float64": "DOUBLE PRECISION",
+        "bool": "BOOLEAN",
+    }
+
+    def __init__(self, dsn) -> None:
+        import psycopg2
+
+        self.connection = psycopg2.connect(dsn)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.COMPLETED_TABLE} "
+                "(source TEXT PRIMARY KEY, xbrl_id TEXT, "
+                "completed_at TEXT)"
+            )
+        self.connection.commit()
+
+    def write_batch(self, results, replace=False):
+        try:
+            super().write_batch(results, replace)
+        except Exception:
+            self.connection.rollback()
+            raise
+        self.connection.commit()
+
+    def __columns(self, cursor, table):
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_name = %s",
+            (table,),
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def write(self, table, df: DataFrame, replace=False):
+        from psycopg2.extras import execute_values
+
+        table = self._validate_table(table)
+        with self.connection.cursor() as cursor:
+            columns = self.__columns(cursor, table)
+            definitions = {
+                column: self.DTYPE_MAPPING.get(
+                    str(df.dtypes[column]), "TEXT"
+                )
+                for column in df.columns
+            }
+            if not columns:
+                cursor.execute(
+                    f"CREATE TABLE {table} ("
+                    + ", ".join(
+                        f'"{column}" {definition}'
+                        for column, definition in definitions.items()
+                    )
+                    + ")"
+                )
+            for column, definition in definitions.items():
+                if columns and column not in columns:
+                    cursor.execute(
+                        f'ALTER TABLE {table} ADD COLUMN "{column}" '
+                        f"{definition}"
+                    )
+            if replace and "xbrl_id" in df:
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_xbrl_id "
+                    f"ON {table} (xbrl_id)"
+                )
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE xbrl_id = ANY(%s)",
+                    (df["xbrl_id"].unique().tolist(),),
+                )
+            # psycopg2が扱えるよう、numpyの値と欠損値を変換する
+            values = df.astype(object).where(df.notna(), None)
+            execute_values(
+                cursor,
+                f"INSERT INTO {table} ("
+                + ", ".join(f'"{column}"' for column in df.columns)
+                + ") VALUES %s",
+                list(values.itertuples(index=False, name=None)),
+            )
+
+    def mark_completed(self, results):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.COMPLETED_TABLE} "
+                "(source, xbrl_id, completed_at) "
+                "VALUES (%(source)s, %(xbrl_id)s, %(completed_at)s) "
+                "ON CONFLICT (source) DO UPDATE SET "
+                "xbrl_id = EXCLUDED.xbrl_id, "
+                "completed_at = EXCLUDED.completed_at",
+                self._completed_records(results),
+            )
+
+    def completed(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"SELECT source FROM {self.COMPLETED_TABLE}")
+            return {row[0] for row in cursor.fetchall()}
+
+    def close(self):
+        self.connection.close()
+
+
+def open_sink(target):
+    """出力先の指定から出力先のクラスを生成する
+
+    * postgresql://〜, postgres://〜 または "dbname=" を含むDSN: PostgreSQL
+    * 拡張子が.db, .sqlite, .sqlite3のファイル: SQLite
+    * それ以外: Parquetのディレクトリ
+
+    Args:
+        target (str): 出力先
+
+    Returns:
+        BaseSink: 出力先
+    """
+    target = str(target)
+    if target.startswith(("postgresql://", "postgres://")) or (
+        "dbname=" in target
+    ):
+        return PostgresSink(target)
+    if Path(target).suffix in [".db", ".sqlite", ".sqlite3"]:
+        return SQLiteSink(target)
+    return ParquetSink(target)
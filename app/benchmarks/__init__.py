@@ -0,0 +1,7 @@
+from .synthetic_filing import SyntheticFilingGenerator
+from .benchmark_runner import BenchmarkRunner
+
+__all__ = [
+    "SyntheticFilingGenerator",
+    "BenchmarkRunner",
+]
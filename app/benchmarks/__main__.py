@@ -0,0 +1,74 @@
+"""ベンチマークを実行し、ベースラインと比較する
+
+Examples:
+    $ python -m app.benchmarks --tiers 1k 10k --output results.json
+    $ python -m app.benchmarks --baseline baseline.json --threshold 0.2
+    $ python -m app.benchmarks --baseline baseline.json --update-baseline
+"""
+
+import argparse
+import sys
+
+from app.benchmarks import BenchmarkRunner
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.benchmarks")
+    parser.add_argument("--work-dir", default=".benchmarks")
+    parser.add_argument("--tiers", nargs="+", default=["1k"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--benchmarks", nargs="+", default=None)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-seconds", type=float, default=0.005)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="計測結果をベースラインとして保存する",
+    )
+    args = parser.parse_args(argv)
+
+    runner = BenchmarkRunner(
+        args.work_dir,
+        tiers=args.tiers,
+        repeat=args.repeat,
+        benchmarks=args.benchmarks,
+    )
+    results = runner.run()
+
+    for tier, benchmarks in results["results"].items():
+        for name, stats in benchmarks.items():
+            print(f"[{tier}] {name}: {stats['min'] * 1000:.2f} ms")
+
+    if args.output:
+        runner.save(results, args.output)
+
+    if args.baseline is None:
+        return 0
+
+    if args.update_baseline:
+        runner.save(results, args.baseline)
+        print(f"ベースラインを更新しました。[{args.baseline}]")
+        return 0
+
+    regressions = BenchmarkRunner.compare(
+        results,
+        BenchmarkRunner.load(args.baseline),
+        threshold=args.threshold,
+        min_seconds=args.min_seconds,
+    )
+    for item in regressions:
+        print(
+            f"[{item['tier']}] {item['name']}: "
+            f"{item['baseline'] * 1000:.2f} ms -> "
+            f"{item['current'] * 1000:.2f} ms "
+            f"({item['ratio']:.2f}倍)",
+            file=sys.stderr,
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
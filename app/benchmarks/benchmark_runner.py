@@ -0,0 +1,426 @@
+import functools
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from types import GeneratorType
+
+from app.manager import (
+    CalLinkManager,
+    DefLinkManager,
+    FilingContext,
+    IXBRLManager,
+    LabelManager,
+    PreLinkManager,
+    QualitativeManager,
+)
+from app.parser import (
+    CalLinkParser,
+    DefLinkParser,
+    IxbrlParser,
+    LabelParser,
+    PreLinkParser,
+    QualitativeParser,
+    SchemaParser,
+)
+
+from .synthetic_filing import SyntheticFilingGenerator
+
+
+class BenchmarkRunner:
+    """パーサーとマネージャーの処理時間を計測するクラス
+
+    SyntheticFilingGeneratorで規模(ティア)ごとの合成書類を生成し、
+    各パーサーのメソッドとマネージャーのジェネレーターの処理時間を
+    計測します。結果はJSONで保存し、保存済みのベースラインと比較して
+    しきい値を超えて遅くなったベンチマークを検出します。
+
+    * パーサーは読み込み(create)とメソッドを別々に計測します。
+    * マネージャーは共有コンテキストを破棄してから、インスタンスの生成と
+      ジェネレーターの消費までを計測します。
+
+    Examples:
+        >>> runner = BenchmarkRunner("path/to/work", tiers=["1k", "10k"])
+        >>> results = runner.run()
+        >>> runner.save(results, "path/to/results.json")
+        >>> baseline = BenchmarkRunner.load("path/to/baseline.json")
+        >>> BenchmarkRunner.compare(results, baseline, threshold=0.2)
+        [{"tier": "10k", "name": "IxbrlParser.create", ...}]
+    """
+
+    TIERS = {
+        "1k": 1_000,
+        "10k": 10_000,
+        "100k": 100_000,
+        "1m": 1_000_000,
+    }
+
+    # 比較に使用する統計量
+    METRIC = "min"
+
+    # 読み込み時間を計測するパッケージ
+    IMPORT_PACKAGES = [
+        "app.parser",
+        "app.manager",
+        "app.models",
+        "app.connect",
+        "app.utils",
+    ]
+
+    # ヘッダー情報の取得(IXBRLManager.get_ix_header)に必要なモジュール
+    IX_HEADER_MODULES = ["app.manager.ixbrl_manager"]
+
+    def __init__(
+        self,
+        work_dir,
+        tiers=("1k",),
+        repeat=3,
+        benchmarks=None,
+        generator_options=None,
+    ) -> None:
+        """
+        Parameters:
+            work_dir (str): 合成書類と出力先を保存するディレクトリ
+            tiers (list[str | int]): ティア名(1k, 10k, 100k, 1m)
+                またはファクト数
+            repeat (int): 1つのベンチマークの計測回数
+            benchmarks (list[str]): 計測するベンチマーク名
+                (省略時は全て)
+            generator_options (dict): SyntheticFilingGeneratorの引数
+        """
+        self.work_dir = Path(work_dir)
+        self.tiers = [self.tier_name(tier) for tier in tiers]
+        self.repeat = repeat
+        self.benchmarks = benchmarks
+        self.generator_options = generator_options or {}
+
+    @classmethod
+    def tier_name(cls, tier):
+        """ティア名を正規化する(ファクト数の場合はそのまま文字列にする)"""
+        tier = str(tier).lower()
+        if tier not in cls.TIERS and not tier.isdigit():
+            raise ValueError(
+                f"ティアが不正です。[{tier}] "
+                f"{list(cls.TIERS)}またはファクト数を指定してください。"
+            )
+        return tier
+
+    @classmethod
+    def tier_facts(cls, tier):
+        """ティアのファクト数を取得する"""
+        return cls.TIERS.get(tier) or int(tier)
+
+    def filing_dir(self, tier):
+        """ティアの合成書類を生成し、展開したディレクトリを取得する
+
+        同じ生成条件のzipが存在する場合は再利用します。
+
+        Returns:
+            Path: 展開したディレクトリ
+        """
+        generator = SyntheticFilingGenerator(
+            n_facts=self.tier_facts(tier), **self.generator_options
+        )
+        key = "-".join(str(value) for value in generator.params.values())
+        zip_path = self.work_dir / "filings" / f"{key}.zip"
+        directory = self.work_dir / "filings" / key
+        if not zip_path.exists():
+            generator.write_zip(zip_path)
+            shutil.rmtree(directory, ignore_errors=True)
+        if not directory.exists():
+            with zipfile.ZipFile(zip_path) as zf:
+                zf.extractall(directory)
+        FilingContext.invalidate(directory)
+        return directory
+
+    def cases(self, directory):
+        """ベンチマークの一覧を取得する
+
+        パーサーの読み込み等の準備は、計測するベンチマークのみ
+        setupの呼び出し時に行います(計測時間には含めない)。
+        同じファイルのパーサーは、そのファイルのベンチマーク間で
+        再利用します。
+
+        Parameters:
+            directory (Path): 合成書類のディレクトリ
+
+        Yields:
+            tuple[str, Callable]: ベンチマーク名と、計測する処理を
+                返すsetup
+        """
+        output_path = (self.work_dir / "output").as_posix()
+        attachment = directory / "XBRLData" / "Attachment"
+        prefix = SyntheticFilingGenerator.FR_PREFIX
+
+        ixbrl = sorted(attachment.glob("*-ixbrl.htm"))[0].as_posix()
+        schema = (attachment / f"{prefix}.xsd").as_posix()
+        files = {
+            LabelParser: (attachment / f"{prefix}-lab.xml").as_posix(),
+            CalLinkParser: (attachment / f"{prefix}-cal.xml").as_posix(),
+            DefLinkParser: (attachment / f"{prefix}-def.xml").as_posix(),
+            PreLinkParser: (attachment / f"{prefix}-pre.xml").as_posix(),
+        }
+        qualitative = (attachment / "qualitative.htm").as_posix()
+
+        @functools.cache
+        def parsed(parser_class, path, *args):
+            return parser_class.create(path, *args)
+
+        def ready(func):
+            return lambda: func
+
+        def method_case(parser_class, path, method, *args):
+            return lambda: getattr(
+                parsed(parser_class, path, *args), method
+            )
+
+        # パッケージの読み込み(依存パッケージは初回の使用時に読み込む)
+        yield "import.packages", ready(
+            lambda: self.import_time(self.IMPORT_PACKAGES)
+        )
+        yield "import.ix_header", ready(
+            lambda: self.import_time(self.IX_HEADER_MODULES)
+        )
+
+        # パーサー
+        yield "IxbrlParser.create", ready(
+            lambda: IxbrlParser.create(ixbrl)
+        )
+        for method in ["ix_non_fractions", "ix_non_numeric"]:
+            yield f"IxbrlParser.{method}", method_case(
+                IxbrlParser, ixbrl, method
+            )
+        yield "IxbrlParser.iter_non_numeric", ready(
+            lambda: list(IxbrlParser(ixbrl).iter_non_numeric())
+        )
+
+        yield "SchemaParser.create", ready(
+            lambda: SchemaParser.create(schema)
+        )
+        yield "SchemaParser.prescan", ready(
+            lambda: SchemaParser.prescan(schema)
+        )
+        for method in ["import_schemas", "link_base_refs", "elements"]:
+            yield f"SchemaParser.{method}", method_case(
+                SchemaParser, schema, method
+            )
+
+        methods = {
+            LabelParser: [
+                "link_labels",
+                "link_label_locs",
+                "link_label_arcs",
+                "role_refs",
+                "resolved_labels",
+            ],
+        }
+        for parser_class, path in files.items():
+            name = parser_class.__name__
+            yield f"{name}.create", ready(
+                lambda c=parser_class, p=path: c.create(p, output_path)
+            )
+            for method in methods.get(
+                parser_class,
+                ["link_roles", "link_locs", "link_arcs", "link_base"],
+            ):
+                yield f"{name}.{method}", method_case(
+                    parser_class, path, method, output_path
+                )
+
+        yield "QualitativeParser.qualitative_info", ready(
+            lambda: QualitativeParser(qualitative).qualitative_info()
+        )
+
+        # マネージャー
+        def manager_case(factory, method):
+            def run():
+                FilingContext.invalidate(directory)
+                result = getattr(factory(), method)()
+                # ジェネレーターは最後まで消費する
+                if isinstance(result, GeneratorType):
+                    result = list(result)
+                return result
+
+            return run
+
+        managers = {
+            "IXBRLManager": (
+                lambda: IXBRLManager(directory),
+                [
+                    "get_ix_non_fraction",
+                    "get_ix_non_numeric",
+                    "get_ix_header",
+                    "get_ix_summary",
+                ],
+            ),
+            "LabelManager": (
+                lambda: LabelManager(directory, output_path),
+                [
+                    "get_link_labels",
+                    "get_link_label_locs",
+                    "get_link_label_arcs",
+                    "get_label_table",
+                ],
+            ),
+            "CalLinkManager": (
+                lambda: CalLinkManager(directory, output_path),
+                ["get_link_roles", "get_link_locs", "get_link_arcs"],
+            ),
+            "DefLinkManager": (
+                lambda: DefLinkManager(directory, output_path),
+                ["get_link_roles", "get_link_locs", "get_link_arcs"],
+            ),
+            "PreLinkManager": (
+                lambda: PreLinkManager(directory, output_path),
+                ["get_link_roles", "get_link_locs", "get_link_arcs"],
+            ),
+            "QualitativeManager": (
+                lambda: QualitativeManager(directory),
+                ["get_qualitative_infos"],
+            ),
+        }
+        for name, (factory, methods) in managers.items():
+            for method in methods:
+                yield f"{name}.{method}", ready(
+                    manager_case(factory, method)
+                )
+
+    @staticmethod
+    def import_time(modules):
+        """新しいプロセスでモジュールを読み込み、読み込み時間(秒)を取得する
+
+        インタプリタの起動時間を含めないよう、子プロセスの中で
+        読み込みの前後の時刻を計測します。
+
+        Parameters:
+            modules (list[str]): 読み込むモジュール名
+
+        Returns:
+            float: 読み込み時間(秒)
+        """
+        code = (
+            "import time\n"
+            "start = time.perf_counter()\n"
+            f"import {', '.join(modules)}\n"
+            "print(time.perf_counter() - start)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parents[2],
+        )
+        return float(result.stdout.strip().splitlines()[-1])
+
+    def measure(self, func):
+        """処理をrepeat回実行し、処理時間(秒)の統計量を取得する
+
+        Returns:
+            dict: min, median, mean, runs
+        """
+        runs = []
+        for _ in range(self.repeat):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - start)
+        return {
+            "min": min(runs),
+            "median": statistics.median(runs),
+            "mean": statistics.fmean(runs),
+            "runs": runs,
+        }
+
+    def run(self):
+        """全てのティアのベンチマークを計測する
+
+        Returns:
+            dict: 計測結果
+        """
+        results = {}
+        for tier in self.tiers:
+            directory = self.filing_dir(tier)
+            results[tier] = {}
+            for name, setup in self.cases(directory):
+                if self.benchmarks and name not in self.benchmarks:
+                    continue
+                results[tier][name] = self.measure(setup())
+            FilingContext.invalidate(directory)
+
+        return {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": self.repeat,
+            "generator": self.generator_options,
+            "results": results,
+        }
+
+    @staticmethod
+    def save(results, path):
+        """計測結果をJSONで保存する"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def load(path):
+        """保存した計測結果を読み込む"""
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @classmethod
+    def compare(cls, results, baseline, threshold=0.2, min_seconds=0.005):
+        """計測結果をベースラインと比較し、遅くなったベンチマークを取得する
+
+        処理時間がベースラインの(1 + threshold)倍を超え、かつ差が
+        min_seconds秒を超えた場合に遅くなったと判定します。
+        どちらかにのみ存在するベンチマークは比較しません。
+
+        Parameters:
+            results (dict): 計測結果
+            baseline (dict): ベースラインの計測結果
+            threshold (float): 許容する処理時間の増加率
+            min_seconds (float): 計測の揺らぎとして無視する差(秒)
+
+        Returns:
+            list[dict]: tier, name, baseline, current, ratio
+        """
+        regressions = []
+        for tier, benchmarks in results["results"].items():
+            base_benchmarks = baseline["results"].get(tier, {})
+            for name, stats in benchmarks.items():
+                if name not in base_benchmarks:
+                    continue
+                current = stats[cls.METRIC]
+                base = base_benchmarks[name][cls.METRIC]
+                if (
+                    current > base * (1 + threshold)
+                    and current - base > min_seconds
+                ):
+                    regressions.append(
+                        {
+                            "tier": tier,
+                            "name": name,
+                            "baseline": base,
+                            "current": current,
+                            "ratio": (
+                                current / base if base else float("inf")
+                            ),
+                        }
+                    )
+        return regressions
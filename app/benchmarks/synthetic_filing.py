@@ -0,0 +1,610 @@
+import random
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+
+class SyntheticFilingGenerator:
+    """ベンチマーク用の合成TDnet書類(XBRLデータ)を生成するクラス
+
+    実際の決算短信と同じディレクトリ構成・ファイル名で、下記のファイルを
+    zipに書き出します。linkbaseRefは全てローカルのファイルを参照するため、
+    解析時にネットワークへ接続しません。
+
+    * XBRLData/Summary: サマリーのixbrl.htm, .xsd, def.xml
+    * XBRLData/Attachment: 財務諸表のixbrl.htm, .xsd, lab.xml,
+      lab-en.xml, cal.xml, def.xml, pre.xml, qualitative.htm
+
+    ファクト数・アーク数・ラベル数・定性情報のセクション数を指定でき、
+    同じ引数とシード値からは同じ内容のファイルが生成されます。
+
+    Examples:
+        >>> generator = SyntheticFilingGenerator(n_facts=10_000)
+        >>> generator.write_zip("path/to/filing.zip")
+        >>> generator.write("path/to/directory")
+    """
+
+    CODE = "99990"
+
+    FR_PREFIX = "tse-acedjpfr-99990-2024-03-31-01-2024-05-15"
+
+    SM_PREFIX = "tse-acedjpsm-99990-20240515399990"
+
+    # 財務諸表のixbrl.htm(書類番号, 書類種別)
+    DOCUMENTS = [
+        ("0101010", "acbs01"),
+        ("0102010", "acpl01"),
+        ("0103010", "acss01"),
+        ("0104010", "accf01"),
+    ]
+
+    CONTEXTS = [
+        ("CurrentYearInstant", "2024-03-31", None),
+        ("Prior1YearInstant", "2023-03-31", None),
+        ("CurrentYearDuration", "2023-04-01", "2024-03-31"),
+        ("Prior1YearDuration", "2022-04-01", "2023-03-31"),
+    ]
+
+    LABEL_ROLES = ["label", "verboseLabel", "totalLabel", "terseLabel"]
+
+    # 1つの親要素に対する子要素の数(計算・表示・定義リンクの木の分岐数)
+    FANOUT = 8
+
+    WORDS = [
+        "売上高",
+        "営業利益",
+        "経常利益",
+        "当期純利益",
+        "前年同期",
+        "比較",
+        "増加",
+        "減少",
+        "しました",
+        "いたしました",
+        "連結会計年度",
+        "における",
+        "わが国経済",
+        "は、",
+        "。",
+        "需要",
+        "回復",
+        "原材料価格",
+        "の高騰",
+        "為替",
+        "の影響",
+        "により",
+        "、",
+        "百万円",
+        "(前年同期比",
+        "%増)",
+    ]
+
+    XML_HEADER = '<?xml version="1.0" encoding="utf-8"?>\n'
+
+    NS_LINKBASE = (
+        'xmlns:xlink="http://www.w3.org/1999/xlink" '
+        'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+        'xmlns:xbrldt="http://xbrl.org/2005/xbrldt" '
+        'xmlns:link="http://www.xbrl.org/2003/linkbase"'
+    )
+
+    ROLE_BASE = "http://www.xbrl.tdnet.info/jp/tse/tdnet/role/"
+
+    ARCROLE_BASE = "http://www.xbrl.org/2003/arcrole/"
+
+    DIM_ARCROLE_BASE = "http://xbrl.org/int/dim/arcrole/"
+
+    # 1回の書き込みにまとめる行数
+    CHUNK_LINES = 4096
+
+    def __init__(
+        self,
+        n_facts=1_000,
+        n_arcs=None,
+        n_labels=None,
+        n_sections=None,
+        n_documents=2,
+        seed=0,
+    ) -> None:
+        """
+        Parameters:
+            n_facts (int): 財務諸表のix:nonFractionの件数
+            n_arcs (int): 計算・表示・定義リンクそれぞれのアーク数
+                (省略時は要素数 - 1)
+            n_labels (int): 日本語・英語それぞれのラベル数
+                (省略時は要素数)
+            n_sections (int): qualitative.htmのセクション数
+                (省略時はファクト数の1/100)
+            n_documents (int): 財務諸表のixbrl.htmのファイル数(1～4)
+            seed (int): 乱数のシード値
+        """
+        if not 1 <= n_documents <= len(self.DOCUMENTS):
+            raise ValueError(
+                f"n_documentsは1～{len(self.DOCUMENTS)}を指定してください。"
+            )
+
+        self.n_facts = int(n_facts)
+        # 要素ごとに当期・前期のファクトを持つ
+        self.n_concepts = max(2, -(-self.n_facts // 2))
+        self.n_arcs = (
+            self.n_concepts - 1 if n_arcs is None else int(n_arcs)
+        )
+        self.n_labels = self.n_concepts if n_labels is None else n_labels
+        self.n_sections = (
+            max(1, self.n_facts // 100)
+            if n_sections is None
+            else int(n_sections)
+        )
+        self.n_documents = n_documents
+        self.seed = seed
+
+    @property
+    def params(self):
+        """生成条件を取得する
+
+        Returns:
+            dict: 生成条件
+        """
+        return {
+            "n_facts": self.n_facts,
+            "n_arcs": self.n_arcs,
+            "n_labels": self.n_labels,
+            "n_sections": self.n_sections,
+            "n_documents": self.n_documents,
+            "seed": self.seed,
+        }
+
+    def concept(self, index):
+        """要素名(接頭辞_ローカル名)を取得する"""
+        return f"tse-acedjpfr-{self.CODE}_SyntheticItem{index:07d}"
+
+    def write_zip(self, zip_path):
+        """書類をzipに書き出す
+
+        Parameters:
+            zip_path (str): 出力先のzipファイルのパス
+
+        Returns:
+            Path: zipファイルのパス
+        """
+        zip_path = Path(zip_path)
+        zip_path.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(
+            zip_path, "w", compression=zipfile.ZIP_DEFLATED
+        ) as zf:
+            for name, chunks in self.files():
+                with zf.open(name, "w") as f:
+                    for chunk in chunks:
+                        f.write(chunk.encode("utf-8"))
+        return zip_path
+
+    def write(self, directory_path):
+        """書類をディレクトリに書き出す
+
+        Parameters:
+            directory_path (str): 出力先のディレクトリのパス
+
+        Returns:
+            Path: ディレクトリのパス
+        """
+        directory_path = Path(directory_path)
+        for name, chunks in self.files():
+            path = directory_path / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        return directory_path
+
+    def files(self):
+        """書類のファイル名と内容を取得する
+
+        内容は文字列のチャンクを返すイテレータのため、大きなファイルも
+        メモリに全て展開せずに書き出せます。
+
+        Yields:
+            tuple[str, Iterator[str]]: zip内のファイル名と内容
+        """
+        sm, fr = "XBRLData/Summary", "XBRLData/Attachment"
+        yield f"{sm}/{self.SM_PREFIX}-ixbrl.htm", self._summary_ixbrl()
+        yield f"{sm}/{self.SM_PREFIX}.xsd", self._summary_schema()
+        yield f"{sm}/{self.SM_PREFIX}-def.xml", self._summary_definition()
+
+        for number, (doc_no, doc_type) in enumerate(
+            self.DOCUMENTS[: self.n_documents]
+        ):
+            yield (
+                f"{fr}/{doc_no}-{doc_type}-{self.FR_PREFIX}-ixbrl.htm",
+                self._attachment_ixbrl(number),
+            )
+        yield f"{fr}/{self.FR_PREFIX}.xsd", self._attachment_schema()
+        yield f"{fr}/{self.FR_PREFIX}-lab.xml", self._label("ja")
+        yield f"{fr}/{self.FR_PREFIX}-lab-en.xml", self._label("en")
+        yield f"{fr}/{self.FR_PREFIX}-cal.xml", self._link("calculation")
+        yield f"{fr}/{self.FR_PREFIX}-def.xml", self._link("definition")
+        yield f"{fr}/{self.FR_PREFIX}-pre.xml", self._link("presentation")
+        yield f"{fr}/qualitative.htm", self._qualitative()
+
+    def _chunked(self, lines):
+        """行のイテレータをCHUNK_LINES行ごとの文字列にまとめる"""
+        buffer = []
+        for line in lines:
+            buffer.append(line)
+            if len(buffer) >= self.CHUNK_LINES:
+                yield "\n".join(buffer) + "\n"
+                buffer = []
+        if buffer:
+            yield "\n".join(buffer) + "\n"
+
+    def _ixbrl_lines(self, body, namespaces):
+        """ix:headerとコンテキストを含むixbrl.htmの行を生成する"""
+        yield self.XML_HEADER + (
+            '<html xmlns="http://www.w3.org/1999/xhtml" '
+            'xmlns:xbrli="http://www.xbrl.org/2003/instance" '
+            'xmlns:xbrldi="http://xbrl.org/2006/xbrldi" '
+            'xmlns:ix="http://www.xbrl.org/2008/inlineXBRL" '
+            'xmlns:ixt="http://www.xbrl.org/inlineXBRL/'
+            'transformation/2011-07-31" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+            'xmlns:iso4217="http://www.xbrl.org/2003/iso4217" '
+            f"{namespaces}>"
+        )
+        yield "<head><title>synthetic</title></head><body>"
+        yield '<div style="display:none"><ix:header><ix:resources>'
+        for context_id, start, end in self.CONTEXTS:
+            if end is None:
+                period = f"<xbrli:instant>{start}</xbrli:instant>"
+            else:
+                period = (
+                    f"<xbrli:startDate>{start}</xbrli:startDate>"
+                    f"<xbrli:endDate>{end}</xbrli:endDate>"
+                )
+            yield (
+                f'<xbrli:context id="{context_id}"><xbrli:entity>'
+                '<xbrli:identifier scheme="http://www.tse.or.jp/sicc">'
+                f"{self.CODE}</xbrli:identifier></xbrli:entity>"
+                f"<xbrli:period>{period}</xbrli:period></xbrli:context>"
+            )
+        yield (
+            '<xbrli:unit id="JPY"><xbrli:measure>iso4217:JPY'
+            "</xbrli:measure></xbrli:unit>"
+        )
+        yield "</ix:resources></ix:header></div>"
+        yield from body
+        yield "</body></html>"
+
+    @staticmethod
+    def _non_fraction(name, context_ref, value):
+        """ix:nonFraction要素を生成する"""
+        sign = ' sign="-"' if value < 0 else ""
+        return (
+            f'<td><ix:nonFraction contextRef="{context_ref}" '
+            f'decimals="-6" scale="6" format="ixt:numdotdecimal" '
+            f'name="{name}" unitRef="JPY"{sign}>{abs(value):,}'
+            "</ix:nonFraction></td>"
+        )
+
+    def _summary_ixbrl(self):
+        rng = random.Random(self.seed)
+        header = [
+            ("CompanyName", "合成データ株式会社"),
+            ("SecuritiesCode", self.CODE),
+            ("DocumentName", "決算短信〔日本基準〕(連結)"),
+            ("FilingDate", "2024年5月15日"),
+            ("TypeOfCurrentPeriod", "通期"),
+        ]
+        summary = ["NetSales", "OperatingIncome", "OrdinaryIncome"]
+        summary.append("NetIncome")
+
+        def body():
+            yield "<table>"
+            for name, value in header:
+                format_str = (
+                    ' format="ixt:dateyearmonthdaycjk"'
+                    if name == "FilingDate"
+                    else ""
+                )
+                yield (
+                    '<tr><td><ix:nonNumeric contextRef="CurrentYearInstant"'
+                    f'{format_str} name="tse-ed-t:{name}">'
+                    f"{escape(value)}</ix:nonNumeric></td></tr>"
+                )
+            for name in summary:
+                for context_ref in [
+                    "CurrentYearDuration_ConsolidatedMember_ResultMember",
+                    "Prior1YearDuration_ConsolidatedMember_ResultMember",
+                ]:
+                    yield "<tr>" + self._non_fraction(
+                        f"tse-ed-t:{name}",
+                        context_ref,
+                        rng.randint(1_000, 999_999),
+                    ) + "</tr>"
+            yield "</table>"
+
+        return self._chunked(
+            self._ixbrl_lines(
+                body(),
+                'xmlns:tse-ed-t="http://www.xbrl.tdnet.info/'
+                'taxonomy/jp/tse/tdnet/ed/t/2014-01-12"',
+            )
+        )
+
+    def _summary_schema(self):
+        yield self.XML_HEADER + (
+            '<schema xmlns="http://www.w3.org/2001/XMLSchema" '
+            'xmlns:xlink="http://www.w3.org/1999/xlink" '
+            'xmlns:link="http://www.xbrl.org/2003/linkbase" '
+            'targetNamespace="http://www.xbrl.tdnet.info/jp/tse/tdnet/'
+            f'ac/edjp/sm/{self.CODE}/20240515399990">'
+            "<annotation><appinfo>"
+            + self._link_base_ref(
+                f"{self.SM_PREFIX}-def.xml", "definitionLinkbaseRef"
+            )
+            + "</appinfo></annotation></schema>\n"
+        )
+
+    def _summary_definition(self):
+        yield self.XML_HEADER + (
+            f"<link:linkbase {self.NS_LINKBASE}>"
+            '<link:definitionLink xlink:type="extended" '
+            f'xlink:role="{self.ROLE_BASE}RoleSummary">'
+            '<link:loc xlink:type="locator" '
+            'xlink:href="http://www.xbrl.tdnet.info/taxonomy/jp/tse/'
+            "tdnet/ed/t/2014-01-12/tse-ed-t-2014-01-12.xsd"
+            '#tse-ed-t_NetSales" xlink:label="tse-ed-t_NetSales" />'
+            "</link:definitionLink></link:linkbase>\n"
+        )
+
+    @staticmethod
+    def _link_base_ref(href, role):
+        return (
+            '<link:linkbaseRef xlink:type="simple" '
+            f'xlink:href="{href}" '
+            f'xlink:role="http://www.xbrl.org/2003/role/{role}" '
+            'xlink:arcrole="http://www.w3.org/1999/xlink/properties/'
+            'linkbase" />'
+        )
+
+    def _attachment_ixbrl(self, number):
+        rng = random.Random(self.seed * 31 + number + 1)
+        n_concepts = self.n_concepts
+        # 要素をファイルごとに連続した範囲で分割する
+        start = n_concepts * number // self.n_documents
+        end = n_concepts * (number + 1) // self.n_documents
+        prefix = f"tse-acedjpfr-{self.CODE}"
+
+        def body():
+            yield "<table>"
+            for index in range(start, end):
+                name = self.concept(index).replace(
+                    f"{prefix}_", f"{prefix}:"
+                )
+                context = "Instant" if index % 2 == 0 else "Duration"
+                cells = []
+                for period in ["CurrentYear", "Prior1Year"]:
+                    # 要素ごとに当期・前期の2件(n_factsが奇数の場合は1件)
+                    if index * 2 + len(cells) >= self.n_facts:
+                        break
+                    value = rng.randint(-99_999, 9_999_999)
+                    cells.append(
+                        self._non_fraction(
+                            name, f"{period}{context}", value
+                        )
+                    )
+                yield f"<tr><td>項目{index}</td>{''.join(cells)}</tr>"
+            yield "</table>"
+
+        return self._chunked(
+            self._ixbrl_lines(
+                body(),
+                f'xmlns:{prefix}="http://www.xbrl.tdnet.info/jp/tse/tdnet/'
+                f'ac/edjp/fr/{self.CODE}/2024-03-31/01/2024-05-15"',
+            )
+        )
+
+    def _attachment_schema(self):
+        def lines():
+            yield self.XML_HEADER + (
+                '<schema xmlns="http://www.w3.org/2001/XMLSchema" '
+                'xmlns:xlink="http://www.w3.org/1999/xlink" '
+                'xmlns:link="http://www.xbrl.org/2003/linkbase" '
+                'xmlns:xbrli="http://www.xbrl.org/2003/instance" '
+                'elementFormDefault="qualified" '
+                'targetNamespace="http://www.xbrl.tdnet.info/jp/tse/tdnet/'
+                f'ac/edjp/fr/{self.CODE}/2024-03-31/01/2024-05-15">'
+            )
+            yield (
+                '<import schemaLocation="http://www.xbrl.org/2003/'
+                'xbrl-instance-2003-12-31.xsd" '
+                'namespace="http://www.xbrl.org/2003/instance" />'
+            )
+            yield "<annotation><appinfo>"
+            for suffix, role in [
+                ("pre.xml", "presentationLinkbaseRef"),
+                ("def.xml", "definitionLinkbaseRef"),
+                ("cal.xml", "calculationLinkbaseRef"),
+                ("lab.xml", "labelLinkbaseRef"),
+                ("lab-en.xml", "labelLinkbaseRef"),
+            ]:
+                yield self._link_base_ref(
+                    f"{self.FR_PREFIX}-{suffix}", role
+                )
+            yield "</appinfo></annotation>"
+            for index in range(self.n_concepts):
+                period_type = "instant" if index % 2 == 0 else "duration"
+                yield (
+                    f'<element id="{self.concept(index)}" '
+                    f'name="SyntheticItem{index:07d}" '
+                    'xbrli:balance="debit" '
+                    f'xbrli:periodType="{period_type}" nillable="true" '
+                    'substitutionGroup="xbrli:item" '
+                    'type="xbrli:monetaryItemType" />'
+                )
+            yield "</schema>"
+
+        return self._chunked(lines())
+
+    def _loc(self, index):
+        concept = self.concept(index)
+        return (
+            '<link:loc xlink:type="locator" '
+            f'xlink:href="{self.FR_PREFIX}.xsd#{concept}" '
+            f'xlink:label="{concept}" />'
+        )
+
+    def _label(self, lang):
+        rng = random.Random(self.seed * 7 + (lang == "en"))
+        n_concepts = self.n_concepts
+        lang_code = "ja" if lang == "ja" else "en"
+        word = "項目" if lang == "ja" else "Item"
+
+        def lines():
+            yield self.XML_HEADER + f"<link:linkbase {self.NS_LINKBASE}>"
+            yield (
+                '<link:roleRef xlink:type="simple" '
+                f'xlink:href="{self.FR_PREFIX}.xsd#RoleSyntheticLabel" '
+                f'roleURI="{self.ROLE_BASE}RoleSyntheticLabel" />'
+            )
+            yield (
+                '<link:labelLink xlink:type="extended" '
+                'xlink:role="http://www.xbrl.org/2003/role/link">'
+            )
+            for number in range(self.n_labels):
+                index = number % n_concepts
+                role = self.LABEL_ROLES[
+                    (number // n_concepts) % len(self.LABEL_ROLES)
+                ]
+                concept = self.concept(index)
+                label = f"{concept}_label_{number}"
+                if number < n_concepts:
+                    yield self._loc(index)
+                text = f"{word}{index}{rng.choice(self.WORDS)}"
+                yield (
+                    f'<link:label xml:lang="{lang_code}" '
+                    'xlink:type="resource" '
+                    f'xlink:label="{label}" '
+                    f'xlink:role="http://www.xbrl.org/2003/role/{role}">'
+                    f"{escape(text)}</link:label>"
+                )
+                yield (
+                    '<link:labelArc xlink:type="arc" '
+                    f'xlink:from="{concept}" xlink:to="{label}" '
+                    f'xlink:arcrole="{self.ARCROLE_BASE}concept-label" '
+                    'order="1" />'
+                )
+            yield "</link:labelLink></link:linkbase>"
+
+        return self._chunked(lines())
+
+    def _link(self, link_type):
+        """計算・定義・表示リンクを生成する
+
+        要素を分岐数FANOUTの木に並べ、アーク数が要素数 - 1を超える場合は
+        拡張リンクロールを増やして同じ木を繰り返します。
+        """
+        arc_tag = f"link:{link_type}Arc"
+        arcrole = {
+            "calculation": f"{self.ARCROLE_BASE}summation-item",
+            "definition": f"{self.DIM_ARCROLE_BASE}domain-member",
+            "presentation": f"{self.ARCROLE_BASE}parent-child",
+        }[link_type]
+        per_role = self.n_concepts - 1
+        n_roles = max(1, -(-self.n_arcs // per_role))
+
+        def lines():
+            yield self.XML_HEADER + f"<link:linkbase {self.NS_LINKBASE}>"
+            for role in range(n_roles):
+                yield (
+                    '<link:roleRef xlink:type="simple" '
+                    f'xlink:href="{self.FR_PREFIX}.xsd#RoleSynthetic{role}" '
+                    f'roleURI="{self.ROLE_BASE}RoleSynthetic{role}" />'
+                )
+            for role in range(n_roles):
+                n_arcs = min(per_role, self.n_arcs - role * per_role)
+                yield (
+                    f'<link:{link_type}Link xlink:type="extended" '
+                    f'xlink:role="{self.ROLE_BASE}RoleSynthetic{role}">'
+                )
+                for index in range(n_arcs + 1):
+                    yield self._loc(index)
+                if link_type == "definition":
+                    yield from self._dimension_arcs()
+                for child in range(1, n_arcs + 1):
+                    parent = (child - 1) // self.FANOUT
+                    weight = (
+                        ' weight="1"' if link_type == "calculation" else ""
+                    )
+                    yield (
+                        f'<{arc_tag} xlink:type="arc" '
+                        f'xlink:from="{self.concept(parent)}" '
+                        f'xlink:to="{self.concept(child)}" '
+                        f'xlink:arcrole="{arcrole}" '
+                        f'order="{(child - 1) % self.FANOUT + 1}"'
+                        f"{weight} />"
+                    )
+                yield f"</link:{link_type}Link>"
+            yield "</link:linkbase>"
+
+        return self._chunked(lines())
+
+    def _dimension_arcs(self):
+        """ハイパーキューブ・軸・メンバーの定義を生成する"""
+        prefix = f"tse-acedjpfr-{self.CODE}"
+        names = {
+            "table": f"{prefix}_SyntheticTable",
+            "axis": f"{prefix}_SyntheticAxis",
+            "domain": f"{prefix}_SyntheticDomainMember",
+            "member": f"{prefix}_SyntheticMember",
+        }
+        for concept in names.values():
+            yield (
+                '<link:loc xlink:type="locator" '
+                f'xlink:href="{self.FR_PREFIX}.xsd#{concept}" '
+                f'xlink:label="{concept}" />'
+            )
+        for arcrole, source, target, extra in [
+            (
+                "all",
+                self.concept(0),
+                names["table"],
+                'xbrldt:closed="true"',
+            ),
+            ("hypercube-dimension", names["table"], names["axis"], ""),
+            ("dimension-domain", names["axis"], names["domain"], ""),
+            ("dimension-default", names["axis"], names["domain"], ""),
+            ("domain-member", names["domain"], names["member"], ""),
+        ]:
+            yield (
+                '<link:definitionArc xlink:type="arc" '
+                f'xlink:from="{source}" xlink:to="{target}" '
+                f'xlink:arcrole="{self.DIM_ARCROLE_BASE}{arcrole}" '
+                f'order="1" {extra}/>'
+            )
+
+    def _qualitative(self):
+        rng = random.Random(self.seed * 13 + 5)
+
+        def lines():
+            yield self.XML_HEADER + (
+                '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+                "<title>qualitative</title>"
+                "<style>.smt_head2{font-size:10.5pt}</style></head><body>"
+            )
+            for number in range(self.n_sections):
+                if number % 4 == 0:
+                    yield (
+                        f'<p class="smt_head2">{number // 4 + 1}．'
+                        f"経営成績等の概況{number // 4 + 1}</p>"
+                    )
+                yield (
+                    f'<p class="smt_head3">（{number % 4 + 1}）'
+                    f"当期の経営成績の概況{number}</p>"
+                )
+                for _ in range(3):
+                    text = "".join(
+                        rng.choice(self.WORDS) for _ in range(40)
+                    )
+                    yield f'<p class="smt_text6">{text}</p>'
+            yield "</body></html>"
+
+        return self._chunked(lines())
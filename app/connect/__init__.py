@@ -1,3 +1,20 @@
-from .postgre_sql_connector import PostgreSqlConnector as PostgresConnector
+from typing import TYPE_CHECKING
+
+from app.utils.lazy_loader import lazy_attributes
+
+if TYPE_CHECKING:
+    from .postgre_sql_connector import (
+        PostgreSqlConnector as PostgresConnector,
+    )
 
 __all__ = ["PostgresConnector"]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "PostgresConnector": (
+            ".postgre_sql_connector",
+            "PostgreSqlConnector",
+        ),
+    },
+)
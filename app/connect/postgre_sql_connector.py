@@ -1,5 +1,7 @@
 import psycopg2
 
+from app.utils import Instrumentation
+
 
 class PostgreSqlConnector:
     """PostgreSQL database コネクター"""
@@ -24,6 +26,7 @@ class PostgreSqlConnector:
         self.password = password
         self.connection = None
 
+    @Instrumentation.timed()
     def connect(self):
         """データベースに接続
 
@@ -55,6 +58,7 @@ class PostgreSqlConnector:
             self.connection.close()
             print("Disconnected from PostgreSQL database.")
 
+    @Instrumentation.timed()
     def edit_table(self, table_name, column_name, new_value, condition):
         """テーブルのデータを更新
 
@@ -79,6 +83,7 @@ class PostgreSqlConnector:
                 cursor.close()
 
     # 新規テーブルを作成する関数を追加
+    @Instrumentation.timed()
     def create_table(self, table_name, columns):
         """テーブルを作成
 
@@ -100,6 +105,7 @@ class PostgreSqlConnector:
                 cursor.close()
 
     # テーブルに新規データを追加する関数を追加
+    @Instrumentation.timed()
     def add_data(self, table_name, columns, values):
         """テーブルにデータを追加
 
@@ -128,6 +134,7 @@ class PostgreSqlConnector:
                 cursor.close()
 
     # データフレームからデータを追加する関数を追加
+    @Instrumentation.timed()
     def add_data_from_df(self, table_name, df):
         """データフレームからデータを追加
 
@@ -146,6 +153,7 @@ class PostgreSqlConnector:
                     VALUES ({', '.join(['%s']*len(df.columns))})"
                 cursor.execute(query, tuple(row))
             self.connection.commit()
+            Instrumentation.count("PostgreSqlConnector.rows", len(df))
             print("Data added successfully!")
         except (Exception, psycopg2.Error) as error:
             print("Error while adding data:", error)
@@ -155,6 +163,7 @@ class PostgreSqlConnector:
                 cursor.close()
 
     # データフレームと同じデータ構造と型のテーブルを作成する関数を追加
+    @Instrumentation.timed()
     def create_table_from_df(self, table_name, df):
         """データフレームと同じデータ構造と型のテーブルを作成してデータを追加
 
@@ -204,6 +213,7 @@ class PostgreSqlConnector:
                 cursor.close()
 
     # 既存のテーブルに外部キー制約を追加する関数を追加
+    @Instrumentation.timed()
     def add_foreign_key(
         self, table_name, column_name, ref_table, ref_column
     ):
@@ -231,6 +241,7 @@ class PostgreSqlConnector:
             if cursor:
                 cursor.close()
 
+    @Instrumentation.timed()
     def set_unique_key(self, table_name, column_names: list[str]):
         """テーブルに一意制約を追加
 
@@ -253,6 +264,7 @@ class PostgreSqlConnector:
                 cursor.close()
 
     # テーブルが存在するか確認する関数を追加
+    @Instrumentation.timed()
     def is_exist_table(self, table_name):
         """テーブルが存在するか確認
 
@@ -279,6 +291,7 @@ class PostgreSqlConnector:
                 cursor.close()
 
     # データフレームからテーブルにデータを挿入する関数を追加、重複するデータがある場合は挿入しない
+    @Instrumentation.timed()
     def add_data_from_df_ignore_duplicate(self, table_name, df):
         """データフレームからデータを追加（重複するデータがある場合は挿入しない）
 
@@ -298,6 +311,7 @@ class PostgreSqlConnector:
                         ON CONFLICT DO NOTHING"
                 cursor.execute(query, tuple(row))
             self.connection.commit()
+            Instrumentation.count("PostgreSqlConnector.rows", len(df))
             print("Data added successfully!")
         except (Exception, psycopg2.Error) as error:
             print("Error while adding data:", error)
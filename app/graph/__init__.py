@@ -0,0 +1,12 @@
+from .base_link_graph import BaseLinkGraph
+from .calculation import CalculationGraph, CalculationNetwork
+from .definition import DimensionIndex
+from .presentation import PresentationTree
+
+__all__ = [
+    "BaseLinkGraph",
+    "CalculationGraph",
+    "CalculationNetwork",
+    "DimensionIndex",
+    "PresentationTree",
+]
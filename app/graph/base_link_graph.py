@@ -0,0 +1,105 @@
+import pandas as pd
+from pandas import DataFrame
+
+
+class BaseLinkGraph:
+    """リンクベースのarcとlocからグラフを構築するクラスの基底クラス
+
+    arcのfrom/to(loc のラベル)を、同じロール(attr_value)のlocを介して
+    要素名に解決した関係(エッジ)の一覧を提供します。
+    """
+
+    # 対象とするarcroleの末尾(Noneの場合は全てのarcを対象とする)
+    ARCROLES = None
+
+    def __init__(self, arcs, locs) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def from_parser(cls, parser, **kwargs):
+        """リンクベースのパーサーからグラフを生成する"""
+        arcs = parser.link_arcs().to_DataFrame()
+        locs = parser.link_locs().to_DataFrame()
+        return cls(arcs, locs, **kwargs)
+
+    @classmethod
+    def from_manager(cls, manager, **kwargs):
+        """リンクベースのマネージャーからグラフを生成する"""
+        arcs = [DataFrame(values) for values in manager.get_link_arcs()]
+        locs = [DataFrame(values) for values in manager.get_link_locs()]
+        return cls(cls._concat(arcs), cls._concat(locs), **kwargs)
+
+    @staticmethod
+    def _concat(frames):
+        frames = [df for df in frames if len(df) > 0]
+        if len(frames) == 0:
+            return DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def _resolve_edges(cls, arcs, locs):
+        """arcのfrom/toをlocを介して要素名に解決する
+
+        Returns:
+            DataFrame: role, parent, child, arcrole, weight, order,
+                schemaを列に持つエッジの一覧
+        """
+        columns = [
+            "role",
+            "parent",
+            "child",
+            "arcrole",
+            "weight",
+            "order",
+            "schema",
+        ]
+        arcs, locs = DataFrame(arcs), DataFrame(locs)
+        if len(arcs) == 0 or len(locs) == 0:
+            return DataFrame(columns=columns)
+
+        arcs = arcs.copy()
+        for column in ["xlink_arcrole", "xlink_weight", "xlink_order"]:
+            if column not in arcs:
+                arcs[column] = None
+        if cls.ARCROLES is not None:
+            arcrole = arcs["xlink_arcrole"]
+            arcs = arcs[
+                arcrole.isna()
+                | arcrole.astype(str).str.endswith(tuple(cls.ARCROLES))
+            ]
+
+        locs = locs.drop_duplicates(["attr_value", "xlink_label"])
+        if "xlink_schema" not in locs:
+            locs = locs.assign(xlink_schema=None)
+        locs = locs[
+            ["attr_value", "xlink_label", "xlink_href", "xlink_schema"]
+        ]
+
+        edges = arcs.merge(
+            locs.rename(
+                columns={
+                    "xlink_label": "xlink_from",
+                    "xlink_href": "parent",
+                    "xlink_schema": "schema",
+                }
+            ),
+            on=["attr_value", "xlink_from"],
+        ).merge(
+            locs.drop(columns="xlink_schema").rename(
+                columns={"xlink_label": "xlink_to", "xlink_href": "child"}
+            ),
+            on=["attr_value", "xlink_to"],
+        )
+
+        edges = edges.rename(
+            columns={
+                "attr_value": "role",
+                "xlink_arcrole": "arcrole",
+                "xlink_weight": "weight",
+                "xlink_order": "order",
+            }
+        )
+        edges["weight"] = pd.to_numeric(edges["weight"]).fillna(1.0)
+        edges["order"] = pd.to_numeric(edges["order"]).fillna(0.0)
+
+        return edges[columns].drop_duplicates(["role", "parent", "child"])
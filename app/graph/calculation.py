@@ -0,0 +1,253 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from app.store import FactStore
+
+from .base_link_graph import BaseLinkGraph
+
+
+@dataclass
+class CalculationNetwork:
+    """1つのロールの計算関係を隣接配列(CSR形式)で保持するクラス
+
+    親要素iの子要素はindices[indptr[i]:indptr[i + 1]]、
+    その重みはweights[indptr[i]:indptr[i + 1]]に格納されます。
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+
+class CalculationGraph(BaseLinkGraph):
+    """計算リンクベースの計算関係を解析するクラス
+
+    CalLinkParserのlink_arcs、link_locsの出力から、ロール(attr_value)ごとに
+    要素を整数で索引付けした隣接配列を構築し、iXBRLの非分数データに対して
+    summation-itemの計算関係を一括で検証します。
+
+    Attributes:
+        concepts (np.ndarray): 要素名の配列(索引が要素番号)
+        networks (dict[str, CalculationNetwork]): ロールごとの計算関係
+
+    Examples:
+        >>> graph = CalculationGraph.from_manager(CalLinkManager(dir, out))
+        >>> facts = FactStore.from_manager(IXBRLManager(dir))
+        >>> graph.check(facts)
+    """
+
+    ARCROLES = ["summation-item"]
+
+    def __init__(self, arcs, locs) -> None:
+        edges = self._resolve_edges(arcs, locs)
+
+        self.concepts = np.array(
+            sorted(set(edges["parent"]) | set(edges["child"])),
+            dtype=object,
+        )
+        self.__concept_index = {
+            concept: index for index, concept in enumerate(self.concepts)
+        }
+
+        self.networks = {}
+        for role, df in edges.groupby("role", sort=False):
+            self.networks[role] = self.__compile(df)
+
+    def __compile(self, edges: DataFrame):
+        """ロールの計算関係を隣接配列に変換する"""
+        parents = edges["parent"].map(self.__concept_index).to_numpy()
+        children = edges["child"].map(self.__concept_index).to_numpy()
+        weights = edges["weight"].to_numpy(dtype=float)
+
+        order = np.lexsort((edges["order"].to_numpy(), parents))
+        counts = np.bincount(parents, minlength=len(self.concepts))
+
+        indptr = np.zeros(len(self.concepts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        return CalculationNetwork(
+            indptr=indptr,
+            indices=children[order].astype(np.int64),
+            weights=weights[order],
+        )
+
+    @property
+    def roles(self):
+        """計算関係を持つロールの一覧"""
+        return list(self.networks.keys())
+
+    def children(self, role, concept):
+        """要素の子要素と重みを取得する
+
+        Args:
+            role (str): ロール(attr_value)
+            concept (str): 要素名
+
+        Returns:
+            list[tuple[str, float]]: 子要素名と重みのリスト
+        """
+        network = self.networks.get(role)
+        index = self.__concept_index.get(concept)
+        if network is None or index is None:
+            return []
+        start, end = network.indptr[index], network.indptr[index + 1]
+        return list(
+            zip(
+                self.concepts[network.indices[start:end]],
+                network.weights[start:end].tolist(),
+            )
+        )
+
+    def to_DataFrame(self):
+        """計算関係をDataFrame形式で出力する"""
+        frames = []
+        for role, network in self.networks.items():
+            parents = np.repeat(
+                np.arange(len(self.concepts)), np.diff(network.indptr)
+            )
+            frames.append(
+                DataFrame(
+                    {
+                        "role": role,
+                        "parent": self.concepts[parents],
+                        "child": self.concepts[network.indices],
+                        "weight": network.weights,
+                    }
+                )
+            )
+        return self._concat(frames)
+
+    def _fact_matrix(self, facts):
+        """非分数データを(コンテキスト×要素)の値と精度の行列に変換する"""
+        if not isinstance(facts, FactStore):
+            facts = FactStore(DataFrame(facts))
+        df = facts.to_DataFrame()
+
+        df = df[
+            df["name"].isin(self.__concept_index)
+            & df["numeric"].notna()
+            & ~df["xsi_nil"]
+        ]
+        keys = ["xbrl_id", "context_ref"]
+        df = df.astype({key: object for key in keys + ["name"]})
+        df[keys] = df[keys].fillna("")
+        # 同じコンテキストの重複した事実は先頭を採用する
+        df = df.drop_duplicates(keys + ["name"])
+
+        contexts = df[keys].drop_duplicates().reset_index(drop=True)
+        context_codes = pd.MultiIndex.from_frame(contexts).get_indexer(
+            pd.MultiIndex.from_frame(df[keys])
+        )
+        concept_codes = df["name"].map(self.__concept_index).to_numpy()
+
+        shape = (len(contexts), len(self.concepts))
+        values = np.full(shape, np.nan)
+        decimals = np.full(shape, np.inf)
+
+        scale = df["scale"].fillna(0).to_numpy(dtype=float)
+        values[context_codes, concept_codes] = df["numeric"].to_numpy(
+            dtype=float
+        ) * (10.0**scale)
+        decimals[context_codes, concept_codes] = (
+            df["decimals"].fillna(np.inf).to_numpy(dtype=float)
+        )
+        return contexts, values, decimals
+
+    @staticmethod
+    def _half_unit(decimals):
+        """精度(decimals)による丸め幅の半分(精度が無限の場合は0)"""
+        finite = np.isfinite(decimals)
+        return np.where(
+            finite, 0.5 * 10.0 ** -np.where(finite, decimals, 0), 0.0
+        )
+
+    def check(self, facts):
+        """summation-itemの計算関係を検証する
+
+        親要素と1つ以上の子要素の値が存在するコンテキストについて、
+        子要素の加重合計と親要素の値を比較します。表示単位の丸めによる差は
+        許容し、差が各事実の精度(decimals)による丸め幅の合計を超える場合に
+        不一致とします(XBRL Calculations 1.1の丸め区間による判定)。
+
+        Args:
+            facts (FactStore | DataFrame | list[dict]): 非分数データ
+
+        Returns:
+            DataFrame: 計算が一致しない関係の一覧
+        """
+        columns = [
+            "xbrl_id",
+            "context_ref",
+            "role",
+            "concept",
+            "reported",
+            "computed",
+            "difference",
+            "children",
+        ]
+        contexts, values, decimals = self._fact_matrix(facts)
+        if len(contexts) == 0:
+            return DataFrame(columns=columns)
+
+        frames = []
+        for role, network in self.networks.items():
+            rows = np.flatnonzero(np.diff(network.indptr))
+            if len(rows) == 0:
+                continue
+            starts = network.indptr[rows]
+
+            child_values = values[:, network.indices] * network.weights
+            present = ~np.isnan(child_values)
+            computed = np.add.reduceat(
+                np.where(present, child_values, 0.0), starts, axis=1
+            )
+            children = np.add.reduceat(present, starts, axis=1)
+            tolerance = np.add.reduceat(
+                np.where(
+                    present,
+                    self._half_unit(decimals[:, network.indices]),
+                    0.0,
+                ),
+                starts,
+                axis=1,
+            )
+
+            reported = values[:, rows]
+            tolerance = tolerance + self._half_unit(decimals[:, rows])
+            difference = np.abs(reported - computed)
+            mismatch = (
+                ~np.isnan(reported)
+                & (children > 0)
+                & (difference > tolerance + 1e-9 * np.abs(reported))
+            )
+
+            context_index, parent_index = np.nonzero(mismatch)
+            if len(context_index) == 0:
+                continue
+            frames.append(
+                DataFrame(
+                    {
+                        "xbrl_id": contexts["xbrl_id"].to_numpy()[
+                            context_index
+                        ],
+                        "context_ref": contexts["context_ref"].to_numpy()[
+                            context_index
+                        ],
+                        "role": role,
+                        "concept": self.concepts[rows[parent_index]],
+                        "reported": reported[context_index, parent_index],
+                        "computed": computed[context_index, parent_index],
+                        "children": children[context_index, parent_index],
+                    }
+                )
+            )
+
+        if len(frames) == 0:
+            return DataFrame(columns=columns)
+
+        df = pd.concat(frames, ignore_index=True)
+        df["difference"] = df["reported"] - df["computed"]
+        return df[columns]
@@ -0,0 +1,360 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+from pandas import DataFrame
+
+from app.parser import DefLinkParser
+
+from .base_link_graph import BaseLinkGraph
+
+
+class DimensionIndex(BaseLinkGraph):
+    """定義リンクベースのハイパーキューブの索引を構築するクラス
+
+    DefLinkParserのlink_arcs、link_locsの出力から、ロール(attr_value)ごとに
+    ハイパーキューブ → ディメンション → ドメインメンバーの索引を
+    all、hypercube-dimension、dimension-domain、domain-memberの
+    arcroleを辿って構築します。
+
+    索引は辞書で保持するため、コンテキストのメンバーの検証やテーブルの
+    ディメンション構成の列挙を辞書の参照で行えます。また、定義リンク
+    ベースの内容のハッシュをキーとしてJSON形式で永続化できます。
+
+    Attributes:
+        hypercubes (dict): {ロール: {ハイパーキューブ: {ディメンション: [メンバー]}}}
+        primary_items (dict): {ロール: {ハイパーキューブ: [要素]}}
+        defaults (dict): {ディメンション: デフォルトメンバー}
+
+    Examples:
+        >>> index = DimensionIndex.from_manager(DefLinkManager(dir, out))
+        >>> index.members("jppfs_cor_ConsolidatedOrNonConsolidatedAxis")
+        >>> index.validate(FactStore.from_manager(IXBRLManager(dir)))
+    """
+
+    ARCROLES = [
+        "all",
+        "hypercube-dimension",
+        "dimension-domain",
+        "domain-member",
+        "dimension-default",
+    ]
+
+    def __init__(self, arcs=None, locs=None) -> None:
+        self.hypercubes = {}
+        self.primary_items = {}
+        self.defaults = {}
+
+        if arcs is not None and locs is not None:
+            edges = self._resolve_edges(arcs, locs)
+            edges["arcrole"] = (
+                edges["arcrole"].astype(str).str.rsplit("/", n=1).str[-1]
+            )
+            for role, df in edges.groupby("role", sort=False):
+                self.__build_role(role, df)
+        self.__build_lookup()
+
+    @staticmethod
+    def __descendants(children, root):
+        """domain-memberの関係を辿り、表示順の子孫要素を取得する"""
+        result, stack, seen = [], [root], {root}
+        while stack:
+            concept = stack.pop()
+            result.append(concept)
+            for child in reversed(children.get(concept, [])):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return result
+
+    def __build_role(self, role, edges: DataFrame):
+        """1つのロールのハイパーキューブの索引を構築する"""
+        edges = edges.sort_values("order", kind="stable")
+        relations = defaultdict(lambda: defaultdict(list))
+        for arcrole, parent, child in zip(
+            edges["arcrole"], edges["parent"], edges["child"]
+        ):
+            relations[arcrole][parent].append(child)
+
+        members = relations["domain-member"]
+        for dimension, children in relations["dimension-default"].items():
+            self.defaults[dimension] = children[0]
+
+        for primary, hypercubes in relations["all"].items():
+            items = self.__descendants(members, primary)
+            for hypercube in hypercubes:
+                dimensions = self.hypercubes.setdefault(
+                    role, {}
+                ).setdefault(hypercube, {})
+                for dimension in relations["hypercube-dimension"].get(
+                    hypercube, []
+                ):
+                    values = dimensions.setdefault(dimension, [])
+                    for domain in relations["dimension-domain"].get(
+                        dimension, []
+                    ):
+                        for member in self.__descendants(members, domain):
+                            if member not in values:
+                                values.append(member)
+
+                values = self.primary_items.setdefault(
+                    role, {}
+                ).setdefault(hypercube, [])
+                values.extend(item for item in items if item not in values)
+
+    def __build_lookup(self):
+        """検証に使用する逆引きの辞書を構築する"""
+        # 要素 → 要素を含むハイパーキューブ
+        self.__hypercubes_of = defaultdict(list)
+        for role, hypercubes in self.primary_items.items():
+            for hypercube, items in hypercubes.items():
+                for item in items:
+                    self.__hypercubes_of[item].append((role, hypercube))
+
+        # (ロール, ハイパーキューブ) → メンバーの名前(接頭辞なし)
+        self.__member_names = {}
+        for role, hypercubes in self.hypercubes.items():
+            for hypercube, dimensions in hypercubes.items():
+                self.__member_names[(role, hypercube)] = {
+                    self.local_name(member)
+                    for values in dimensions.values()
+                    for member in values
+                }
+
+    @staticmethod
+    def local_name(concept):
+        """接頭辞を除いた要素名を取得する"""
+        return str(concept).rsplit("_", 1)[-1]
+
+    @property
+    def roles(self):
+        """ハイパーキューブを持つロールの一覧"""
+        return list(self.hypercubes.keys())
+
+    def dimensions(self, role, hypercube):
+        """ハイパーキューブのディメンションの一覧を取得する"""
+        return list(
+            self.hypercubes.get(role, {}).get(hypercube, {}).keys()
+        )
+
+    def members(self, dimension, role=None, hypercube=None):
+        """ディメンションのメンバーの一覧を取得する
+
+        Args:
+            dimension (str): ディメンション(軸)の要素名
+            role (str, optional): ロールで絞り込む
+            hypercube (str, optional): ハイパーキューブで絞り込む
+
+        Returns:
+            list[str]: 表示順のメンバーの一覧
+        """
+        result = []
+        for _role, hypercubes in self.hypercubes.items():
+            if role is not None and _role != role:
+                continue
+            for _hypercube, dimensions in hypercubes.items():
+                if hypercube is not None and _hypercube != hypercube:
+                    continue
+                for member in dimensions.get(dimension, []):
+                    if member not in result:
+                        result.append(member)
+        return result
+
+    def is_valid_member(self, concept, members):
+        """要素とコンテキストのメンバーの組み合わせが有効か判定する
+
+        要素を含むいずれかのハイパーキューブに、全てのメンバーが
+        含まれていれば有効とします。要素がどのハイパーキューブにも
+        含まれない場合は検証の対象外として有効とします。
+
+        Args:
+            concept (str): 要素名
+            members (Iterable[str]): コンテキストのメンバー(接頭辞の有無は問わない)
+        """
+        hypercubes = self.__hypercubes_of.get(concept)
+        if not hypercubes:
+            return True
+        names = {
+            self.local_name(member)
+            for member in members
+            if isinstance(member, str) and member
+        }
+        return any(
+            names <= self.__member_names.get(key, set())
+            for key in hypercubes
+        )
+
+    def validate(self, facts):
+        """事実のコンテキストのメンバーを検証する
+
+        Args:
+            facts (FactStore | DataFrame | list[dict]): iXBRLの事実
+
+        Returns:
+            DataFrame: 有効でないメンバーを持つ事実の一覧
+        """
+        if not isinstance(facts, DataFrame):
+            facts = (
+                facts.to_DataFrame()
+                if hasattr(facts, "to_DataFrame")
+                else DataFrame(facts)
+            )
+        columns = ["name", "context_entity", "context_category"]
+        if len(facts) == 0:
+            return DataFrame(columns=facts.columns)
+        facts = facts.astype({column: object for column in columns})
+
+        keys = facts[columns].drop_duplicates()
+        invalid = [
+            key
+            for key in keys.itertuples(index=False, name=None)
+            if not self.is_valid_member(key[0], key[1:])
+        ]
+        mask = pd.MultiIndex.from_frame(facts[columns]).isin(invalid)
+        return facts[mask].reset_index(drop=True)
+
+    def layout(self, role, hypercube=None):
+        """テーブルのディメンション構成を列挙する
+
+        Args:
+            role (str): ロール(attr_value)
+            hypercube (str, optional): ハイパーキューブで絞り込む
+
+        Returns:
+            DataFrame: role, hypercube, dimension, member, is_defaultを
+                列に持つ表示順の一覧
+        """
+        rows = []
+        for _hypercube, dimensions in self.hypercubes.get(
+            role, {}
+        ).items():
+            if hypercube is not None and _hypercube != hypercube:
+                continue
+            for dimension, members in dimensions.items():
+                default = self.defaults.get(dimension)
+                for member in members:
+                    rows.append(
+                        {
+                            "role": role,
+                            "hypercube": _hypercube,
+                            "dimension": dimension,
+                            "member": member,
+                            "is_default": member == default,
+                        }
+                    )
+        return DataFrame(
+            rows,
+            columns=[
+                "role",
+                "hypercube",
+                "dimension",
+                "member",
+                "is_default",
+            ],
+        )
+
+    def update(self, other: "DimensionIndex"):
+        """他の索引を結合する"""
+        for role, hypercubes in other.hypercubes.items():
+            for hypercube, dimensions in hypercubes.items():
+                target = self.hypercubes.setdefault(role, {}).setdefault(
+                    hypercube, {}
+                )
+                for dimension, members in dimensions.items():
+                    values = target.setdefault(dimension, [])
+                    values.extend(m for m in members if m not in values)
+        for role, hypercubes in other.primary_items.items():
+            for hypercube, items in hypercubes.items():
+                values = self.primary_items.setdefault(
+                    role, {}
+                ).setdefault(hypercube, [])
+                values.extend(item for item in items if item not in values)
+        self.defaults.update(other.defaults)
+        self.__build_lookup()
+        return self
+
+    def to_dict(self):
+        """索引を辞書形式で出力する"""
+        return {
+            "hypercubes": self.hypercubes,
+            "primary_items": self.primary_items,
+            "defaults": self.defaults,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """辞書形式の索引から生成する"""
+        instance = cls()
+        instance.hypercubes = data.get("hypercubes", {})
+        instance.primary_items = data.get("primary_items", {})
+        instance.defaults = data.get("defaults", {})
+        instance.__build_lookup()
+        return instance
+
+    def save(self, path):
+        """索引をJSON形式で保存する"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path):
+        """JSON形式で保存した索引を読み込む"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def load(cls, xbrl_url, cache_dir=None, output_path=None):
+        """定義リンクベースの索引を取得する
+
+        cache_dirを指定した場合、定義リンクベースの内容のハッシュを
+        キーとして索引を保存し、同じ内容の場合は解析を行わずに
+        保存した索引を読み込みます。
+
+        Args:
+            xbrl_url (str): def.xmlのパスまたはURL
+            cache_dir (str, optional): 索引の保存先のディレクトリ
+            output_path (str, optional): URLの場合のダウンロード先
+
+        Returns:
+            DimensionIndex: 索引
+        """
+        parser = DefLinkParser(xbrl_url, output_path)
+        is_file, file_path = parser._is_url_in_local()
+        if is_file is False:
+            file_path = parser._fetch_url()
+
+        cache_path = None
+        if cache_dir is not None:
+            with open(file_path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            cache_path = Path(cache_dir) / f"{digest}.json"
+            if cache_path.exists():
+                return cls.open(cache_path)
+
+        parser._read_xbrl(file_path)
+        index = cls.from_parser(parser)
+        if cache_path is not None:
+            index.save(cache_path)
+        return index
+
+    @classmethod
+    def from_manager(cls, manager, cache_dir=None):
+        """DefLinkManagerの全ての定義リンクベースから索引を生成する"""
+        files = manager.files
+        if manager.document_type is not None:
+            files = files.query(
+                f"document_type == '{manager.document_type}'"
+            )
+        index = cls()
+        for xbrl_url in files["xlink_href"]:
+            index.update(
+                cls.load(xbrl_url, cache_dir, manager.output_path)
+            )
+        return index
@@ -0,0 +1,203 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from .base_link_graph import BaseLinkGraph
+
+
+class PresentationTree(BaseLinkGraph):
+    """表示リンクベースの表示順序のツリーを構築するクラス
+
+    PreLinkParserのlink_arcs、link_locsの出力から、ロール(attr_value)ごとに
+    深さ優先・表示順(xlink_order)で並んだ行(role, depth, concept, parent,
+    order)を配列演算で構築します。
+
+    構築したツリーは、スキーマとロールの関係が同一であれば
+    プロセス内で共有されるため、東証の共通ロールを使用する企業間で
+    再構築は行われません。
+
+    Examples:
+        >>> tree = PresentationTree.from_manager(PreLinkManager(dir, out))
+        >>> tree.tree("ConsolidatedBalanceSheet")
+    """
+
+    ARCROLES = ["parent-child"]
+
+    COLUMNS = ["role", "depth", "concept", "parent", "order"]
+
+    __cache = OrderedDict()
+    __lock = threading.Lock()
+
+    # 保持するツリーの上限
+    MAX_TREES = 256
+
+    def __init__(self, arcs, locs) -> None:
+        edges = self._resolve_edges(arcs, locs)
+
+        self.__trees = OrderedDict()
+        for role, df in edges.groupby("role", sort=False):
+            self.__trees[role] = self.__get_tree(role, df)
+
+    @classmethod
+    def __key(cls, role, edges: DataFrame):
+        """スキーマとロールの関係からキャッシュのキーを生成する"""
+        edges = edges.sort_values(["parent", "child"])
+        digest = hashlib.sha1()
+        for schema in sorted(edges["schema"].dropna().unique()):
+            digest.update(str(schema).encode())
+        digest.update(
+            pd.util.hash_pandas_object(
+                edges[["parent", "child", "order"]], index=False
+            ).to_numpy()
+        )
+        return (role, digest.hexdigest())
+
+    @classmethod
+    def __get_tree(cls, role, edges: DataFrame):
+        """キャッシュからツリーを取得し、存在しない場合は構築する"""
+        key = cls.__key(role, edges)
+        with cls.__lock:
+            tree = cls.__cache.get(key)
+            if tree is not None:
+                cls.__cache.move_to_end(key)
+                return tree
+
+        tree = cls._build(role, edges)
+
+        with cls.__lock:
+            cls.__cache[key] = tree
+            while len(cls.__cache) > cls.MAX_TREES:
+                cls.__cache.popitem(last=False)
+        return tree
+
+    @classmethod
+    def clear_cache(cls):
+        """共有しているツリーを破棄する"""
+        with cls.__lock:
+            cls.__cache.clear()
+
+    @classmethod
+    def cache_size(cls):
+        """共有しているツリーの数"""
+        with cls.__lock:
+            return len(cls.__cache)
+
+    @classmethod
+    def _build(cls, role, edges: DataFrame):
+        """ロールの関係から深さ優先・表示順のツリーを構築する
+
+        親要素ごとに表示順で並べた隣接配列を作成し、階層ごとに子要素を
+        一括で展開します。各行には根からの兄弟順位の経路を持たせ、
+        経路の辞書順に並べることで深さ優先の順序を得ます。
+        """
+        edges = edges.sort_values(["parent", "order", "child"])
+        codes, concepts = pd.factorize(
+            pd.concat([edges["parent"], edges["child"]], ignore_index=True)
+        )
+        parents, children = codes[: len(edges)], codes[len(edges) :]
+        orders = edges["order"].to_numpy(dtype=float)
+
+        counts = np.bincount(parents, minlength=len(concepts))
+        indptr = np.zeros(len(concepts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        # 兄弟内での順位
+        ranks = np.arange(len(edges)) - np.repeat(indptr[:-1], counts)
+
+        # 親を持たない要素が根になる
+        roots = np.setdiff1d(np.unique(parents), np.unique(children))
+
+        nodes = [roots]
+        parent_nodes = [np.full(len(roots), -1)]
+        node_orders = [np.full(len(roots), np.nan)]
+        paths = [np.arange(len(roots))[:, None]]
+
+        # 循環した関係で無限に展開しないよう、深さを辺の数で制限する
+        for _ in range(len(edges)):
+            frontier, path = nodes[-1], paths[-1]
+            starts = indptr[frontier]
+            sizes = indptr[frontier + 1] - starts
+            total = sizes.sum()
+            if total == 0:
+                break
+
+            owners = np.repeat(np.arange(len(frontier)), sizes)
+            offsets = np.arange(total) - np.repeat(
+                np.cumsum(sizes) - sizes, sizes
+            )
+            positions = np.repeat(starts, sizes) + offsets
+
+            nodes.append(children[positions])
+            parent_nodes.append(frontier[owners])
+            node_orders.append(orders[positions])
+            paths.append(
+                np.hstack([path[owners], ranks[positions][:, None]])
+            )
+
+        # 経路を同じ長さに揃え、短い経路(親)が先に並ぶよう-1で埋める
+        width = len(paths)
+        keys = np.vstack(
+            [
+                np.pad(
+                    path,
+                    ((0, 0), (0, width - path.shape[1])),
+                    constant_values=-1,
+                )
+                for path in paths
+            ]
+        )
+        order = np.lexsort(keys.T[::-1])
+
+        depths = np.concatenate(
+            [np.full(len(n), depth) for depth, n in enumerate(nodes)]
+        )[order]
+        nodes = np.concatenate(nodes)[order]
+        parent_nodes = np.concatenate(parent_nodes)[order]
+        node_orders = np.concatenate(node_orders)[order]
+
+        concepts = np.asarray(concepts, dtype=object)
+        return DataFrame(
+            {
+                "role": role,
+                "depth": depths,
+                "concept": concepts[nodes],
+                "parent": np.where(
+                    parent_nodes >= 0, concepts[parent_nodes], None
+                ),
+                "order": node_orders,
+            },
+            columns=cls.COLUMNS,
+        )
+
+    @property
+    def roles(self):
+        """表示関係を持つロールの一覧"""
+        return list(self.__trees.keys())
+
+    def tree(self, role):
+        """ロールのツリーを取得する
+
+        Args:
+            role (str): ロール(attr_value)
+
+        Returns:
+            DataFrame: 深さ優先・表示順に並んだツリーの行
+        """
+        tree = self.__trees.get(role)
+        if tree is None:
+            return DataFrame(columns=self.COLUMNS)
+        return tree.copy()
+
+    def to_DataFrame(self):
+        """全てのロールのツリーをDataFrame形式で出力する"""
+        df = self._concat(list(self.__trees.values()))
+        if len(df) == 0:
+            return DataFrame(columns=self.COLUMNS)
+        return df
+
+    def to_dict(self):
+        """全てのロールのツリーを辞書形式で出力する"""
+        return self.to_DataFrame().to_dict(orient="records")
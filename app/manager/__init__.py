@@ -1,21 +1,55 @@
-from .base_xbrl_manager import BaseXbrlManager
-from .ixbrl_manager import IXBRLManager
-from .label_manager import LabelManager
-from .link_manager import (
-    BaseLinkManager,
-    CalLinkManager,
-    DefLinkManager,
-    PreLinkManager,
-)
-from .qualitative_manager import QualitativeManager
+from typing import TYPE_CHECKING
+
+from app.utils.lazy_loader import lazy_attributes
+
+if TYPE_CHECKING:
+    from .base_xbrl_manager import BaseXbrlManager
+    from .filing_context import FilingContext
+    from .filing_manifest import FilingManifest
+    from .ixbrl_manager import IXBRLManager
+    from .label_manager import LabelManager
+    from .link_manager import (
+        BaseLinkManager,
+        CalLinkManager,
+        DefLinkManager,
+        PreLinkManager,
+    )
+    from .qualitative_manager import QualitativeManager
+    from .taxonomy_label_cache import TaxonomyLabelCache
 
 __all__ = [
     "IXBRLManager",
     "LabelManager",
     "QualitativeManager",
     "BaseXbrlManager",
+    "FilingContext",
+    "FilingManifest",
+    "TaxonomyLabelCache",
     "BaseLinkManager",
     "CalLinkManager",
     "DefLinkManager",
     "PreLinkManager",
 ]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "IXBRLManager": (".ixbrl_manager", "IXBRLManager"),
+        "LabelManager": (".label_manager", "LabelManager"),
+        "QualitativeManager": (
+            ".qualitative_manager",
+            "QualitativeManager",
+        ),
+        "BaseXbrlManager": (".base_xbrl_manager", "BaseXbrlManager"),
+        "FilingContext": (".filing_context", "FilingContext"),
+        "FilingManifest": (".filing_manifest", "FilingManifest"),
+        "TaxonomyLabelCache": (
+            ".taxonomy_label_cache",
+            "TaxonomyLabelCache",
+        ),
+        "BaseLinkManager": (".link_manager", "BaseLinkManager"),
+        "CalLinkManager": (".link_manager", "CalLinkManager"),
+        "DefLinkManager": (".link_manager", "DefLinkManager"),
+        "PreLinkManager": (".link_manager", "PreLinkManager"),
+    },
+)
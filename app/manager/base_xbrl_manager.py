@@ -1,11 +1,9 @@
 from pathlib import Path
 from uuid import uuid4
 
-import pandas as pd
-from pandas import DataFrame
-
 from app.exception import XbrlDirectoryNotFoundError, XbrlListEmptyError
-from app.parser import SchemaParser
+
+from .filing_context import FilingContext
 
 
 class BaseXbrlManager:
@@ -28,7 +26,8 @@ class BaseXbrlManager:
         self.directory_path = Path(directory_path)
         self.files = None
         self.data = {}
-        self.__xbrl_id = str(uuid4())
+        # 書類のxbrl_idが設定されている場合は引き継ぐ
+        self.__xbrl_id = self.__context.xbrl_id or str(uuid4())
 
     @property
     def xbrl_id(self):
@@ -50,18 +49,44 @@ class BaseXbrlManager:
                 f"無効なパス[{directory_path} ]"
             )
         self.__directory_path = directory_path
+        self.__context = FilingContext.of(directory_path)
+
+    @property
+    def context(self):
+        """書類の共有コンテキストを取得する
+
+        同じディレクトリを扱うマネージャー間で共有されます。
+        マネージャーが参照を保持するため、マネージャーとともに
+        破棄されます。
+
+        Returns:
+            FilingContext: コンテキスト
+        """
+        return self.__context
+
+    @property
+    def manifest(self):
+        """ディレクトリのマニフェストを取得する
 
-    def __to_filelist(self):
-        """ディレクトリ内のファイル一覧を取得する
+        同じディレクトリを扱うマネージャー間で共有されます。
 
         Returns:
-            list: ファイル一覧
+            FilingManifest: マニフェスト
         """
-        return [
-            file.as_posix()
-            for file in self.directory_path.glob("**/*")
-            if file.is_file() and not file.name.startswith(".")
-        ]
+        return self.context.manifest
+
+    def invalidate_manifest(self):
+        """ディレクトリのマニフェストと共有コンテキストを破棄する
+
+        ディレクトリ内のファイルを変更した場合に呼び出します。
+        以降、このマネージャーは新しいコンテキストを参照します。
+
+        Returns:
+            self (BaseXbrlManager): 自身のインスタンス
+        """
+        FilingContext.invalidate(self.directory_path)
+        self.__context = FilingContext.of(self.directory_path)
+        return self
 
     def xbrl_type(self):
         """書類品種を取得します
@@ -78,11 +103,9 @@ class BaseXbrlManager:
             1.edjp
             2.決算短信(日本基準)
         """
-        files = self.__to_filelist()
-        for file_str in files:
-            file = Path(file_str)
-            if file.suffix == ".xsd" and "fr" not in file.name:
-                type_str = file.name.split("-")[1]
+        for entry in self.manifest.entries:
+            if entry["suffix"] == ".xsd" and "fr" not in entry["name"]:
+                type_str = entry["name"].split("-")[1]
                 code = (
                     type_str[:4] if len(type_str) == 4 else type_str[2:6]
                 )
@@ -94,43 +117,7 @@ class BaseXbrlManager:
         Returns:
             pd.DataFrame: 関係ファイルのデータフレーム
         """
-        files = self.__to_filelist()
-        xsd_files = [file for file in files if Path(file).suffix == ".xsd"]
-
-        data_frames = [
-            SchemaParser.create(file).link_base_refs().to_DataFrame()
-            for file in xsd_files
-        ]
-        df = pd.concat(data_frames, ignore_index=True)
-
-        href_map = {
-            row["xlink_href"]: file
-            for file in files
-            for index, row in df.iterrows()
-            if not row["xlink_href"].startswith("http")
-            and row["xlink_href"] in file
-        }
-
-        df["xlink_href"] = (
-            df["xlink_href"]
-            .astype(str)
-            .apply(lambda href: href_map.get(href, href))
-        )
-
-        # dfのxlink_roleカラムを整形
-        df["xlink_role"] = df["xlink_role"].apply(
-            lambda role: (
-                role.split("/")[-1] if isinstance(role, str) else role
-            )
-        )
-        # dfのxlink_arcroleカラムを整形
-        df["xlink_arcrole"] = df["xlink_arcrole"].apply(
-            lambda arcrole: (
-                arcrole.split("/")[-1]
-                if isinstance(arcrole, str)
-                else arcrole
-            )
-        )
+        df = self.context.link_base_refs()
 
         if xlink_role:
             query = f"xlink_role == '{xlink_role}'"
@@ -151,27 +138,19 @@ class BaseXbrlManager:
         Returns:
             pd.DataFrame: HTMLベースのファイルリスト
         """
-        lists = []
-        files = self.__to_filelist()
-        for file_str in files:
-            file = Path(file_str)
-            if file.suffix == ".htm" or file.suffix == ".html":
-                document_type = (
-                    file.name.split("-")[1][2:4]
-                    if "fr" in file.name
-                    else "sm"
-                )
-
-                href = file.as_posix()
-                role = file.name.split("-")[-1].split(".")[0]
+        # 読み込みに時間がかかるため、使用時に読み込む
+        import pandas as pd
 
+        lists = []
+        for entry in self.manifest.entries:
+            if entry["suffix"] == ".htm" or entry["suffix"] == ".html":
                 lists.append(
                     {
                         "xlink_type": "simple",
-                        "xlink_href": href,
-                        "xlink_role": role,
+                        "xlink_href": entry["path"],
+                        "xlink_role": entry["role"],
                         "xlink_arcrole": "htmlbase",
-                        "document_type": document_type,
+                        "document_type": entry["document_type"],
                     }
                 )
 
@@ -193,6 +172,8 @@ class BaseXbrlManager:
 
     def to_DataFrame(self):
         """DataFrame形式で出力する"""
+        from pandas import DataFrame
+
         return DataFrame(self.data)
 
     def to_dict(self):
@@ -0,0 +1,244 @@
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+from app.parser import SchemaParser
+from app.utils import Utils
+
+from .filing_manifest import FilingManifest
+
+
+class FilingContext:
+    """1つの書類(XBRLディレクトリ)に関する共有情報を保持するクラス
+
+    同じディレクトリを扱うマネージャー間で、下記の情報を共有します。
+
+    * ディレクトリのマニフェスト(FilingManifest)
+    * スキーマから読み込んだlinkbaseRefの一覧
+    * パーサーで抽出したレコード
+    * 書類のxbrl_id(設定した場合はマネージャーと抽出結果に引き継ぐ)
+
+    コンテキストはマネージャーとモデルが参照している間のみ共有され、
+    参照がなくなると抽出したレコードとともに破棄されます。
+
+    Examples:
+        >>> context = FilingContext.of("path/to/directory")
+        >>> context.link_base_refs()
+        >>> records = context.extract(
+        ...     IxbrlParser, "path/to/ixbrl.htm", "ix_non_fractions"
+        ... )
+        >>> FilingContext.invalidate("path/to/directory")
+    """
+
+    __cache = weakref.WeakValueDictionary()
+    __lock = threading.Lock()
+
+    # 保持する抽出結果の上限
+    MAX_RESULTS = 128
+
+    def __init__(self, directory_path) -> None:
+        self.directory_path = Path(directory_path)
+        self.__link_base_refs = None
+        self.__results = OrderedDict()
+        self.__results_lock = threading.Lock()
+        self.__manifest = None
+        self.__xbrl_id = None
+
+    @property
+    def xbrl_id(self):
+        """書類のxbrl_id(設定していない場合はNone)"""
+        return self.__xbrl_id
+
+    def set_xbrl_id(self, xbrl_id):
+        """書類のxbrl_idを設定する
+
+        以降に生成するマネージャーと、以降に取得する抽出結果の
+        xbrl_idになります。
+        """
+        self.__xbrl_id = xbrl_id
+        return self
+
+    def content_xbrl_id(self):
+        """サマリー(sm)のiXBRLファイルの内容から決定的なxbrl_idを生成する
+
+        zipファイルを作成し直した場合(タイムスタンプの違い等)も、
+        サマリーの内容が同じであれば同じxbrl_idになります。
+        サマリーのファイルがない書類(業績予想の修正等)は全てのiXBRL
+        ファイルから生成します。
+
+        Returns:
+            str | None: xbrl_id(iXBRLファイルがない場合はNone)
+        """
+        ixbrl_files = sorted(
+            entry["path"]
+            for entry in self.manifest.entries
+            if entry["name"].endswith("ixbrl.htm")
+        )
+        # サマリーのファイル名は「tse-acedjpsm-...-ixbrl.htm」の形式
+        sm_files = [
+            path
+            for path in ixbrl_files
+            if re.match(r"[^-]+-[^-]+sm-", Path(path).name)
+        ]
+        files = sm_files or ixbrl_files
+        if len(files) == 0:
+            return None
+        return Utils.content_xbrl_id(*files)
+
+    @classmethod
+    def of(cls, directory_path):
+        """ディレクトリに対応する共有コンテキストを取得する
+
+        呼び出し側が参照を保持している間は同じコンテキストを返します。
+
+        Args:
+            directory_path (str): XBRLディレクトリのパス
+
+        Returns:
+            FilingContext: コンテキスト
+        """
+        key = Path(directory_path).resolve().as_posix()
+        with cls.__lock:
+            context = cls.__cache.get(key)
+            if context is None:
+                context = cls(directory_path)
+                cls.__cache[key] = context
+            return context
+
+    @classmethod
+    def invalidate(cls, directory_path=None):
+        """共有コンテキストとマニフェストを破棄する
+
+        Args:
+            directory_path (str, optional): 対象のディレクトリ。
+                指定しない場合は全てのコンテキストを破棄します。
+        """
+        with cls.__lock:
+            if directory_path is None:
+                cls.__cache.clear()
+            else:
+                key = Path(directory_path).resolve().as_posix()
+                cls.__cache.pop(key, None)
+        FilingManifest.invalidate(directory_path)
+
+    @property
+    def manifest(self):
+        """ディレクトリのマニフェストを取得する"""
+        # コンテキストが参照している間はマニフェストを共有する
+        self.__manifest = FilingManifest.of(self.directory_path)
+        return self.__manifest
+
+    def link_base_refs(self):
+        """スキーマから読み込んだlinkbaseRefの一覧を取得する
+
+        初回の呼び出し時に全ての.xsdを先読みし、以降は結果を再利用します。
+
+        Returns:
+            DataFrame: linkbaseRefの一覧(複製)
+        """
+        if self.__link_base_refs is None:
+            self.__link_base_refs = self.__read_link_base_refs()
+        return self.__link_base_refs.copy()
+
+    def __read_link_base_refs(self):
+        # 読み込みに時間がかかるため、使用時に読み込む
+        import pandas as pd
+
+        manifest = self.manifest
+        xsd_files = [
+            entry["path"]
+            for entry in manifest.entries
+            if entry["suffix"] == ".xsd"
+        ]
+
+        data_frames = [
+            SchemaParser.prescan(file).to_DataFrame() for file in xsd_files
+        ]
+        df = pd.concat(data_frames, ignore_index=True)
+
+        # ローカルのhrefをファイル名の索引からファイルパスに解決する
+        hrefs = df["xlink_href"].astype(str)
+        href_map = {
+            href: manifest.resolve(href)
+            for href in hrefs.unique()
+            if not href.startswith("http")
+        }
+        df["xlink_href"] = hrefs.map(href_map).fillna(hrefs)
+
+        # dfのxlink_roleカラムを整形
+        df["xlink_role"] = self.__last_segment(df["xlink_role"])
+        # dfのxlink_arcroleカラムを整形
+        df["xlink_arcrole"] = self.__last_segment(df["xlink_arcrole"])
+
+        return df
+
+    @staticmethod
+    def __last_segment(series):
+        """URIの末尾のセグメントを取得する(文字列以外はそのまま)
+
+        Args:
+            series (pd.Series): URIの列
+
+        Returns:
+            pd.Series: 末尾のセグメントの列
+        """
+        return (
+            series.str.rsplit("/", n=1)
+            .str[-1]
+            .where(series.map(type) == str, series)
+        )
+
+    def extract(self, parser_class, xbrl_url, method, output_path=None):
+        """ファイルを解析し、パーサーのメソッドで抽出したレコードを取得する
+
+        同じファイルから同じメソッドで抽出済みの場合は、その結果を
+        再利用します。パーサー(解析したドキュメント)は保持せず、
+        抽出したレコードのみをMAX_RESULTS件まで保持します
+        (古いものから破棄)。呼び出しごとに複製を返すため、
+        複数のスレッドで同じファイルを扱っても結果が混ざりません。
+
+        Args:
+            parser_class (type[BaseXBRLParser]): パーサーのクラス
+            xbrl_url (str): ファイルのパスまたはURL
+            method (str): レコードを抽出するパーサーのメソッド名
+            output_path (str, optional): ファイルの保存先
+
+        Returns:
+            list[dict]: 抽出したレコード(複製)。書類のxbrl_idを設定
+                している場合は、レコードのxbrl_idを置き換えます。
+        """
+        key = (parser_class, xbrl_url, output_path, method)
+        with self.__results_lock:
+            records = self.__results.get(key)
+            if records is not None:
+                self.__results.move_to_end(key)
+        if records is None:
+            # 解析はロックの外で行う
+            parser = parser_class.create(xbrl_url, output_path)
+            records = getattr(parser, method)().data
+            with self.__results_lock:
+                # 他のスレッドが先に抽出した場合はその結果を使用する
+                records = self.__results.setdefault(key, records)
+                self.__results.move_to_end(key)
+                while len(self.__results) > self.MAX_RESULTS:
+                    self.__results.popitem(last=False)
+
+        xbrl_id = self.__xbrl_id
+        if xbrl_id is None:
+            return [dict(record) for record in records]
+        return [
+            (
+                {**record, "xbrl_id": xbrl_id}
+                if "xbrl_id" in record
+                else dict(record)
+            )
+            for record in records
+        ]
+
+    def clear(self):
+        """linkbaseRefの一覧と抽出したレコードを破棄する"""
+        self.__link_base_refs = None
+        with self.__results_lock:
+            self.__results = OrderedDict()
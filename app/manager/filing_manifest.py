@@ -0,0 +1,148 @@
+import os
+import threading
+import weakref
+from pathlib import Path
+
+from app.utils import Instrumentation
+
+
+class FilingManifest:
+    """XBRLディレクトリのファイル一覧(マニフェスト)を保持するクラス
+
+    ディレクトリを一度だけos.scandirで走査し、ファイル名から求めた
+    書類種別(document_type)、報告書種別(report_type)、ロール(role)を
+    保持します。同じディレクトリに対するマニフェストは参照されている間
+    プロセス内で共有されるため、ディレクトリの内容を変更した場合は
+    invalidateを呼び出してください。
+
+    Examples:
+        >>> manifest = FilingManifest.of("path/to/directory")
+        >>> manifest.files
+        >>> FilingManifest.invalidate("path/to/directory")
+    """
+
+    __cache = weakref.WeakValueDictionary()
+    __lock = threading.Lock()
+
+    def __init__(self, directory_path) -> None:
+        self.directory_path = Path(directory_path)
+        with Instrumentation.timer("FilingManifest.scan"):
+            self.entries = self.__scan(self.directory_path.as_posix())
+        Instrumentation.count("FilingManifest.files", len(self.entries))
+        self.files = [entry["path"] for entry in self.entries]
+
+        # ファイル名からパスを引く索引
+        self.name_index = {}
+        for entry in self.entries:
+            self.name_index.setdefault(entry["name"], []).append(
+                entry["path"]
+            )
+
+    def resolve(self, href):
+        """相対パスのhrefをディレクトリ内のファイルパスに解決する
+
+        Args:
+            href (str): 相対パス
+
+        Returns:
+            str | None: ファイルパス。見つからない場合はNone
+        """
+        href = href.split("#")[0]
+        candidates = self.name_index.get(href.rsplit("/", 1)[-1], [])
+        suffix = href.lstrip("./")
+        for path in reversed(candidates):
+            if path.endswith(suffix):
+                return path
+        return None
+
+    @classmethod
+    def of(cls, directory_path):
+        """ディレクトリに対応する共有マニフェストを取得する
+
+        Args:
+            directory_path (str): XBRLディレクトリのパス
+
+        Returns:
+            FilingManifest: マニフェスト
+        """
+        key = cls.__key(directory_path)
+        with cls.__lock:
+            manifest = cls.__cache.get(key)
+            if manifest is None:
+                manifest = cls(directory_path)
+                cls.__cache[key] = manifest
+            return manifest
+
+    @classmethod
+    def invalidate(cls, directory_path=None):
+        """共有マニフェストを破棄する
+
+        Args:
+            directory_path (str, optional): 対象のディレクトリ。
+                指定しない場合は全てのマニフェストを破棄します。
+        """
+        with cls.__lock:
+            if directory_path is None:
+                cls.__cache.clear()
+            else:
+                cls.__cache.pop(cls.__key(directory_path), None)
+
+    @staticmethod
+    def __key(directory_path):
+        return Path(directory_path).resolve().as_posix()
+
+    @classmethod
+    def __scan(cls, directory_path):
+        """ディレクトリを再帰的に走査してファイル情報を取得する"""
+        entries = []
+        stack = [directory_path]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and not entry.name.startswith(
+                        "."
+                    ):
+                        entries.append(cls.parse_filename(entry.path))
+        entries.sort(key=lambda entry: entry["path"])
+        return entries
+
+    @staticmethod
+    def parse_filename(file_path):
+        """ファイル名から書類の情報を求める
+
+        Args:
+            file_path (str): ファイルのパス
+
+        Returns:
+            dict: path, name, suffix, document_type, report_type, role
+        """
+        path = Path(file_path)
+        name = path.name
+        parts = name.split("-")
+
+        # 書類種別(サマリー:sm, 財務諸表:bs, pl等)
+        if "fr" in name:
+            document_type = parts[1][2:4] if len(parts) > 1 else None
+        else:
+            document_type = "sm"
+
+        # 報告書種別(edjp, rvfc等)
+        if len(parts) < 2:
+            report_type = None
+        elif "sm" in name:
+            report_type = parts[1][2:6]
+        elif "fr" in name and len(parts) > 3:
+            report_type = parts[3][2:6]
+        else:
+            report_type = parts[1]
+
+        return {
+            "path": path.as_posix(),
+            "name": name,
+            "suffix": path.suffix,
+            "document_type": document_type,
+            "report_type": report_type,
+            "role": parts[-1].split(".")[0],
+        }
@@ -1,9 +1,8 @@
-from pandas import DataFrame
-
 from app.exception import XbrlListEmptyError
 from app.manager import BaseXbrlManager
 from app.parser import IxbrlParser
-from app.tag import IxHeader
+from app.tag import IxHeader, IxSummary
+from app.utils import Instrumentation
 
 
 class IXBRLManager(BaseXbrlManager):
@@ -12,6 +11,38 @@ class IXBRLManager(BaseXbrlManager):
     raise   - XbrlListEmptyError("ixbrlファイルが見つかりません。")
     """
 
+    # ヘッダー項目の要素名(接頭辞を除く)と格納先の対応表
+    HEADER_CONCEPTS = {
+        "CompanyName": "company_name",
+        "AssetManagerREIT": "company_name",
+        "SecuritiesCode": "securities_code",
+        "SecurityCode": "securities_code",
+        "SecurityCodeDEI": "securities_code",
+        "DocumentName": "document_name",
+        "FilingDate": "reporting_date",
+        "ReportingDateOfFinancialForecastCorrection": "reporting_date",
+        "ReportingDateOfDividendForecastCorrection": "reporting_date",
+        "ReportingDateOfDistributionForecastCorrectionREIT": (
+            "reporting_date"
+        ),
+        "TypeOfCurrentPeriod": "current_period",
+        "TypeOfCurrentPeriodDEI": "current_period",
+    }
+
+    # サマリー項目の要素名(接頭辞を除く)と列名の対応表
+    SUMMARY_CONCEPTS = {
+        "NetSales": "net_sales",
+        "OperatingIncome": "operating_income",
+        "OrdinaryIncome": "ordinary_income",
+        "NetIncome": "net_income",
+    }
+
+    SUMMARY_INDEX = [
+        "context_period",
+        "context_entity",
+        "context_category",
+    ]
+
     def __init__(self, directory_path) -> None:
         """
         IxbrlManagerクラスのコンストラクタです。
@@ -28,6 +59,7 @@ class IXBRLManager(BaseXbrlManager):
         if len(self.files) == 0:
             raise XbrlListEmptyError("ixbrlファイルが見つかりません。")
 
+    @Instrumentation.timed_generator(per_xbrl_id=True)
     def get_ix_non_fraction(self, document_type=None):
         """
         ix_non_fraction属性を設定します。
@@ -36,6 +68,9 @@ class IXBRLManager(BaseXbrlManager):
         Yields:
             dict: 非分数のIXBRLデータ
         """
+        # 読み込みに時間がかかるため、使用時に読み込む
+        from pandas import DataFrame
+
         files = self.files
 
         if document_type is not None:
@@ -44,16 +79,17 @@ class IXBRLManager(BaseXbrlManager):
         for _, row in files.iterrows():
             if row["xlink_href"].endswith("ixbrl.htm"):
 
-                parser = IxbrlParser.create(
-                    row["xlink_href"]
-                ).ix_non_fractions()
-
-                df = parser.to_DataFrame()
+                df = DataFrame(
+                    self.context.extract(
+                        IxbrlParser, row["xlink_href"], "ix_non_fractions"
+                    )
+                )
 
                 df["xbrl_id"] = self.xbrl_id
 
                 yield df.to_dict(orient="records")
 
+    @Instrumentation.timed_generator(per_xbrl_id=True)
     def get_ix_non_numeric(self, document_type=None):
         """
         ix_non_numeric属性を設定します。
@@ -62,6 +98,8 @@ class IXBRLManager(BaseXbrlManager):
         Yields:
             dict: 非数値のIXBRLデータ
         """
+        from pandas import DataFrame
+
         files = self.files
 
         if document_type is not None:
@@ -70,146 +108,134 @@ class IXBRLManager(BaseXbrlManager):
         for _, row in files.iterrows():
             if row["xlink_href"].endswith("ixbrl.htm"):
 
-                parser = IxbrlParser.create(
-                    row["xlink_href"]
-                ).ix_non_numeric()
-
-                df = parser.to_DataFrame()
+                df = DataFrame(
+                    self.context.extract(
+                        IxbrlParser, row["xlink_href"], "ix_non_numeric"
+                    )
+                )
 
                 df["xbrl_id"] = self.xbrl_id
 
                 yield df.to_dict(orient="records")
 
+    @Instrumentation.timed()
     def get_ix_header(self):
         """
         ix_header属性を設定します。
         iXBRLのヘッダー情報を取得します。
 
+        サマリー(sm)ファイルを先頭に、ix:nonNumeric要素を逐次読み込み、
+        ヘッダー項目が全て揃った時点で読み込みを終了します。
+
         Returns:
-            self (IxbrlManager): 自身のインスタンス
+            dict: iXBRLのヘッダー情報
         """
-        header = {
-            "company_name": None,
-            "securities_code": None,
-            "document_name": None,
-            "reporting_date": None,
-            "current_period": None,
-            "xbrl_id": None,
-            "report_type": None,
-        }
-        for values in self.get_ix_non_numeric():
-            for value in values:
-                header["company_name"] = (
-                    value["value"]
-                    if any(
-                        item in value["name"]
-                        for item in [
-                            "CompanyName",
-                            "AssetManagerREIT",
-                        ]
-                    )
-                    else header["company_name"]
-                )
-                header["securities_code"] = (
-                    value["value"]
-                    if any(
-                        item in value["name"]
-                        for item in ["SecuritiesCode", "SecurityCode"]
-                    )
-                    else header["securities_code"]
-                )
-                header["document_name"] = (
-                    value["value"]
-                    if any(
-                        value["name"].endswith(item)
-                        for item in ["DocumentName"]
-                    )
-                    else header["document_name"]
-                )
-                items = [
-                    "FilingDate",
-                    "ReportingDateOfFinancialForecastCorrection",
-                    "ReportingDateOfDividendForecastCorrection",
-                    "ReportingDateOfDistributionForecastCorrectionREIT",
-                ]
-                header["reporting_date"] = (
-                    value["value"]
-                    if any(value["name"].endswith(item) for item in items)
-                    else header["reporting_date"]
-                )
-                header["current_period"] = (
-                    value["value"]
-                    if any(
-                        item in value["name"]
-                        for item in ["TypeOfCurrentPeriod"]
-                    )
-                    else header["current_period"]
-                )
-                header["xbrl_id"] = value["xbrl_id"]
-                header["report_type"] = value["report_type"]
-
-        ix_header = IxHeader(
-            company_name=header["company_name"],
-            securities_code=header["securities_code"],
-            document_name=header["document_name"],
-            reporting_date=header["reporting_date"],
-            current_period=header["current_period"],
-            xbrl_id=header["xbrl_id"],
-            report_type=header["report_type"],
+        header = {key: None for key in IxHeader.keys()}
+        header["xbrl_id"] = self.xbrl_id
+        fields = set(self.HEADER_CONCEPTS.values())
+
+        # サマリー(sm)ファイルを先頭に並べ替える
+        files = self.files.sort_values(
+            "document_type", key=lambda s: s != "sm", kind="stable"
         )
 
-        return ix_header.__dict__
+        for _, row in files.iterrows():
+            if not row["xlink_href"].endswith("ixbrl.htm"):
+                continue
 
-    def get_ix_summary(self):
-        def get_value(value_: dict[str, str], item: list[str]):
-            return (
-                value_["numeric"]
-                if any(value_["name"].endswith(item) for item in item)
-                else None
-            )
-
-        contexts = []
-        dfs = []
-        for values in self.get_ix_non_fraction("sm"):
-            dfs.append(DataFrame(values))
-            # dfをcontext_period, context_entity, context_categoryでグループ化
-            for key, values in DataFrame(values).groupby(
-                [
-                    "context_period",
-                    "context_entity",
-                    "context_category",
-                ]
-            ):
-                context = key
-                contexts.append(context)
-        contexts = list(set(contexts))
-
-        for context in contexts:
-            for df in dfs:
-                df_query: DataFrame = df.query(
-                    "context_period == @context[0] & \
-                    context_entity == @context[1] & \
-                    context_category == @context[2]"
-                )
-                # df_queryからnameが"_NetSales"で終わる行を取得
-                # 売上高
-                net_sales = get_value(
-                    df_query.to_dict(orient="records")[0],
-                    ["_NetSales"],
-                )
-                # 営業利益
-                operating_income = get_value(
-                    df_query.to_dict(orient="records")[0],
-                    ["OperatingIncome"],
-                )
-                # 経常利益
-                ordinary_income = get_value(
-                    df_query.to_dict(orient="records")[0],
-                    ["_OrdinaryIncome"],
-                )
-                # 純利益
-                net_income = get_value(
-                    df_query.to_dict(orient="records")[0],
-                    ["_NetIncome"],
+            parser = IxbrlParser(row["xlink_href"])
+            parser.xbrl_id = self.xbrl_id
+            if header["report_type"] is None:
+                header["report_type"] = parser.report_type
+
+            for value in parser.iter_non_numeric():
+                key = self.HEADER_CONCEPTS.get(
+                    value["name"].split("_")[-1]
                 )
-                yield net_sales, operating_income, ordinary_income, net_income
+                if key is None or header[key] is not None:
+                    continue
+                if value["value"]:
+                    header[key] = value["value"]
+                if all(header[field] is not None for field in fields):
+                    return IxHeader(**header).__dict__
+
+        return IxHeader(**header).__dict__
+
+    @Instrumentation.timed_generator(per_xbrl_id=True)
+    def get_ix_summary(self):
+        """
+        ix_summary属性を設定します。
+        サマリー(sm)ファイルから経営成績の概要を取得します。
+
+        Yields:
+            dict: コンテキストごとのサマリー情報(IxSummary)
+        """
+        from pandas import DataFrame
+
+        frames = [
+            DataFrame(values) for values in self.get_ix_non_fraction("sm")
+        ]
+        df = self.pivot_ix_summary(frames).drop(columns="xbrl_id")
+
+        for record in df.to_dict(orient="records"):
+            yield IxSummary(**record).__dict__
+
+    @classmethod
+    def get_ix_summaries(cls, managers):
+        """
+        複数の書類のサマリー情報をまとめて取得します。
+
+        Parameters:
+            managers (list[IXBRLManager]): 対象書類のマネージャー
+
+        Returns:
+            DataFrame: xbrl_idとコンテキストごとのサマリー情報
+        """
+        from pandas import DataFrame
+
+        frames = [
+            DataFrame(values)
+            for manager in managers
+            for values in manager.get_ix_non_fraction("sm")
+        ]
+        return cls.pivot_ix_summary(frames)
+
+    @classmethod
+    def pivot_ix_summary(cls, frames):
+        """
+        非分数データからサマリー情報の横持ちテーブルを作成します。
+
+        Parameters:
+            frames (list[DataFrame]): 非分数データのDataFrame
+
+        Returns:
+            DataFrame: xbrl_idとコンテキストごとに1行のサマリー情報
+        """
+        import pandas as pd
+
+        index = ["xbrl_id", *cls.SUMMARY_INDEX]
+        columns = list(cls.SUMMARY_CONCEPTS.values())
+
+        frames = [df for df in frames if len(df) > 0]
+        if len(frames) == 0:
+            return pd.DataFrame(columns=index + columns)
+
+        df = pd.concat(frames, ignore_index=True)
+
+        # 要素名(接頭辞を除く)から列名を求める
+        df["summary_item"] = (
+            df["name"].str.split("_").str[-1].map(cls.SUMMARY_CONCEPTS)
+        )
+
+        df = (
+            df.groupby(index + ["summary_item"], dropna=False, sort=False)[
+                "numeric"
+            ]
+            .first()
+            .unstack("summary_item")
+            .reindex(columns=columns)
+            .reset_index()
+        )
+        df.columns.name = None
+
+        return df.astype(object).where(df.notna(), None)
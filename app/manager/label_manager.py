@@ -1,12 +1,13 @@
 from app.exception import SetLanguageNotError
-from app.manager import BaseXbrlManager
+from app.manager import BaseXbrlManager, TaxonomyLabelCache
 from app.parser import LabelParser
+from app.utils import Instrumentation
 
 
 class LabelManager(BaseXbrlManager):
     """labelLinkbaseデータの解析を行うクラス
 
-    raise   - SetLanguageNotError("言語の設定が不正です。[jp, en]を指定してください。")
+    raise   - SetLanguageNotError("言語の設定が不正です。[jp, en, both]を指定してください。")
             - XbrlListEmptyError("labelLinkbaseファイルが見つかりません。")
     """
 
@@ -22,6 +23,7 @@ class LabelManager(BaseXbrlManager):
         """
         super().__init__(directory_path)
         self.set_linkbase_files("labelLinkbaseRef")
+        self.__label_files = self.files
         self.output_path = output_path
         self.set_language(lang)
         self.label = None
@@ -30,33 +32,43 @@ class LabelManager(BaseXbrlManager):
         """
         言語を設定します。
 
+        "both"を指定した場合は、日本語と英語のラベルファイルを
+        1つのマネージャーで処理します。
+
         Parameters:
-            language (str): 言語の設定
+            language (str): 言語の設定[jp, en, both]
 
         Returns:
             self (LabelManager): 自身のインスタンス
         """
         self.lang = lang
 
-        if lang not in ["jp", "en"]:
+        if lang not in ["jp", "en", "both"]:
             raise SetLanguageNotError(
-                "言語の設定が不正です。[jp, en]を指定してください。"
+                "言語の設定が不正です。[jp, en, both]を指定してください。"
             )
 
-        if len(self.files) > 0:
+        files = self.__label_files
+        if len(files) > 0:
             if lang == "jp":
-                # self.filesのxlink_hrefの末尾が"lab.xml"であるものを抽出
-                self.files = self.files[
-                    self.files["xlink_href"].str.endswith("lab.xml")
-                ]
+                # filesのxlink_hrefの末尾が"lab.xml"であるものを抽出
+                files = files[files["xlink_href"].str.endswith("lab.xml")]
             elif lang == "en":
-                # self.filesのxlink_hrefの末尾が"lab-en.xml"であるものを抽出
-                self.files = self.files[
-                    self.files["xlink_href"].str.endswith("lab-en.xml")
+                # filesのxlink_hrefの末尾が"lab-en.xml"であるものを抽出
+                files = files[
+                    files["xlink_href"].str.endswith("lab-en.xml")
+                ]
+            else:
+                files = files[
+                    files["xlink_href"].str.endswith(
+                        ("lab.xml", "lab-en.xml")
+                    )
                 ]
+        self.files = files
 
         return self
 
+    @Instrumentation.timed_generator(per_xbrl_id=True)
     def get_link_labels(self, document_type=None):
         """
         label属性を設定します。
@@ -70,14 +82,13 @@ class LabelManager(BaseXbrlManager):
         if document_type is not None:
             files = files.query(f"document_type == '{document_type}'")
         for _, row in files.iterrows():
-            parser = LabelParser.create(
-                row["xlink_href"], output_path
-            ).link_labels()
-
-            data = parser.to_dict()
+            data = self.context.extract(
+                LabelParser, row["xlink_href"], "link_labels", output_path
+            )
 
             yield data
 
+    @Instrumentation.timed_generator(per_xbrl_id=True)
     def get_link_label_locs(self, document_type=None):
         """
         loc属性を設定します。
@@ -91,14 +102,16 @@ class LabelManager(BaseXbrlManager):
         if document_type is not None:
             files = files.query(f"document_type == '{document_type}'")
         for _, row in files.iterrows():
-            parser = LabelParser.create(
-                row["xlink_href"], output_path
-            ).link_label_locs()
-
-            data = parser.to_dict()
+            data = self.context.extract(
+                LabelParser,
+                row["xlink_href"],
+                "link_label_locs",
+                output_path,
+            )
 
             yield data
 
+    @Instrumentation.timed_generator(per_xbrl_id=True)
     def get_link_label_arcs(self, document_type=None):
         """
         labelArc属性を設定します。
@@ -112,10 +125,124 @@ class LabelManager(BaseXbrlManager):
         if document_type is not None:
             files = files.query(f"document_type == '{document_type}'")
         for _, row in files.iterrows():
-            parser = LabelParser.create(
-                row["xlink_href"], output_path
-            ).link_label_arcs()
-
-            data = parser.to_dict()
+            data = self.context.extract(
+                LabelParser,
+                row["xlink_href"],
+                "link_label_arcs",
+                output_path,
+            )
 
             yield data
+
+    @Instrumentation.timed()
+    def get_label_table(self, document_type=None):
+        """
+        要素ごとのラベルの一覧を取得します。
+
+        ラベルファイルごとに要素(loc) → labelArc → labelを結合し、
+        ラベルロールを列に展開した一覧を結合します。
+        同じ要素のラベルが複数のファイルに存在する場合は、
+        先に読み込んだファイル(提出者のラベル)を優先します。
+        タクソノミのラベルファイルはTaxonomyLabelCacheで書類間で共有し、
+        提出者のラベルファイルのみを書類ごとに解析します。
+
+        言語が"both"の場合は、ラベルロールの列名に言語を付与した
+        (label_jp, label_en, ...)1つの一覧を返します。
+
+        Parameters:
+            document_type (str): 書類の種類で絞り込む
+
+        Returns:
+            DataFrame: xlink_hrefをキーとするラベルの一覧
+        """
+        files = self.files
+        if document_type is not None:
+            files = files.query(f"document_type == '{document_type}'")
+
+        if self.lang != "both":
+            return self.__label_table(files)
+
+        is_en = files["xlink_href"].str.endswith("lab-en.xml")
+        tables = []
+        for lang, lang_files in (
+            ("jp", files[~is_en]),
+            ("en", files[is_en]),
+        ):
+            df = self.__label_table(lang_files).drop(columns="xml_lang")
+            df = df.rename(
+                columns={
+                    column: f"{column}_{lang}"
+                    for column in df.columns
+                    if column not in ["xlink_href", "xlink_schema"]
+                }
+            )
+            tables.append(df)
+
+        df = tables[0].merge(
+            tables[1], on="xlink_href", how="outer", suffixes=("", "_en")
+        )
+        df["xlink_schema"] = df["xlink_schema"].fillna(
+            df["xlink_schema_en"]
+        )
+        df = df.drop(columns="xlink_schema_en")
+        for column in ["label_jp", "label_en"]:
+            if column not in df:
+                df[column] = None
+
+        return df
+
+    def __label_table(self, files):
+        """ラベルファイルの一覧から要素ごとのラベルの一覧を取得する"""
+        # 読み込みに時間がかかるため、使用時に読み込む
+        import pandas as pd
+
+        output_path = self.output_path
+
+        frames = []
+        for _, row in files.iterrows():
+            if TaxonomyLabelCache.is_taxonomy(row["xlink_href"]):
+                df = TaxonomyLabelCache.get(row["xlink_href"], output_path)
+            else:
+                df = pd.DataFrame(
+                    self.context.extract(
+                        LabelParser,
+                        row["xlink_href"],
+                        "resolved_labels",
+                        output_path,
+                    )
+                )
+            if len(df) > 0:
+                frames.append(df)
+
+        if len(frames) == 0:
+            return pd.DataFrame(
+                columns=["xlink_href", "xlink_schema", "xml_lang"]
+            )
+
+        df = pd.concat(frames, ignore_index=True)
+        df = df.drop_duplicates("xlink_href").reset_index(drop=True)
+
+        return df
+
+    def get_label_dict(self, document_type=None):
+        """
+        要素ごとのラベルを辞書形式で取得します。
+
+        Parameters:
+            document_type (str): 書類の種類で絞り込む
+
+        Returns:
+            dict: {xlink_href: {ラベルロール: ラベル}}
+        """
+        df = self.get_label_table(document_type).set_index("xlink_href")
+        df = df.drop(columns=["xlink_schema", "xml_lang"], errors="ignore")
+
+        return {
+            concept: {role: label for role, label in row.items() if label}
+            for concept, row in zip(
+                df.index,
+                df.astype(object)
+                .where(df.notna(), None)
+                .to_dict(orient="records"),
+            )
+        }
@@ -5,6 +5,7 @@ from app.parser import (
     DefLinkParser,
     PreLinkParser,
 )
+from app.utils import Instrumentation
 
 
 class BaseLinkManager(BaseXbrlManager):
@@ -64,51 +65,70 @@ class BaseLinkManager(BaseXbrlManager):
     def get_role(self):
         raise NotImplementedError
 
+    @Instrumentation.timed_generator(per_xbrl_id=True)
     def get_link_roles(self):
         """link_rolesを設定します。"""
+        # 読み込みに時間がかかるため、使用時に読み込む
+        from pandas import DataFrame
+
         output_path = self.output_path
         files = self.files
         if self.document_type is not None:
             files = files.query(f"document_type == '{self.document_type}'")
         for _, row in files.iterrows():
 
-            parser = self.parser.create(
-                row["xlink_href"], output_path
-            ).link_roles()
-
-            data = parser.to_DataFrame()
+            data = DataFrame(
+                self.context.extract(
+                    self.parser,
+                    row["xlink_href"],
+                    "link_roles",
+                    output_path,
+                )
+            )
 
             data["xbrl_id"] = self.xbrl_id
 
             yield data.to_dict(orient="records")
 
+    @Instrumentation.timed_generator(per_xbrl_id=True)
     def get_link_locs(self):
+        from pandas import DataFrame
+
         output_path = self.output_path
         files = self.files
         if self.document_type is not None:
             files = files.query(f"document_type == '{self.document_type}'")
         for _, row in files.iterrows():
-            parser = self.parser.create(
-                row["xlink_href"], output_path
-            ).link_locs()
-
-            data = parser.to_DataFrame()
+            data = DataFrame(
+                self.context.extract(
+                    self.parser,
+                    row["xlink_href"],
+                    "link_locs",
+                    output_path,
+                )
+            )
 
             data["xbrl_id"] = self.xbrl_id
 
             yield data.to_dict(orient="records")
 
+    @Instrumentation.timed_generator(per_xbrl_id=True)
     def get_link_arcs(self):
+        from pandas import DataFrame
+
         output_path = self.output_path
         files = self.files
         if self.document_type is not None:
             files = files.query(f"document_type == '{self.document_type}'")
         for _, row in files.iterrows():
-            parser = self.parser.create(
-                row["xlink_href"], output_path
-            ).link_arcs()
-
-            data = parser.to_DataFrame()
+            data = DataFrame(
+                self.context.extract(
+                    self.parser,
+                    row["xlink_href"],
+                    "link_arcs",
+                    output_path,
+                )
+            )
 
             data["xbrl_id"] = self.xbrl_id
 
@@ -1,8 +1,7 @@
-import pandas
-
 from app.exception import XbrlListEmptyError
 from app.manager import BaseXbrlManager
 from app.parser import QualitativeParser
+from app.utils import Instrumentation
 
 
 class QualitativeManager(BaseXbrlManager):
@@ -18,22 +17,46 @@ class QualitativeManager(BaseXbrlManager):
         if len(self.files) == 0:
             raise XbrlListEmptyError("qualitative.htmが見つかりません。")
 
-    def qualitative_infos(self, document_type=None):
-        df = None
+    @Instrumentation.timed_generator(per_xbrl_id=True)
+    def get_qualitative_infos(self, document_type=None):
+        """
+        ファイルごとに見出しごとの本文を取得します。
+
+        大きな定性情報を扱う場合に、ファイル単位で逐次処理できます。
 
+        Parameters:
+            document_type (str): 書類の種類で絞り込む
+
+        Yields:
+            list[dict]: 1ファイル分の見出しごとの本文(xbrl_id, head2,
+                head3, head4, content)
+        """
+        files = self.files
         if document_type is not None:
-            files = self.files.query(f"document_type == '{document_type}'")
-
-        for index, row in files.iterrows():
-            parser = QualitativeParser.create(row["xlink_href"])
-            if df is None:
-                df = parser.qualitative_info().to_DataFrame()
-            else:
-                df = pandas.concat(
-                    [df, parser.qualitative_info().to_DataFrame()],
-                    ignore_index=True,
-                )
-
-        self.data = df.to_dict(orient="records")
+            files = files.query(f"document_type == '{document_type}'")
+
+        for xbrl_url in files["xlink_href"]:
+            parser = QualitativeParser(xbrl_url)
+            # 出力のxbrl_idをマネージャーのxbrl_idにそろえる
+            parser.xbrl_id = self.xbrl_id
+
+            yield list(parser.iter_qualitative_info())
+
+    @Instrumentation.timed()
+    def qualitative_infos(self, document_type=None):
+        """
+        全てのファイルの見出しごとの本文を取得します。
+
+        Parameters:
+            document_type (str): 書類の種類で絞り込む
+
+        Returns:
+            self (QualitativeManager): 自身のインスタンス
+        """
+        data = []
+        for values in self.get_qualitative_infos(document_type):
+            data.extend(values)
+
+        self.data = data
 
         return self
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from app.parser import LabelParser
+
+
+class TaxonomyLabelCache:
+    """タクソノミのラベルファイルの解析結果を共有するキャッシュ
+
+    東証・EDINETのタクソノミのラベルファイル(URLで参照されるlab.xml)は
+    多くの書類で同一のため、要素ごとのラベルの一覧(resolved_labels)を
+    プロセス内とディスクで共有します。
+
+    * プロセス内: URLをキーとして、最初に使用した時に読み込みます。
+    * ディスク: URLとファイルの内容のハッシュをキーとして、
+      列ごとの文字列の配列をnpz形式で保存します。読み込み時に任意の
+      コードが実行されないよう、pickleは使用しません。保存先を
+      指定しない場合は、ダウンロード先(output_path)の".label_cache"に
+      保存します。
+
+    getは共有のデータを変更されないよう、複製を返します。
+
+    Examples:
+        >>> TaxonomyLabelCache.set_cache_dir("path/to/cache")
+        >>> df = TaxonomyLabelCache.get(url, output_path)
+        >>> TaxonomyLabelCache.clear()
+    """
+
+    __tables = {}
+    __lock = threading.Lock()
+    __cache_dir = None
+
+    CACHE_DIR_NAME = ".label_cache"
+
+    @staticmethod
+    def is_taxonomy(xbrl_url):
+        """URLで参照されるタクソノミのファイルか判定する"""
+        return str(xbrl_url).startswith("http")
+
+    @classmethod
+    def set_cache_dir(cls, cache_dir):
+        """ディスクキャッシュの保存先を設定する
+
+        Args:
+            cache_dir (str): 保存先のディレクトリ(Noneの場合は既定の保存先)
+        """
+        cls.__cache_dir = None if cache_dir is None else Path(cache_dir)
+
+    @classmethod
+    def clear(cls):
+        """プロセス内のキャッシュを破棄する"""
+        with cls.__lock:
+            cls.__tables.clear()
+
+    @classmethod
+    def __cache_path(cls, xbrl_url, digest, output_path):
+        """ディスクキャッシュのパスを取得する"""
+        cache_dir = cls.__cache_dir
+        if cache_dir is None:
+            if output_path is None:
+                return None
+            cache_dir = Path(output_path) / cls.CACHE_DIR_NAME
+        url_key = hashlib.sha1(xbrl_url.encode()).hexdigest()[:16]
+        return cache_dir / f"{url_key}-{digest}.npz"
+
+    @staticmethod
+    def __save(table, path):
+        """ラベルの一覧を列ごとの文字列と欠損値の配列で保存する"""
+        # 読み込みに時間がかかるため、使用時に読み込む
+        import numpy as np
+
+        arrays = {"columns": np.array(table.columns, dtype=str)}
+        for number, column in enumerate(table.columns):
+            missing = table[column].isna().to_numpy()
+            arrays[f"values_{number}"] = np.array(
+                table[column].where(~missing, "").astype(str), dtype=str
+            )
+            arrays[f"missing_{number}"] = missing
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @staticmethod
+    def __load(path):
+        """保存したラベルの一覧を読み込む(pickleは許可しない)"""
+        import numpy as np
+        from pandas import DataFrame
+
+        with np.load(path, allow_pickle=False) as npz:
+            columns = npz["columns"].tolist()
+            data = {}
+            for number, column in enumerate(columns):
+                values = npz[f"values_{number}"].astype(object)
+                values[npz[f"missing_{number}"]] = None
+                data[column] = values
+        return DataFrame(data, columns=columns)
+
+    @classmethod
+    def get(cls, xbrl_url, output_path=None):
+        """タクソノミのラベルファイルの要素ごとのラベルの一覧を取得する
+
+        Args:
+            xbrl_url (str): ラベルファイルのURL
+            output_path (str): ラベルファイルのダウンロード先
+
+        Returns:
+            DataFrame: 要素ごとのラベルの一覧(共有のデータの複製)
+        """
+        with cls.__lock:
+            table = cls.__tables.get(xbrl_url)
+        if table is not None:
+            return table.copy()
+
+        parser = LabelParser(xbrl_url, output_path)
+        is_file, file_path = parser._is_url_in_local()
+        if is_file is False:
+            file_path = parser._fetch_url()
+
+        with open(file_path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        cache_path = cls.__cache_path(xbrl_url, digest, output_path)
+
+        if cache_path is not None and cache_path.exists():
+            table = cls.__load(cache_path)
+        else:
+            parser._read_xbrl(file_path)
+            table = parser.resolved_labels().to_DataFrame()
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+                cls.__save(table, tmp_path)
+                os.replace(tmp_path, cache_path)
+
+        with cls.__lock:
+            cls.__tables[xbrl_url] = table
+        return table.copy()
@@ -1,7 +1,20 @@
-from .base_xbrl_model import BaseXbrlModel
-from .xbrl_model import XBRLModel
+from typing import TYPE_CHECKING
+
+from app.utils.lazy_loader import lazy_attributes
+
+if TYPE_CHECKING:
+    from .base_xbrl_model import BaseXbrlModel
+    from .xbrl_model import XBRLModel
 
 __all__ = [
     "XBRLModel",
     "BaseXbrlModel",
 ]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "XBRLModel": (".xbrl_model", "XBRLModel"),
+        "BaseXbrlModel": (".base_xbrl_model", "BaseXbrlModel"),
+    },
+)
@@ -1,30 +1,144 @@
 import shutil
+import time
 import zipfile
 from pathlib import Path
 from uuid import uuid4
 
-import pandas as pd
-
 from app.exception import NotXbrlDirectoryException, NotXbrlTypeException
+from app.manager import FilingContext, FilingManifest
+from app.utils import FilingProfiler, Instrumentation, Utils
 
 
 class BaseXbrlModel:
-    """XBRLファイルを扱うための基底クラス"""
+    """XBRLファイルを扱うための基底クラス
+
+    xbrl_idは既定ではuuid4で生成します。id_sourceを指定した場合は
+    ファイルの内容から決定的なxbrl_idを生成するため、同じ書類を
+    再処理しても同じxbrl_idになります。
+
+    * "zip": zipファイルの内容から生成する
+    * "sm": サマリー(sm)のiXBRLファイルの内容から生成する
+      (zipファイルを作成し直した場合も同じxbrl_idになる)
 
-    def __init__(self, xbrl_zip_path, output_path) -> None:
+    xbrl_idは共有コンテキスト(FilingContext)を通じて、全ての
+    マネージャーとパーサーに引き継がれます。
+    """
+
+    ID_SOURCES = [None, "zip", "sm"]
+
+    def __init__(self, xbrl_zip_path, output_path, id_source=None) -> None:
+        if id_source not in self.ID_SOURCES:
+            raise ValueError(
+                f"xbrl_idの生成元が不正です。[{id_source}] "
+                f"{self.ID_SOURCES}から指定してください。"
+            )
         # XBRLファイルのzipファイルのパスを指定
         self.__xbrl_zip_path = Path(xbrl_zip_path)
         self.__output_path = Path(output_path)
+        if id_source == "zip":
+            self.__xbrl_id = Utils.content_xbrl_id(self.__xbrl_zip_path)
+        elif id_source == "sm":
+            # 解凍後に生成する
+            self.__xbrl_id = None
+        else:
+            self.__xbrl_id = str(uuid4())
         # XBRLファイルを解凍したディレクトリのパスを取得
-        self.__directory_path = self.__unzip_xbrl()
+        start = time.perf_counter()
+        self.__directory_path, unzip_files = self.__unzip_xbrl()
+        unzip_seconds = time.perf_counter() - start
+        # モデルが参照している間はマネージャー間でコンテキストを共有する
+        self.__context = context = FilingContext.of(self.__directory_path)
+        if id_source == "sm":
+            self.__xbrl_id = context.content_xbrl_id() or (
+                Utils.content_xbrl_id(self.__xbrl_zip_path)
+            )
+        context.set_xbrl_id(self.__xbrl_id)
+        # "sm"の場合は解凍後にxbrl_idが決まるため、解凍の計測は
+        # xbrl_idの決定後に書類に集計する
+        Instrumentation.record(
+            "BaseXbrlModel.unzip", unzip_seconds, self.__xbrl_id
+        )
+        Instrumentation.count(
+            "BaseXbrlModel.unzip_files", unzip_files, self.__xbrl_id
+        )
         self.__xbrl_type = self.__xbrl_type()
-        self.__xbrl_id = str(uuid4())
 
     @classmethod
-    def xbrl_models(cls, xbrl_zip_dirs, output_path):
-        zip_files = Path(xbrl_zip_dirs).rglob("*.zip")
+    def xbrl_models(
+        cls, xbrl_zip_dirs, output_path, manifest=None, id_source=None
+    ):
+        """ディレクトリ内のzipファイルからモデルを順に生成する
+
+        FilingProfilerの対象の書類は、モデルの生成から呼び出し側の
+        処理が終わる(次のモデルを要求する)までをプロファイルします。
+
+        manifest(RunManifest)を指定した場合は、完了済みの書類と
+        試行回数の上限に達した書類をスキップします。呼び出し側が次の
+        モデルを要求した時点で完了を記録し、モデルの生成に失敗した
+        場合や、途中で処理を中断した場合は失敗を記録します。
+        呼び出し側で処理に失敗した書類は、
+        manifest.fail(manifest.content_hash(model.xbrl_zip_path), error)
+        で失敗を記録すると、完了で上書きされません。
+
+        id_sourceはモデルのxbrl_idの生成元です。
+        """
+        zip_files = sorted(Path(xbrl_zip_dirs).rglob("*.zip"))
         for zip_file in zip_files:
-            yield cls(zip_file.as_posix(), output_path)
+            if manifest is None:
+                with FilingProfiler.profile(
+                    zip_name=zip_file.name, output_dir=output_path
+                ):
+                    yield cls(zip_file.as_posix(), output_path, id_source)
+                continue
+
+            content_hash = manifest.content_hash(zip_file)
+            if not manifest.should_process(content_hash):
+                continue
+            manifest.start(content_hash, zip_file.as_posix())
+            start = time.perf_counter()
+            xbrl_id = None
+            try:
+                with FilingProfiler.profile(
+                    zip_name=zip_file.name, output_dir=output_path
+                ):
+                    model = cls(
+                        zip_file.as_posix(), output_path, id_source
+                    )
+                    xbrl_id = model.xbrl_id
+                    yield model
+            except GeneratorExit:
+                manifest.fail(
+                    content_hash,
+                    "処理が中断されました。",
+                    xbrl_id,
+                    time.perf_counter() - start,
+                )
+                raise
+            except Exception as error:
+                manifest.fail(
+                    content_hash,
+                    f"{type(error).__name__}: {error}",
+                    xbrl_id,
+                    time.perf_counter() - start,
+                )
+                continue
+            manifest.complete(
+                content_hash,
+                xbrl_id,
+                time.perf_counter() - start,
+                {"output_path": Path(output_path).as_posix()},
+            )
+
+    def profile(self):
+        """この書類の処理をプロファイルするコンテキストマネージャーを取得する
+
+        Examples:
+            >>> with model.profile():
+            ...     model.ixbrl_manager.get_ix_header()
+        """
+        return FilingProfiler.profile(
+            self.xbrl_id, self.__xbrl_zip_path.name, self.output_path
+        )
 
     @property
     def xbrl_id(self):
@@ -32,14 +146,19 @@ class BaseXbrlModel:
 
     def set_xbrl_id(self, xbrl_id):
         self.__xbrl_id = xbrl_id
+        FilingContext.of(self.directory_path).set_xbrl_id(xbrl_id)
         return self
 
     def _set_manager(self):
         raise NotImplementedError
 
     def __del__(self):
+        # 解凍に失敗した場合はディレクトリが存在しない
+        if not hasattr(self, "_BaseXbrlModel__directory_path"):
+            return
         directory_path = Path(self.directory_path)
         if directory_path.exists() and directory_path.is_dir():
+            FilingContext.invalidate(directory_path.as_posix())
             shutil.rmtree(directory_path.as_posix())
 
     @property
@@ -66,8 +185,8 @@ class BaseXbrlModel:
     def xbrl_type(self):
         return self.__xbrl_type
 
-    # zipファイルを解凍するメソッドを追加して解凍したファイルのパスを返す
-    def __unzip_xbrl(self) -> str:
+    # zipファイルを解凍するメソッドを追加して解凍したファイルのパスとファイル数を返す
+    def __unzip_xbrl(self) -> tuple:
         zip_path = Path(self.xbrl_zip_path)
         with zipfile.ZipFile(zip_path.as_posix(), "r") as z:
             # フォルダ名をランダムに生成
@@ -75,22 +194,22 @@ class BaseXbrlModel:
             # zipファイルを解凍するパスを指定
             unzip_path = zip_path.parent / dir_name
             z.extractall(unzip_path.as_posix())
-        return unzip_path.as_posix()
+            return unzip_path.as_posix(), len(z.namelist())
 
     def __xbrl_type(self):
-        directory_path = Path(self.directory_path)
-        # ファイルの末尾が「ixbrl.htm」のファイルを再起的に取得してリストに追加
-        ixbrl_files = list(directory_path.rglob("*ixbrl.htm"))
+        manifest = FilingManifest.of(self.directory_path)
+        # ファイルの末尾が「ixbrl.htm」のファイルを取得してリストに追加
+        ixbrl_files = [
+            entry["path"]
+            for entry in manifest.entries
+            if entry["name"].endswith("ixbrl.htm")
+        ]
         if len(ixbrl_files) == 1:
-            return ixbrl_files[0].as_posix().split("/")[-1].split("-")[1]
+            return ixbrl_files[0].split("/")[-1].split("-")[1]
         elif len(ixbrl_files) > 1:
             for ixbrl_file in ixbrl_files:
-                if "sm" in ixbrl_file.as_posix():
-                    return (
-                        ixbrl_file.as_posix()
-                        .split("/")[-1]
-                        .split("-")[1][2:6]
-                    )
+                if "sm" in ixbrl_file:
+                    return ixbrl_file.split("/")[-1].split("-")[1][2:6]
             raise NotXbrlDirectoryException(
                 "ixbrlファイルが複数存在します。"
             )
@@ -101,10 +220,12 @@ class BaseXbrlModel:
 
     # ディレクトリ内を再帰的に検索して指定したキーワードがファイル末尾と一致するファイルが存在するかチェックするメソッド
     def __check_xbrl_files_in_dir(self, *keywords):
-        directory_path = Path(self.directory_path)
+        manifest = FilingManifest.of(self.directory_path)
         for keyword in keywords:
             # キーワードに一致するファイルが存在しない場合はFalseを返す
-            if not list(directory_path.rglob(f"*{keyword}*")):
+            if not any(
+                keyword in entry["name"] for entry in manifest.entries
+            ):
                 return False
         # キーワードに一致するファイルが存在する場合はTrueを返す
         return True
@@ -133,6 +254,9 @@ class BaseXbrlModel:
 
     def _get_xbrl_id(self, tuple):
         """tuple内のDataFrameにxbrl_idを追加する"""
+        # 読み込みに時間がかかるため、使用時に読み込む
+        import pandas as pd
+
         for df in tuple:
             if isinstance(df, pd.DataFrame):
                 df["xbrl_id"] = self.xbrl_id
@@ -12,15 +12,24 @@ from .base_xbrl_model import BaseXbrlModel
 
 
 class XBRLModel(BaseXbrlModel):
-    """XBRLファイルを扱うためのクラス"""
+    """XBRLファイルを扱うためのクラス
 
-    def __init__(self, xbrl_zip_path, output_path) -> None:
-        super().__init__(xbrl_zip_path, output_path)
-        self.__ixbrl_manager = IXBRLManager(self.directory_path)
-        self.__label_manager = self._init_manager(LabelManager)
-        self.__cal_link_manager = self._init_manager(CalLinkManager)
-        self.__def_link_manager = self._init_manager(DefLinkManager)
-        self.__pre_link_manager = self._init_manager(PreLinkManager)
+    各マネージャーはプロパティへの初回アクセス時に生成されます。
+    マネージャー間ではディレクトリのマニフェスト、linkbaseRefの一覧、
+    解析済みのドキュメント、xbrl_idを共有します(FilingContext)。
+    """
+
+    def __init__(self, xbrl_zip_path, output_path, id_source=None) -> None:
+        self.__managers = {}
+        super().__init__(xbrl_zip_path, output_path, id_source)
+
+    def set_xbrl_id(self, xbrl_id):
+        super().set_xbrl_id(xbrl_id)
+        # 生成済みのマネージャーにも設定する
+        for manager in self.__managers.values():
+            if manager is not None:
+                manager.set_xbrl_id(xbrl_id)
+        return self
 
     def _init_manager(self, manager_class: BaseXbrlManager):
         try:
@@ -28,33 +37,45 @@ class XBRLModel(BaseXbrlModel):
         except XbrlListEmptyError:
             return None
 
+    def __get_manager(self, key, factory):
+        """マネージャーを取得する(未生成の場合は生成する)"""
+        if key not in self.__managers:
+            self.__managers[key] = factory()
+        return self.__managers[key]
+
     @property
     def ixbrl_manager(self):
-        return self.__ixbrl_manager
+        return self.__get_manager(
+            "ixbrl", lambda: IXBRLManager(self.directory_path)
+        )
 
     @property
     def label_manager(self):
-        return self.__label_manager
+        return self.__get_manager(
+            "label", lambda: self._init_manager(LabelManager)
+        )
 
     @property
     def cal_link_manager(self):
-        return self.__cal_link_manager
+        return self.__get_manager(
+            "cal_link", lambda: self._init_manager(CalLinkManager)
+        )
 
     @property
     def def_link_manager(self):
-        return self.__def_link_manager
+        return self.__get_manager(
+            "def_link", lambda: self._init_manager(DefLinkManager)
+        )
 
     @property
     def pre_link_manager(self):
-        return self.__pre_link_manager
+        return self.__get_manager(
+            "pre_link", lambda: self._init_manager(PreLinkManager)
+        )
 
     def __del__(self):
         super().__del__()
-        self.__ixbrl_manager = None
-        self.__label_manager = None
-        self.__cal_link_manager = None
-        self.__def_link_manager = None
-        self.__pre_link_manager = None
+        self.__managers = {}
 
     def get_ixbrl(self):
         return self.ixbrl_manager
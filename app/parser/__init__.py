@@ -1,14 +1,19 @@
-from .base_xbrl_parser import BaseXBRLParser
-from .ixbrl_parser import IxbrlParser
-from .label_parser import LabelParser
-from .link_parser import (
-    BaseLinkParser,
-    CalLinkParser,
-    DefLinkParser,
-    PreLinkParser,
-)
-from .qualitative_parser import QualitativeParser
-from .schema_parser import SchemaParser
+from typing import TYPE_CHECKING
+
+from app.utils.lazy_loader import lazy_attributes
+
+if TYPE_CHECKING:
+    from .base_xbrl_parser import BaseXBRLParser
+    from .ixbrl_parser import IxbrlParser
+    from .label_parser import LabelParser
+    from .link_parser import (
+        BaseLinkParser,
+        CalLinkParser,
+        DefLinkParser,
+        PreLinkParser,
+    )
+    from .qualitative_parser import QualitativeParser
+    from .schema_parser import SchemaParser
 
 __all__ = [
     "BaseXBRLParser",
@@ -21,3 +26,18 @@ __all__ = [
     "QualitativeParser",
     "SchemaParser",
 ]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "BaseXBRLParser": (".base_xbrl_parser", "BaseXBRLParser"),
+        "IxbrlParser": (".ixbrl_parser", "IxbrlParser"),
+        "LabelParser": (".label_parser", "LabelParser"),
+        "BaseLinkParser": (".link_parser", "BaseLinkParser"),
+        "CalLinkParser": (".link_parser", "CalLinkParser"),
+        "DefLinkParser": (".link_parser", "DefLinkParser"),
+        "PreLinkParser": (".link_parser", "PreLinkParser"),
+        "QualitativeParser": (".qualitative_parser", "QualitativeParser"),
+        "SchemaParser": (".schema_parser", "SchemaParser"),
+    },
+)
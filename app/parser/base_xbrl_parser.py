@@ -3,12 +3,14 @@ import os
 import time
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 from uuid import uuid4
 
-import requests
-from bs4 import BeautifulSoup as bs
-from pandas import DataFrame
+from app.utils import Instrumentation
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup as bs
 
 
 class BaseXBRLParser:
@@ -29,7 +31,7 @@ class BaseXBRLParser:
         self.__document_type = "fr" if "fr" in file_name else "sm"
         self.__xbrl_url = xbrl_url
         self.__output_path = output_path
-        self.soup: bs | None = None
+        self.soup: "bs | None" = None
         self.data = [{}]
         self.__xbrl_id = str(uuid4())
 
@@ -61,8 +63,12 @@ class BaseXBRLParser:
     def document_type(self):
         return self.__document_type
 
+    @Instrumentation.timed()
     def _read_xbrl(self, xbrl_path):
         """XBRLをBeautifulSoup読み込む"""
+        # 読み込みに時間がかかるため、使用時に読み込む
+        from bs4 import BeautifulSoup as bs
+
         with open(xbrl_path, "r", encoding="utf-8") as f:
             # 読み取り専用でファイルをロック
             fcntl.flock(f.fileno(), fcntl.LOCK_SH)
@@ -71,9 +77,13 @@ class BaseXBRLParser:
             fcntl.flock(f.fileno(), fcntl.LOCK_UN)
             return self.soup
 
+    @Instrumentation.timed()
     def _fetch_url(self):
         """URLからローカルにファイルを保存する"""
         if self.xbrl_url.startswith("http"):
+            # 読み込みに時間がかかるため、URLを取得する場合のみ読み込む
+            import requests
+
             response = requests.get(self.xbrl_url)
             if response.status_code == 200:
                 print(
@@ -82,6 +92,9 @@ class BaseXBRLParser:
                 )
                 # エンコーディングを自動検出
                 response.encoding = response.apparent_encoding
+                Instrumentation.count(
+                    "BaseXBRLParser.fetch_bytes", len(response.content)
+                )
                 file_path = os.path.join(
                     self.output_path,
                     urlparse(self.xbrl_url).path.lstrip("/"),
@@ -112,6 +125,7 @@ class BaseXBRLParser:
                 return False, None
 
     @classmethod
+    @Instrumentation.timed()
     def create(cls, xbrl_url, output_path=None):
         instance = cls(xbrl_url, output_path)
         is_file, file_path = instance._is_url_in_local()
@@ -120,8 +134,11 @@ class BaseXBRLParser:
         instance._read_xbrl(file_path)
         return instance
 
+    @Instrumentation.timed()
     def to_DataFrame(self):
         """DataFrame形式で出力する"""
+        from pandas import DataFrame
+
         return DataFrame(self.data)
 
     def to_dict(self):
@@ -1,10 +1,13 @@
+import fcntl
 import os
 import re
 from urllib.parse import urlparse
 
+from lxml import etree
+
 from app.exception import TypeOfXBRLIsDifferent
 from app.tag import IxNonFraction, IxNonNumeric
-from app.utils import Utils
+from app.utils import Instrumentation, Utils
 
 from . import BaseXBRLParser
 
@@ -30,6 +33,8 @@ class IxbrlParser(BaseXBRLParser):
     Methods:
     - ix_non_numeric
         iXBRLの非数値情報を取得する
+    - iter_non_numeric
+        iXBRLの非数値情報を逐次取得する
     - ix_non_fractions
         iXBRLの非分数情報を取得する
 
@@ -39,6 +44,8 @@ class IxbrlParser(BaseXBRLParser):
         >>> print(parser.ix_non_numeric().to_dataframe())
     """
 
+    XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+
     def __init__(self, xbrl_url, output_path=None):
         super().__init__(xbrl_url, output_path)
         # ファイルの拡張子がixbrl.htmでない場合はエラーを出力
@@ -76,6 +83,7 @@ class IxbrlParser(BaseXBRLParser):
         else:
             return file_name.split("-")[1]
 
+    @Instrumentation.timed()
     def ix_non_numeric(self):
         """iXBRLの非数値情報を取得する
 
@@ -88,77 +96,126 @@ class IxbrlParser(BaseXBRLParser):
         tags = self.soup.find_all(name="ix:nonNumeric")
 
         for tag in tags:
+            inn = self._to_non_numeric(tag.attrs, tag.text)
+            lists.append(inn.__dict__)
 
-            # _____attr[contextRef]
-            context_parts = tag.get("contextRef").split("_")
-            context_period = context_parts[0]
-            context_entity = (
-                context_parts[1] if len(context_parts) > 1 else None
-            )
-            context_category = (
-                context_parts[2] if len(context_parts) > 2 else None
-            )
-
-            # _____attr[xsi:nil]
-            xsi_nil = True if tag.get("xsi:nil") == "true" else False
+        self.data = lists
 
-            # _____attr[escape]
-            escape = True if tag.get("escape") == "true" else False
+        return self
 
-            # _____attr[name]
-            name = tag.get("name").replace(":", "_")
+    @Instrumentation.timed_generator()
+    def iter_non_numeric(self):
+        """iXBRLの非数値情報を逐次取得する
 
-            # _____attr[text]
-            if escape is False:
-                # text属性が存在する場合は取得
-                text = tag.text.replace("　", "").replace(" ", "")
-                # textの数字を半角に変換
-                text = re.sub(
-                    r"[０-９]",
-                    lambda x: chr(ord(x.group(0)) - 0xFEE0),
-                    text,
-                )
-            else:
-                text = None
+        BeautifulSoupで文書全体を解析せず、ix:nonNumeric要素を
+        ストリーミングで読み込みます。呼び出し側が反復を中断した時点で
+        ファイルの読み込みも終了します。
 
-            format_str = (
-                tag.get("format").split(":")[-1]
-                if tag.get("format")
-                else None
-            )
+        Yields:
+            dict: 非数値情報(IxNonNumeric)の辞書
+        """
+        is_file, file_path = self._is_url_in_local()
+        if is_file is False:
+            file_path = self._fetch_url()
+
+        with open(file_path, "rb") as f:
+            # 読み取り専用でファイルをロック
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            depth = 0
+            for event, elem in etree.iterparse(
+                f, events=("start", "end"), tag="{*}nonNumeric"
+            ):
+                if event == "start":
+                    depth += 1
+                    continue
+                depth -= 1
 
-            # textが日付文字列の場合はフォーマットを統一
-            if format_str:
-                text, format_str = Utils.date_str_to_format(
-                    text, format_str
-                )  # pragma: no cover
+                attrs = dict(elem.attrib)
+                attrs["xsi:nil"] = elem.get(self.XSI_NIL)
+                inn = self._to_non_numeric(attrs, "".join(elem.itertext()))
 
-            # textが証券コードの場合は4文字に統一
-            if any(
-                item in name for item in ["SecuritiesCode", "SecurityCode"]
-            ):
-                text = text[0:4]  # pragma: no cover
+                yield inn.__dict__
 
-            # 辞書に追加
-            inn = IxNonNumeric(
-                xbrl_id=self.xbrl_id,
-                context_period=context_period,
-                context_entity=context_entity,
-                context_category=context_category,
-                name=name,
-                xsi_nil=xsi_nil,
-                escape=escape,
-                format=format_str,
-                value=text,
-                document_type=self.document,
-                report_type=self.report_type,
-            )
-            lists.append(inn.__dict__)
+                # 入れ子のix:nonNumericは親要素のテキストに含まれるため、
+                # 最上位の要素のみ解放する
+                if depth == 0:
+                    elem.clear()
 
-        self.data = lists
+    def _to_non_numeric(self, attrs, tag_text):
+        """ix:nonNumeric要素の属性とテキストからIxNonNumericを生成する
 
-        return self
+        Args:
+            attrs (dict): 要素の属性
+            tag_text (str): 要素のテキスト
 
+        Returns:
+            IxNonNumeric: 非数値情報
+        """
+        # _____attr[contextRef]
+        context_parts = attrs.get("contextRef").split("_")
+        context_period = context_parts[0]
+        context_entity = (
+            context_parts[1] if len(context_parts) > 1 else None
+        )
+        context_category = (
+            context_parts[2] if len(context_parts) > 2 else None
+        )
+
+        # _____attr[xsi:nil]
+        xsi_nil = True if attrs.get("xsi:nil") == "true" else False
+
+        # _____attr[escape]
+        escape = True if attrs.get("escape") == "true" else False
+
+        # _____attr[name]
+        name = attrs.get("name").replace(":", "_")
+
+        # _____attr[text]
+        if escape is False:
+            # text属性が存在する場合は取得
+            text = tag_text.replace("　", "").replace(" ", "")
+            # textの数字を半角に変換
+            text = re.sub(
+                r"[０-９]",
+                lambda x: chr(ord(x.group(0)) - 0xFEE0),
+                text,
+            )
+        else:
+            text = None
+
+        format_str = (
+            attrs.get("format").split(":")[-1]
+            if attrs.get("format")
+            else None
+        )
+
+        # textが日付文字列の場合はフォーマットを統一
+        if format_str:
+            text, format_str = Utils.date_str_to_format(
+                text, format_str
+            )  # pragma: no cover
+
+        # textが証券コードの場合は4文字に統一
+        if any(
+            item in name for item in ["SecuritiesCode", "SecurityCode"]
+        ):
+            text = text[0:4]  # pragma: no cover
+
+        return IxNonNumeric(
+            xbrl_id=self.xbrl_id,
+            context_period=context_period,
+            context_entity=context_entity,
+            context_category=context_category,
+            name=name,
+            xsi_nil=xsi_nil,
+            escape=escape,
+            format=format_str,
+            value=text,
+            document_type=self.document,
+            report_type=self.report_type,
+        )
+
+    @Instrumentation.timed()
     def ix_non_fractions(self):
         """iXBRLの非分数情報を取得する
 
@@ -1,5 +1,6 @@
 from app.exception import TagNotFoundError, TypeOfXBRLIsDifferent
 from app.tag import LabelArc, LabelLoc, LabelRoleRefs, LabelValue
+from app.utils import Instrumentation
 
 from . import BaseXBRLParser
 
@@ -30,6 +31,8 @@ class LabelParser(BaseXBRLParser):
         link:labelArc要素を取得する
     - role_refs
         roleRef要素を取得する
+    - resolved_labels
+        要素ごとのラベルを取得する
 
     Examples:
         >>> from xbrl_parser.label_parser import LabelParser
@@ -46,6 +49,7 @@ class LabelParser(BaseXBRLParser):
                 f"{self.basename()} はlab.xmlではありません。"
             )
 
+    @Instrumentation.timed()
     def link_labels(self):
         """link:label要素を取得するメソッド。
 
@@ -70,6 +74,7 @@ class LabelParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def link_label_locs(self):
         """link:loc要素を取得するメソッド。
 
@@ -103,6 +108,7 @@ class LabelParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def link_label_arcs(self):
         """link:labelArc要素を取得するメソッド。
 
@@ -125,6 +131,7 @@ class LabelParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def role_refs(self):
         """roleRef要素を取得するメソッド。
 
@@ -161,3 +168,63 @@ class LabelParser(BaseXBRLParser):
         self.data = lists
 
         return self
+
+    @Instrumentation.timed()
+    def resolved_labels(self):
+        """要素ごとのラベルを取得するメソッド。
+
+        link:loc(要素) → link:labelArc → link:label をハッシュ結合し、
+        ラベルロール(label, terseLabel, verboseLabel, ...)を列に展開します。
+
+        returns:
+            self: LabelParser
+        """
+        # 読み込みに時間がかかるため、使用時に読み込む
+        from pandas import DataFrame
+
+        locs = DataFrame(self.link_label_locs().data)
+        arcs = DataFrame(self.link_label_arcs().data)
+        labels = DataFrame(self.link_labels().data)
+
+        if len(locs) == 0 or len(arcs) == 0 or len(labels) == 0:
+            self.data = []
+            return self
+
+        df = (
+            locs[["xlink_label", "xlink_schema", "xlink_href"]]
+            .drop_duplicates("xlink_label")
+            .merge(
+                arcs[["xlink_from", "xlink_to"]],
+                left_on="xlink_label",
+                right_on="xlink_from",
+            )
+            .drop(columns="xlink_label")
+            .merge(
+                labels[["xlink_label", "xlink_role", "xml_lang", "label"]],
+                left_on="xlink_to",
+                right_on="xlink_label",
+            )
+        )
+
+        # ラベルロールのURIの末尾をカラム名とする
+        df["role"] = df["xlink_role"].str.rsplit("/", n=1).str[-1]
+        df = df.drop_duplicates(["xlink_href", "role"])
+
+        table = df.pivot(
+            index="xlink_href", columns="role", values="label"
+        )
+        table.columns.name = None
+        table = (
+            df.drop_duplicates("xlink_href")
+            .set_index("xlink_href")[["xlink_schema", "xml_lang"]]
+            .join(table)
+            .reset_index()
+        )
+
+        self.data = (
+            table.astype(object)
+            .where(table.notna(), None)
+            .to_dict(orient="records")
+        )
+
+        return self
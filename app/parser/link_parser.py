@@ -1,5 +1,6 @@
 from app.exception import TypeOfXBRLIsDifferent
 from app.tag import LinkArc, LinkBase, LinkLoc, LinkRole, LinkTag
+from app.utils import Instrumentation
 
 from . import BaseXBRLParser
 
@@ -25,6 +26,7 @@ class BaseLinkParser(BaseXBRLParser):
     def set_arc_tag_name(self):
         raise NotImplementedError
 
+    @Instrumentation.timed()
     def link_roles(self):
         """link:role要素を取得するメソッド。
 
@@ -51,6 +53,7 @@ class BaseLinkParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def link_locs(self):
         """link:loc要素を取得するメソッド。
 
@@ -87,6 +90,7 @@ class BaseLinkParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def link_arcs(self):
         """link:arc要素を取得するメソッド。
 
@@ -122,7 +126,7 @@ class BaseLinkParser(BaseXBRLParser):
                     xlink_type=tag.get("xlink:type"),
                     xlink_from=tag.get("xlink:from"),
                     xlink_to=tag.get("xlink:to"),
-                    xlink_arcrole=tag.get("arcrole"),
+                    xlink_arcrole=tag.get("xlink:arcrole"),
                     xlink_order=xlink_order,
                     xlink_weight=xlink_weight,
                 )
@@ -132,6 +136,7 @@ class BaseLinkParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def link_base(self):
         """link:base要素を取得するメソッド。
 
@@ -156,6 +161,7 @@ class BaseLinkParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def link_tags(self):
         """link要素を取得するメソッド。
 
@@ -1,8 +1,107 @@
+import fcntl
+
+from lxml import etree
+
 from app.exception import TypeOfXBRLIsDifferent
+from app.utils import Instrumentation
 
 from . import BaseXBRLParser
 
 
+class _QualitativeTarget:
+    """qualitative.htmの解析イベントから見出しごとの本文を組み立てるクラス
+
+    lxmlのパーサーターゲットとして使用し、要素の開始・終了とテキストの
+    イベントを文書順に1度だけ受け取ります。保持するのは現在の見出しの
+    状態と、現在のセクションの本文のみです。
+    """
+
+    HEAD_CLASSES = ["smt_head2", "smt_head3", "smt_text3"]
+
+    # 本文として扱わない要素
+    SKIP_TAGS = ["style", "script", "title"]
+
+    def __init__(self) -> None:
+        self.sections = []
+        self.head2, self.head3, self.head4 = "", "", ""
+        self.__content = []
+        self.__text = []
+        self.__depth = 0
+        # 見出しの要素の情報(クラス名, 深さ, テキスト)
+        self.__head = None
+        self.__skip_depth = None
+
+    def __flush_text(self):
+        """連続したテキストを前後の空白を除いて出力先に追加する"""
+        text = "".join(self.__text).strip()
+        self.__text = []
+        if len(text) == 0 or self.__skip_depth is not None:
+            return
+        if self.__head is not None:
+            self.__head[2].append(text)
+        else:
+            self.__content.append(text)
+
+    def __flush_section(self):
+        """現在のセクションを出力する"""
+        if self.head2 != "":
+            self.sections.append(
+                {
+                    "head2": self.head2,
+                    "head3": self.head3,
+                    "head4": self.head4,
+                    "content": "".join(self.__content),
+                }
+            )
+        self.__content = []
+
+    def start(self, tag, attrib):
+        self.__flush_text()
+        self.__depth += 1
+
+        local_name = etree.QName(tag).localname
+        if self.__skip_depth is None and local_name in self.SKIP_TAGS:
+            self.__skip_depth = self.__depth
+
+        if self.__head is None:
+            classes = (attrib.get("class") or "").split()
+            for class_name in self.HEAD_CLASSES:
+                if class_name in classes:
+                    self.__head = (class_name, self.__depth, [])
+                    break
+
+    def end(self, tag):
+        self.__flush_text()
+
+        if self.__skip_depth == self.__depth:
+            self.__skip_depth = None
+
+        if self.__head is not None and self.__head[1] == self.__depth:
+            class_name, _, texts = self.__head
+            self.__head = None
+            text = "".join(texts)
+            # テキストを持たない見出しは無視する
+            if len(text) > 0:
+                self.__flush_section()
+                if class_name == "smt_head2":
+                    self.head2 = text
+                    self.head4 = ""
+                elif class_name == "smt_head3":
+                    self.head3 = text
+                elif class_name == "smt_text3":
+                    self.head4 = text
+
+        self.__depth -= 1
+
+    def data(self, data):
+        self.__text.append(data)
+
+    def close(self):
+        self.__flush_text()
+        self.__flush_section()
+        return self.sections
+
+
 class QualitativeParser(BaseXBRLParser):
     """
     XBRLドキュメントから定性データを解析するためのクラスです。
@@ -18,12 +117,16 @@ class QualitativeParser(BaseXBRLParser):
         data (list): 解析された定性データを含む辞書のリストです。
 
     Methods:
-        smt_head: ドキュメントのHTMLコンテンツから特定のタグを抽出し、それらを構造化された形式で整理します。
+        qualitative_info: 見出しごとの本文を取得します。
+        iter_qualitative_info: 見出しごとの本文を逐次取得します。
 
     Raises:
         ValueError: ドキュメントが定性データでない場合に発生します。
     """
 
+    # ストリーミングで読み込む際のバッファサイズ
+    CHUNK_SIZE = 64 * 1024
+
     def __init__(self, xbrl_url, output_path=None):
         super().__init__(xbrl_url, output_path)
         if self.basename() != "qualitative.htm":
@@ -31,41 +134,52 @@ class QualitativeParser(BaseXBRLParser):
                 f"{self.basename()} はqualitative.htmではありません。"
             )
 
+    @Instrumentation.timed_generator()
+    def iter_qualitative_info(self):
+        """見出しごとの本文を逐次取得する
+
+        文書全体を読み込まず、解析イベントを1度だけ走査して
+        smt_head2/smt_head3/smt_text3の見出しの状態を追跡し、
+        各テキストを1度だけ本文に追加します。
+
+        Yields:
+            dict: xbrl_id, head2, head3, head4, contentを持つ辞書
+        """
+        is_file, file_path = self._is_url_in_local()
+        if is_file is False:
+            file_path = self._fetch_url()
+
+        target = _QualitativeTarget()
+        parser = etree.XMLParser(
+            target=target, recover=True, huge_tree=True
+        )
+
+        with open(file_path, "rb") as f:
+            # 読み取り専用でファイルをロック
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            while True:
+                chunk = f.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                # 確定したセクションから順に出力する
+                while target.sections:
+                    yield self.__with_xbrl_id(target.sections.pop(0))
+
+        for section in parser.close():
+            yield self.__with_xbrl_id(section)
+
+    def __with_xbrl_id(self, section):
+        """セクションに書類のxbrl_idを付与する(書類との結合用)"""
+        return {"xbrl_id": self.xbrl_id, **section}
+
+    @Instrumentation.timed()
     def qualitative_info(self):
-        lists = []
-        tags = self.soup.find_all(True)
-        head2, head3, head4, content = "", "", "", ""
-        class_names = ["smt_head2", "smt_head3", "smt_text3"]
-
-        for tag in tags:
-            if len(tag.get_text(strip=True)) == 0:
-                continue
-
-            tag_class = tag.get("class")
-            text = tag.get_text(strip=True)
-
-            if tag_class in class_names:
-                if head2 != text or head3 != text:
-                    if head2 != "":
-                        lists.append(
-                            {
-                                "head2": head2,
-                                "head3": head3,
-                                "head4": head4,
-                                "content": content,
-                            }
-                        )
-                    content = ""
-                if tag_class == "smt_head2":
-                    head2 = text
-                    head4 = ""
-                elif tag_class == "smt_head3":
-                    head3 = text
-                elif tag_class == "smt_text3":
-                    head4 = text
-            else:
-                content += text
-
-        self.data = lists
+        """見出しごとの本文を取得する
+
+        returns:
+            self: QualitativeParser
+        """
+        self.data = list(self.iter_qualitative_info())
 
         return self
@@ -1,5 +1,10 @@
+import fcntl
+
+from lxml import etree
+
 from app.exception import TypeOfXBRLIsDifferent
 from app.tag import SchemaElement, SchemaImport, SchemaLinkBaseRef
+from app.utils import Instrumentation
 
 from . import BaseXBRLParser
 
@@ -15,6 +20,7 @@ class SchemaParser(BaseXBRLParser):
         import_schemas: importタグの情報を取得する
         link_base_refs: linkbaseRefタグの情報を取得する
         elements: elementタグの情報を取得する
+        prescan: linkbaseRefタグのみを先頭から読み込む
 
     Examples:
         >>> from PyXBRLTools.xbrl_manager.schema_manager import SchemaManager
@@ -22,8 +28,12 @@ class SchemaParser(BaseXBRLParser):
         >>> schema_manager.parser.import_schemas()
         >>> schema_manager.parser.link_base_refs()
         >>> schema_manager.parser.elements()
+        >>> SchemaParser.prescan("path/to/schema_file.xsd").to_DataFrame()
     """
 
+    XSD_NS = "http://www.w3.org/2001/XMLSchema"
+    XLINK_NS = "http://www.w3.org/1999/xlink"
+
     def __init__(self, xbrl_url, output_path=None):
         super().__init__(xbrl_url, output_path)
 
@@ -33,6 +43,64 @@ class SchemaParser(BaseXBRLParser):
                 f"{self.basename()} は[.xsd]ではありません。"
             )
 
+        self._prescan_link_base_refs = None
+
+    @classmethod
+    @Instrumentation.timed()
+    def prescan(cls, xbrl_url, output_path=None):
+        """linkbaseRefタグのみを読み込んだインスタンスを生成する
+
+        スキーマ全体を解析せず、ファイルを先頭からストリーミングで読み込み、
+        xsd:annotationの終了時、または最初のxsd:elementの出現時に
+        読み込みを終了します。
+
+        Args:
+            xbrl_url (str): スキーマファイルのパスまたはURL
+            output_path (str, optional): ファイルの保存先
+
+        Returns:
+            SchemaParser: link_base_refsの結果を保持したインスタンス
+        """
+        instance = cls(xbrl_url, output_path)
+        is_file, file_path = instance._is_url_in_local()
+        if is_file is False:
+            file_path = instance._fetch_url()
+        instance._prescan_link_base_refs = instance._scan_link_base_refs(
+            file_path
+        )
+        return instance.link_base_refs()
+
+    def _scan_link_base_refs(self, file_path):
+        """スキーマの先頭からlinkbaseRefタグを読み込む"""
+        annotation = f"{{{self.XSD_NS}}}annotation"
+        element = f"{{{self.XSD_NS}}}element"
+
+        lists = []
+        with open(file_path, "rb") as f:
+            # 読み取り専用でファイルをロック
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            for event, elem in etree.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == element:
+                        break
+                    continue
+                if elem.tag == annotation:
+                    break
+                if etree.QName(elem).localname != "linkbaseRef":
+                    continue
+
+                slb = SchemaLinkBaseRef(
+                    xlink_type=elem.get(f"{{{self.XLINK_NS}}}type"),
+                    xlink_href=elem.get(f"{{{self.XLINK_NS}}}href"),
+                    xlink_role=elem.get(f"{{{self.XLINK_NS}}}role"),
+                    xlink_arcrole=elem.get(f"{{{self.XLINK_NS}}}arcrole"),
+                    document_type=self.document_type,
+                )
+                lists.append(slb.__dict__)
+
+        return lists
+
+    @Instrumentation.timed()
     def import_schemas(self):
         lists = []
 
@@ -51,7 +119,12 @@ class SchemaParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def link_base_refs(self):
+        if self.soup is None and self._prescan_link_base_refs is not None:
+            self.data = self._prescan_link_base_refs
+            return self
+
         lists = []
 
         tags = self.soup.find_all(name="linkbaseRef")
@@ -71,6 +144,7 @@ class SchemaParser(BaseXBRLParser):
 
         return self
 
+    @Instrumentation.timed()
     def elements(self):
         lists = []
 
@@ -0,0 +1,4 @@
+from .full_text_index import FullTextIndex
+from .minhash import MinHash, NearDuplicateIndex
+
+__all__ = ["FullTextIndex", "MinHash", "NearDuplicateIndex"]
@@ -0,0 +1,507 @@
+import json
+import math
+import os
+import shutil
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+
+class FullTextIndex:
+    """定性情報の見出しごとの本文を検索する全文検索インデックス
+
+    QualitativeParserの出力(head2, head3, head4, content)を1つの
+    セクションとして、文字のバイグラムで転置インデックスを作成し、
+    ディレクトリに保存します。空白や見出しの境界に挟まれてバイグラムに
+    含まれない1文字は、その文字(ユニグラム)で登録します。
+
+    * 書類ごとに追加し、commitでセグメントとして追記します。
+    * セグメントごとの書類のIDはmanifest.jsonに保持し、置き換える
+      書類の判定にポスティングリストを読み込みません。
+    * 書類数が同程度のセグメントがMERGE_FACTOR個並んだ場合は
+      1つに統合するため、セグメント数は書類数の対数程度に保たれます。
+    * ポスティングリスト(セクション番号と出現位置)は差分符号化した
+      配列で保存します。
+    * 空白で区切った語句はフレーズとして一致を判定し、
+      複数の語句はAND検索となります。
+
+    Examples:
+        >>> index = FullTextIndex("path/to/index")
+        >>> index.add(xbrl_id, manager.qualitative_infos().to_dict())
+        >>> index.commit()
+        >>> index.search("経営成績 増加")
+        [("xbrl_id", 1), ...]
+    """
+
+    MANIFEST = "manifest.json"
+
+    # 統合するセグメント数(書類数が同程度のセグメントの数)
+    MERGE_FACTOR = 10
+
+    FIELDS = ["head2", "head3", "head4", "content"]
+
+    def __init__(self, index_dir) -> None:
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        manifest = self.index_dir / self.MANIFEST
+        if manifest.exists():
+            with open(manifest, "r", encoding="utf-8") as f:
+                self.__manifest = json.load(f)
+        else:
+            self.__manifest = {"segments": [], "deleted": {}}
+        self.__manifest.setdefault("xbrl_ids", {})
+
+        self.__segments = {}
+        self.__documents = {}
+        self.__pending = []
+
+    @staticmethod
+    def normalize(text):
+        """検索用に文字列を正規化する(NFKC、小文字化)"""
+        return unicodedata.normalize("NFKC", str(text or "")).lower()
+
+    @classmethod
+    def bigrams(cls, text):
+        """文字のバイグラムと出現位置を取得する
+
+        空白を含むバイグラムは除外しますが、出現位置は元の文字列の
+        位置のため、フレーズの判定は空白を挟んで連続しません。
+
+        Returns:
+            list[tuple[str, int]]: バイグラムと出現位置
+        """
+        return [
+            (text[i : i + 2], i)
+            for i in range(len(text) - 1)
+            if not (text[i].isspace() or text[i + 1].isspace())
+        ]
+
+    @classmethod
+    def terms(cls, text):
+        """インデックスに登録する語と出現位置を取得する
+
+        バイグラムに加えて、前後が空白(文字列の先頭・末尾を含む)の
+        1文字をユニグラムとして登録します。1文字の検索はその文字を
+        含む語で判定するため、どのバイグラムにも含まれない文字も
+        検索できます。
+
+        Returns:
+            list[tuple[str, int]]: 語と出現位置
+        """
+        terms = cls.bigrams(text)
+        for i, char in enumerate(text):
+            if char.isspace():
+                continue
+            if (i == 0 or text[i - 1].isspace()) and (
+                i == len(text) - 1 or text[i + 1].isspace()
+            ):
+                terms.append((char, i))
+        return terms
+
+    @classmethod
+    def section_text(cls, section: dict):
+        """セクションの見出しと本文を1つの文字列にする"""
+        return cls.normalize(
+            "\n".join(
+                str(section.get(field) or "") for field in cls.FIELDS
+            )
+        )
+
+    def add(self, xbrl_id, sections):
+        """書類のセクションを追加する
+
+        同じxbrl_idが既に登録されている場合は、commit時に置き換えます
+        (commit前に同じxbrl_idを複数回追加した場合は最後の追加が有効)。
+
+        Args:
+            xbrl_id (str): 書類のID
+            sections (list[dict]): qualitative_infoの出力
+        """
+        self.__pending.append((str(xbrl_id), list(sections)))
+        return self
+
+    def commit(self):
+        """追加した書類を新しいセグメントとして保存する"""
+        if len(self.__pending) == 0:
+            return self
+
+        # 同じxbrl_idは最後に追加したセクションのみ登録する
+        pending = {}
+        for xbrl_id, sections in self.__pending:
+            pending.pop(xbrl_id, None)
+            pending[xbrl_id] = sections
+        self.__pending = []
+
+        documents, terms, docs, positions = [], [], [], []
+        for xbrl_id, sections in pending.items():
+            for number, section in enumerate(sections):
+                doc = len(documents)
+                documents.append(
+                    [xbrl_id, number]
+                    + [section.get(field) for field in self.FIELDS[:3]]
+                )
+                grams = self.terms(self.section_text(section))
+                terms.extend(term for term, _ in grams)
+                positions.extend(position for _, position in grams)
+                docs.extend([doc] * len(grams))
+
+        name = self.__next_name()
+        self.__write_segment(name, documents, terms, docs, positions)
+        self.__mark_deleted(set(pending))
+        self.__manifest["segments"].append(name)
+        self.__manifest["xbrl_ids"][name] = sorted(pending)
+        self.__write_manifest()
+
+        self.__compact()
+        return self
+
+    def merge(self):
+        """全てのセグメントを1つに統合する
+
+        置き換え済みの書類を除き、ポスティングリストを作り直します。
+        """
+        if len(self.__manifest["segments"]) > 1:
+            self.__merge(list(self.__manifest["segments"]))
+        return self
+
+    def __next_name(self):
+        number = self.__manifest.get(
+            "next_segment", len(self.__manifest["segments"])
+        )
+        self.__manifest["next_segment"] = number + 1
+        return f"segment-{number:06d}"
+
+    def __mark_deleted(self, xbrl_ids):
+        """既存のセグメントの同じ書類を削除扱いにする"""
+        for segment in self.__manifest["segments"]:
+            replaced = xbrl_ids & set(self.__segment_ids(segment))
+            if replaced:
+                deleted = set(self.__manifest["deleted"].get(segment, []))
+                self.__manifest["deleted"][segment] = sorted(
+                    deleted | replaced
+                )
+
+    def __segment_ids(self, name):
+        """セグメントに登録した書類のIDを取得する"""
+        ids = self.__manifest["xbrl_ids"].get(name)
+        if ids is None:
+            # 書類のIDを保持する前に作成したセグメント
+            ids = sorted({doc[0] for doc in self.__load_documents(name)})
+            self.__manifest["xbrl_ids"][name] = ids
+        return ids
+
+    def __live_ids(self, name):
+        deleted = set(self.__manifest["deleted"].get(name, []))
+        return [i for i in self.__segment_ids(name) if i not in deleted]
+
+    def __level(self, name):
+        """セグメントの書類数の段階(MERGE_FACTORを底とした対数)"""
+        count = max(1, len(self.__live_ids(name)))
+        return int(math.log(count, self.MERGE_FACTOR) + 1e-9)
+
+    def __compact(self):
+        """末尾の書類数が同程度のセグメントを統合する"""
+        while True:
+            segments = self.__manifest["segments"]
+            if len(segments) < self.MERGE_FACTOR:
+                return
+            tail = segments[-self.MERGE_FACTOR :]
+            if len({self.__level(name) for name in tail}) != 1:
+                return
+            self.__merge(tail)
+
+    def __merge(self, names):
+        """末尾のセグメントを1つに統合する"""
+        documents, terms, docs, positions = [], [], [], []
+        xbrl_ids = []
+        for name in names:
+            segment = self.__load(name)
+            deleted = set(self.__manifest["deleted"].get(name, []))
+            xbrl_ids += self.__live_ids(name)
+
+            # 置き換え済みの書類を除き、セクション番号を振り直す
+            keep = np.array(
+                [doc[0] not in deleted for doc in segment["documents"]],
+                dtype=bool,
+            )
+            mapping = np.cumsum(keep) - 1 + len(documents)
+            documents += [
+                doc
+                for doc, kept in zip(segment["documents"], keep)
+                if kept
+            ]
+
+            # (語, セクション, 出現位置)の組に戻す
+            entry_terms = np.repeat(
+                np.arange(len(segment["terms"])),
+                np.diff(segment["term_ptr"]),
+            )
+            occurrences = np.repeat(
+                np.arange(len(segment["docs"])),
+                np.diff(segment["pos_ptr"]),
+            )
+            occurrence_docs = segment["docs"][occurrences]
+            mask = keep[occurrence_docs]
+            terms.append(segment["terms"][entry_terms[occurrences[mask]]])
+            docs.append(mapping[occurrence_docs[mask]])
+            positions.append(segment["positions"][mask])
+
+        name = self.__next_name()
+        self.__write_segment(
+            name,
+            documents,
+            np.concatenate(terms) if terms else [],
+            np.concatenate(docs) if docs else [],
+            np.concatenate(positions) if positions else [],
+        )
+        merged = set(names)
+        self.__manifest["segments"] = [
+            segment
+            for segment in self.__manifest["segments"]
+            if segment not in merged
+        ] + [name]
+        self.__manifest["xbrl_ids"][name] = sorted(xbrl_ids)
+        for segment in names:
+            self.__manifest["deleted"].pop(segment, None)
+            self.__manifest["xbrl_ids"].pop(segment, None)
+            self.__segments.pop(segment, None)
+            self.__documents.pop(segment, None)
+        self.__write_manifest()
+
+        # マニフェストを更新した後に統合前のセグメントを削除する
+        for segment in names:
+            shutil.rmtree(self.index_dir / segment, ignore_errors=True)
+
+    def __write_segment(self, name, documents, terms, docs, positions):
+        """セグメントを保存する
+
+        (語, セクション番号, 出現位置)の組を並べ替え、語ごとの
+        セクション番号と、(語, セクション)ごとの出現位置を
+        それぞれ差分符号化して保存します。
+        """
+        terms, inverse = np.unique(
+            np.array(terms, dtype=str), return_inverse=True
+        )
+        docs = np.array(docs, dtype=np.int64)
+        positions = np.array(positions, dtype=np.int64)
+
+        order = np.lexsort((positions, docs, inverse))
+        inverse, docs, positions = (
+            inverse[order],
+            docs[order],
+            positions[order],
+        )
+
+        # (語, セクション)ごとの出現位置
+        is_entry = np.ones(len(docs), dtype=bool)
+        is_entry[1:] = (inverse[1:] != inverse[:-1]) | (
+            docs[1:] != docs[:-1]
+        )
+        entries = np.flatnonzero(is_entry)
+        pos_ptr = np.append(entries, len(positions))
+        pos_deltas = positions - np.where(
+            is_entry, 0, np.concatenate([[0], positions[:-1]])
+        )
+
+        # 語ごとのセクション番号
+        entry_terms, entry_docs = inverse[entries], docs[entries]
+        term_ptr = np.searchsorted(entry_terms, np.arange(len(terms) + 1))
+        is_first = np.ones(len(entries), dtype=bool)
+        is_first[1:] = entry_terms[1:] != entry_terms[:-1]
+        doc_deltas = entry_docs - np.where(
+            is_first, 0, np.concatenate([[0], entry_docs[:-1]])
+        )
+
+        segment_dir = self.index_dir / name
+        segment_dir.mkdir(parents=True, exist_ok=True)
+        with open(
+            segment_dir / "documents.json", "w", encoding="utf-8"
+        ) as f:
+            json.dump(documents, f, ensure_ascii=False)
+        np.savez_compressed(
+            segment_dir / "postings.npz",
+            terms=terms,
+            term_ptr=term_ptr.astype(np.int64),
+            doc_deltas=doc_deltas.astype(np.uint32),
+            pos_ptr=pos_ptr.astype(np.int64),
+            pos_deltas=pos_deltas.astype(np.uint32),
+        )
+
+    def __write_manifest(self):
+        path = self.index_dir / self.MANIFEST
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.__manifest, f)
+        os.replace(tmp_path, path)
+
+    def __load_documents(self, name):
+        """セグメントのセクションの一覧を読み込む(初回のみ)"""
+        documents = self.__documents.get(name)
+        if documents is None:
+            with open(
+                self.index_dir / name / "documents.json", encoding="utf-8"
+            ) as f:
+                documents = json.load(f)
+            self.__documents[name] = documents
+        return documents
+
+    def __load(self, name):
+        """セグメントを読み込む(初回のみ)"""
+        segment = self.__segments.get(name)
+        if segment is None:
+            segment_dir = self.index_dir / name
+            documents = self.__load_documents(name)
+            with np.load(segment_dir / "postings.npz") as npz:
+                segment = {key: npz[key] for key in npz.files}
+            # 差分符号化した配列を復号して保持する
+            segment["docs"] = self.__decode(
+                segment.pop("doc_deltas"), segment["term_ptr"]
+            )
+            segment["positions"] = self.__decode(
+                segment.pop("pos_deltas"), segment["pos_ptr"]
+            )
+            segment["documents"] = documents
+            self.__segments[name] = segment
+        return segment
+
+    @staticmethod
+    def __decode(deltas, ptr):
+        """区間(ptr)ごとに差分符号化した配列を復号する"""
+        values = np.cumsum(deltas, dtype=np.int64)
+        sizes = np.diff(ptr)
+        starts = ptr[:-1]
+        base = np.where(starts > 0, values[np.maximum(starts - 1, 0)], 0)
+        return values - np.repeat(base, sizes)
+
+    @staticmethod
+    def __postings(segment, term):
+        """語のポスティングリストを取得する
+
+        Returns:
+            tuple[np.ndarray, int]: セクション番号と、先頭の
+                (語, セクション)の索引
+        """
+        terms = segment["terms"]
+        index = np.searchsorted(terms, term)
+        if index >= len(terms) or terms[index] != term:
+            return np.empty(0, dtype=np.int64), 0
+        start, end = segment["term_ptr"][index : index + 2]
+        return segment["docs"][start:end], start
+
+    @staticmethod
+    def __gather(segment, entries):
+        """(語, セクション)ごとの出現位置をまとめて取得する"""
+        starts = segment["pos_ptr"][entries]
+        sizes = segment["pos_ptr"][entries + 1] - starts
+        offsets = np.arange(sizes.sum()) - np.repeat(
+            np.cumsum(sizes) - sizes, sizes
+        )
+        return (
+            segment["positions"][np.repeat(starts, sizes) + offsets],
+            sizes,
+        )
+
+    def __match_phrase(self, segment, phrase):
+        """フレーズを含むセクション番号を取得する"""
+        if len(phrase) == 1:
+            # 1文字の場合はその文字を含む語(バイグラムとユニグラム)で判定する
+            terms = segment["terms"]
+            if len(terms) == 0:
+                return np.empty(0, dtype=np.int64)
+            docs = [
+                self.__postings(segment, term)[0]
+                for term in terms[np.char.find(terms, phrase) >= 0]
+            ]
+            if len(docs) == 0:
+                return np.empty(0, dtype=np.int64)
+            return np.unique(np.concatenate(docs))
+
+        grams = self.bigrams(phrase)
+        if len(grams) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        postings = [
+            (offset, *self.__postings(segment, term))
+            for term, offset in grams
+        ]
+        # 出現するセクションの少ない語から絞り込む
+        postings.sort(key=lambda posting: len(posting[1]))
+        docs = postings[0][1]
+        for _, other, _ in postings[1:]:
+            docs = np.intersect1d(docs, other, assume_unique=True)
+            if len(docs) == 0:
+                return docs
+
+        # (セクション, フレーズの開始位置)が全てのバイグラムで一致するか判定する
+        keys = None
+        for offset, posting_docs, start in postings:
+            entries = start + np.searchsorted(posting_docs, docs)
+            positions, sizes = self.__gather(segment, entries)
+            values = (np.repeat(docs, sizes) << 32) + (positions - offset)
+            keys = values if keys is None else np.intersect1d(keys, values)
+            if len(keys) == 0:
+                break
+        return np.unique(keys >> 32)
+
+    def search(self, query):
+        """語句を全て含むセクションを検索する
+
+        Args:
+            query (str): 空白区切りの語句(各語句はフレーズとして判定)
+
+        Returns:
+            list[tuple[str, int]]: (xbrl_id, セクション番号)のリスト
+        """
+        phrases = self.normalize(query).split()
+        if len(phrases) == 0:
+            return []
+
+        hits = []
+        for name in self.__manifest["segments"]:
+            segment = self.__load(name)
+            deleted = set(self.__manifest["deleted"].get(name, []))
+
+            docs = None
+            for phrase in phrases:
+                matched = self.__match_phrase(segment, phrase)
+                docs = (
+                    matched
+                    if docs is None
+                    else np.intersect1d(docs, matched, assume_unique=True)
+                )
+                if len(docs) == 0:
+                    break
+
+            for doc in docs:
+                xbrl_id, number = segment["documents"][doc][:2]
+                if xbrl_id not in deleted:
+                    hits.append((xbrl_id, number))
+        return hits
+
+    def document(self, xbrl_id, section):
+        """セクションの見出しを取得する
+
+        Returns:
+            dict: xbrl_id, section, head2, head3, head4を持つ辞書
+        """
+        for name in reversed(self.__manifest["segments"]):
+            if xbrl_id in self.__manifest["deleted"].get(name, []):
+                continue
+            for document in self.__load_documents(name):
+                if document[0] == xbrl_id and document[1] == section:
+                    return dict(
+                        zip(
+                            ["xbrl_id", "section", *self.FIELDS[:3]],
+                            document,
+                        )
+                    )
+        return None
+
+    def xbrl_ids(self):
+        """登録されている書類のIDの一覧"""
+        result = set()
+        for name in self.__manifest["segments"]:
+            result |= set(self.__live_ids(name))
+        return sorted(result)
@@ -0,0 +1,355 @@
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from pandas import DataFrame
+
+from .full_text_index import FullTextIndex
+
+
+class MinHash:
+    """文字のシングルからMinHashの署名を計算するクラス
+
+    Args:
+        num_perm (int): ハッシュ関数(署名の長さ)の数
+        shingle_size (int): シングルの文字数
+        seed (int): ハッシュ関数の乱数のシード
+    """
+
+    # ハッシュ関数の法(メルセンヌ素数 2^31-1)
+    PRIME = (1 << 31) - 1
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1) -> None:
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self.__a = rng.integers(1, self.PRIME, num_perm, dtype=np.uint64)
+        self.__b = rng.integers(0, self.PRIME, num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        """正規化した文字列のシングルの集合を取得する"""
+        text = "".join(FullTextIndex.normalize(text).split())
+        size = self.shingle_size
+        if len(text) <= size:
+            return {text} if text else set()
+        return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+    def signature(self, text):
+        """文字列のMinHashの署名を計算する
+
+        Returns:
+            np.ndarray: 長さnum_permの署名(シングルがない場合は全て最大値)
+        """
+        signature = np.full(self.num_perm, self.PRIME, dtype=np.uint64)
+        hashes = np.fromiter(
+            (
+                zlib.crc32(shingle.encode())
+                for shingle in self.shingles(text)
+            ),
+            dtype=np.uint64,
+        )
+        hashes %= np.uint64(self.PRIME)
+        # 長い文字列でメモリを使いすぎないよう分割して計算する
+        for start in range(0, len(hashes), 4096):
+            chunk = hashes[start : start + 4096, None]
+            values = (chunk * self.__a + self.__b) % np.uint64(self.PRIME)
+            np.minimum(signature, values.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    @staticmethod
+    def similarity(signature, other):
+        """2つの署名からJaccard係数を推定する"""
+        return float(np.mean(signature == other))
+
+
+class NearDuplicateIndex:
+    """定性情報のセクションの重複に近い文章を検出するクラス
+
+    セクションの本文のMinHashの署名をLSHのバンドごとにバケットへ
+    分類し、同じバケットに入った候補のみを比較することで、
+    全ての組み合わせを比較せずに重複に近いセクションを検出します。
+
+    Args:
+        bands (int): LSHのバンドの数
+        rows (int): 1バンドあたりの署名の行数
+        shingle_size (int): シングルの文字数
+        seed (int): ハッシュ関数の乱数のシード
+
+    Examples:
+        >>> index = NearDuplicateIndex()
+        >>> index.add(xbrl_id, manager.qualitative_infos().to_dict())
+        >>> index.clusters(threshold=0.8)
+        >>> index.changed_sections(previous_xbrl_id, xbrl_id)
+    """
+
+    COLUMNS = ["xbrl_id", "section", "head2", "head3", "head4"]
+
+    def __init__(self, bands=32, rows=4, shingle_size=5, seed=1) -> None:
+        self.bands = bands
+        self.rows = rows
+        self.hasher = MinHash(bands * rows, shingle_size, seed)
+
+        self.__sections = []
+        self.__signatures = []
+        self.__buckets = defaultdict(list)
+        self.__by_xbrl_id = defaultdict(list)
+        self.__removed = 0
+
+    def __len__(self):
+        return len(self.__sections) - self.__removed
+
+    def signatures(self, sections):
+        """セクションの本文の署名を計算する
+
+        Returns:
+            np.ndarray: (セクション数, num_perm)の署名の行列
+        """
+        return np.array(
+            [
+                self.hasher.signature(section.get("content") or "")
+                for section in sections
+            ],
+            dtype=np.uint32,
+        ).reshape(-1, self.hasher.num_perm)
+
+    def add(self, xbrl_id, sections, signatures=None):
+        """書類のセクションを追加する
+
+        本文を持たないセクションは対象外とします。追加済みの書類の
+        場合は、既存のセクションを置き換えます。
+
+        Args:
+            xbrl_id (str): 書類のID
+            sections (list[dict]): qualitative_infoの出力
+            signatures (np.ndarray, optional): 計算済みの署名
+        """
+        sections = list(sections)
+        if signatures is None:
+            signatures = self.signatures(sections)
+
+        targets, target_signatures = [], []
+        for number, (section, signature) in enumerate(
+            zip(sections, signatures)
+        ):
+            if not section.get("content"):
+                continue
+            targets.append(
+                {
+                    "section": section.get("section", number),
+                    **{
+                        head: section.get(head)
+                        for head in self.COLUMNS[2:]
+                    },
+                }
+            )
+            target_signatures.append(signature)
+        return self._add_signatures(xbrl_id, targets, target_signatures)
+
+    def _add_signatures(self, xbrl_id, sections, signatures):
+        """セクションの見出しと署名を登録する(本文の有無は判定しない)
+
+        追加済みの書類の場合は、既存のセクションを置き換えます。
+
+        Args:
+            xbrl_id (str): 書類のID
+            sections (list[dict]): section, head2, head3, head4を持つ辞書
+            signatures (np.ndarray): セクションの署名
+        """
+        self.remove(xbrl_id)
+        for section, signature in zip(sections, signatures):
+            key = len(self.__sections)
+            self.__sections.append(
+                [xbrl_id, section["section"]]
+                + [section.get(head) for head in self.COLUMNS[2:]]
+            )
+            self.__signatures.append(signature)
+            self.__by_xbrl_id[xbrl_id].append(key)
+            for band in self.__bands(signature):
+                self.__buckets[band].append(key)
+        return self
+
+    def remove(self, xbrl_id):
+        """書類のセクションを削除する
+
+        Args:
+            xbrl_id (str): 書類のID
+        """
+        for key in self.__by_xbrl_id.pop(xbrl_id, []):
+            for band in self.__bands(self.__signatures[key]):
+                keys = self.__buckets[band]
+                keys.remove(key)
+                if not keys:
+                    del self.__buckets[band]
+            # 連番を維持するため、セクションの位置は残す
+            self.__sections[key] = None
+            self.__removed += 1
+        return self
+
+    def __bands(self, signature):
+        """署名をバンドに分割したバケットのキー"""
+        rows = self.rows
+        return [
+            (band, signature[band * rows : (band + 1) * rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def clusters(self, threshold=0.8):
+        """重複に近いセクションのクラスタを取得する
+
+        Args:
+            threshold (float): 同一とみなす推定Jaccard係数の下限
+
+        Returns:
+            DataFrame: 2件以上のセクションを含むクラスタの一覧
+        """
+        parent = list(range(len(self.__sections)))
+
+        def find(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        # バケットの全ての組み合わせを比較すると、同じ文章が多い場合に
+        # 2乗の計算量となるため、バケットの先頭のセクションとのみ比較する
+        for keys in self.__buckets.values():
+            head = keys[0]
+            for key in keys[1:]:
+                if find(key) == find(head):
+                    continue
+                similarity = MinHash.similarity(
+                    self.__signatures[head], self.__signatures[key]
+                )
+                if similarity >= threshold:
+                    parent[find(key)] = find(head)
+
+        members = defaultdict(list)
+        for key, section in enumerate(self.__sections):
+            if section is not None:
+                members[find(key)].append(key)
+
+        rows = []
+        clusters = [keys for keys in members.values() if len(keys) > 1]
+        for cluster, keys in enumerate(sorted(clusters)):
+            for key in keys:
+                rows.append([cluster] + self.__sections[key])
+        return DataFrame(rows, columns=["cluster"] + self.COLUMNS)
+
+    def changed_sections(self, previous_xbrl_id, xbrl_id, threshold=0.8):
+        """前回の書類から変更されたセクションを取得する
+
+        各セクションについて、前回の書類のセクションのうちLSHの候補と
+        なったものとの推定Jaccard係数の最大値を求め、閾値未満のものを
+        変更ありとします。
+
+        Returns:
+            DataFrame: セクションごとの類似度(similarity)と
+                変更の有無(changed)
+        """
+        previous = set(self.__by_xbrl_id.get(previous_xbrl_id, []))
+        rows = []
+        for key in self.__by_xbrl_id.get(xbrl_id, []):
+            signature = self.__signatures[key]
+            candidates = {
+                other
+                for band in self.__bands(signature)
+                for other in self.__buckets[band]
+                if other in previous
+            }
+            similarity = max(
+                (
+                    MinHash.similarity(signature, self.__signatures[other])
+                    for other in candidates
+                ),
+                default=0.0,
+            )
+            rows.append(
+                self.__sections[key] + [similarity, similarity < threshold]
+            )
+        return DataFrame(
+            rows, columns=self.COLUMNS + ["similarity", "changed"]
+        )
+
+    def save(self, xbrl_id, path):
+        """書類のセクションの署名を保存する
+
+        Args:
+            xbrl_id (str): 書類のID
+            path (str): 保存先のファイル(.npz)
+        """
+        keys = self.__by_xbrl_id.get(xbrl_id, [])
+        sections = [self.__sections[key] for key in keys]
+        np.savez_compressed(
+            path,
+            signatures=np.array(
+                [self.__signatures[key] for key in keys], dtype=np.uint32
+            ).reshape(-1, self.hasher.num_perm),
+            sections=np.array(
+                [
+                    ["" if value is None else str(value) for value in row]
+                    for row in sections
+                ],
+                dtype=str,
+            ).reshape(-1, len(self.COLUMNS)),
+            # 見出しがない(None)値の位置
+            missing=np.array(
+                [[value is None for value in row] for row in sections],
+                dtype=bool,
+            ).reshape(-1, len(self.COLUMNS)),
+            params=np.array(
+                [
+                    self.bands,
+                    self.rows,
+                    self.hasher.shingle_size,
+                    self.hasher.seed,
+                ]
+            ),
+        )
+
+    def load(self, path):
+        """保存した書類のセクションの署名を追加する
+
+        追加済みの書類の場合は、既存のセクションを置き換えます。
+
+        Raises:
+            ValueError: 署名の計算条件が異なる場合に発生します。
+        """
+        with np.load(path) as npz:
+            params = npz["params"].tolist()
+            signatures = npz["signatures"]
+            sections = npz["sections"].astype(object)
+            if "missing" in npz:
+                sections[npz["missing"]] = None
+            else:
+                # 位置を保存していないファイルは空の見出しをNoneとする
+                sections[sections == ""] = None
+
+        expected = [
+            self.bands,
+            self.rows,
+            self.hasher.shingle_size,
+            self.hasher.seed,
+        ]
+        if params != expected:
+            raise ValueError(
+                f"署名の計算条件が異なります。{params} != {expected}"
+            )
+
+        documents = defaultdict(lambda: ([], []))
+        for row, signature in zip(sections, signatures):
+            xbrl_id, number, head2, head3, head4 = row.tolist()
+            targets, target_signatures = documents[xbrl_id]
+            targets.append(
+                {
+                    "section": int(number),
+                    "head2": head2,
+                    "head3": head3,
+                    "head4": head4,
+                }
+            )
+            target_signatures.append(signature)
+        for xbrl_id, (targets, target_signatures) in documents.items():
+            self._add_signatures(xbrl_id, targets, target_signatures)
+        return self
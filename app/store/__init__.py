@@ -0,0 +1,4 @@
+from .encoding import DictionaryEncoder, StringDictionary
+from .fact_store import FactStore
+
+__all__ = ["DictionaryEncoder", "FactStore", "StringDictionary"]
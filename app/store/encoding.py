@@ -0,0 +1,272 @@
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+
+class StringDictionary:
+    """文字列と整数のコードを対応付ける辞書
+
+    コードは追加した順の連番で、追加のみのため一度割り当てたコードは
+    変わりません。複数のDataFrameで共有することで、同じ文字列は常に
+    同じコードになります。欠損値のコードは-1です。
+
+    Examples:
+        >>> dictionary = StringDictionary(["tse-ed-t_NetSales"])
+        >>> dictionary.encode(["tse-ed-t_NetSales", None, "x"])
+        array([ 0, -1,  1], dtype=int32)
+        >>> dictionary.decode([0, -1, 1])
+        array(['tse-ed-t_NetSales', None, 'x'], dtype=object)
+    """
+
+    def __init__(self, values=()) -> None:
+        self.__lock = threading.Lock()
+        self.__values = []
+        self.__codes = {}
+        self.__categories = None
+        self.add(values)
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __contains__(self, value):
+        return value in self.__codes
+
+    @property
+    def values(self):
+        """登録済みの文字列の一覧(コード順)"""
+        return list(self.__values)
+
+    @property
+    def categories(self):
+        """カテゴリ型のカテゴリ(コード順のIndex、追加時のみ再作成)"""
+        categories = self.__categories
+        if categories is None or len(categories) != len(self.__values):
+            categories = pd.Index(self.__values, dtype=object)
+            self.__categories = categories
+        return categories
+
+    def add(self, values):
+        """未登録の文字列を追加する(欠損値は追加しない)"""
+        with self.__lock:
+            for value in pd.unique(pd.Series(values, dtype=object)):
+                if pd.isna(value):
+                    continue
+                if value not in self.__codes:
+                    self.__codes[value] = len(self.__values)
+                    self.__values.append(value)
+        return self
+
+    def encode(self, values):
+        """文字列をコードに変換する(未登録の文字列は追加する)
+
+        Returns:
+            ndarray: int32のコード(欠損値は-1)
+        """
+        series = pd.Series(values, dtype=object)
+        self.add(series)
+        codes = series.map(self.__codes)
+        return codes.fillna(-1).to_numpy(dtype=np.int32)
+
+    def decode(self, codes):
+        """コードを文字列に変換する(-1は欠損値)
+
+        Returns:
+            ndarray: 文字列(object)
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        values = np.empty(len(self) + 1, dtype=object)
+        values[:-1] = self.__values
+        values[-1] = None
+        # -1は末尾のNoneを参照する
+        return values[np.where(codes < 0, len(self), codes)]
+
+    def to_frame(self):
+        """コードと文字列の一覧(辞書のテーブル)を取得する"""
+        return DataFrame(
+            {
+                "code": np.arange(len(self), dtype=np.int32),
+                "value": self.values,
+            }
+        )
+
+
+class DictionaryEncoder:
+    """繰り返しの多い文字列の列を共有の辞書で符号化するクラス
+
+    xbrl_id、要素名、コンテキスト等の列を、共有の辞書
+    (StringDictionary)を使用してカテゴリ型または整数のコードに変換し、
+    必要に応じて元の文字列に戻します。
+
+    * filing: xbrl_id
+    * concept: 要素名(name, xlink_href)
+    * context: コンテキスト(context_ref, context_period, ...)
+    * その他の列: 列名ごとの辞書
+
+    カテゴリ型のカテゴリは辞書全体のため、同じエンコーダーで
+    変換したDataFrameはカテゴリ型のまま結合でき、コードは辞書の
+    コードと一致します。
+
+    Examples:
+        >>> encoder = DictionaryEncoder()
+        >>> encoded = encoder.encode(df)
+        >>> codes = encoder.encode(df, codes=True)
+        >>> encoder.decode(codes).equals(encoder.decode(encoded))
+        True
+        >>> encoder.save("path/to/dictionaries.json")
+    """
+
+    # 列名: 辞書名
+    DICTIONARIES = {
+        "xbrl_id": "filing",
+        "name": "concept",
+        "xlink_href": "concept",
+        "context_ref": "context",
+        "context_period": "context",
+        "context_entity": "context",
+        "context_category": "context",
+    }
+
+    # 既定で符号化する列
+    COLUMNS = [
+        "xbrl_id",
+        "name",
+        "xlink_href",
+        "context_ref",
+        "context_period",
+        "context_entity",
+        "context_category",
+        "fact_type",
+        "unit_ref",
+        "format",
+        "document_type",
+        "report_type",
+        "xlink_schema",
+        "xlink_role",
+        "xlink_arcrole",
+        "attr_value",
+    ]
+
+    def __init__(self, dictionaries=None) -> None:
+        """
+        Parameters:
+            dictionaries (dict[str, StringDictionary]): 使用する辞書
+        """
+        self.dictionaries = dict(dictionaries or {})
+
+    def dictionary(self, column):
+        """列に対応する辞書を取得する(存在しない場合は作成する)"""
+        name = self.DICTIONARIES.get(column, column)
+        dictionary = self.dictionaries.get(name)
+        if dictionary is None:
+            dictionary = StringDictionary()
+            self.dictionaries[name] = dictionary
+        return dictionary
+
+    def __columns(self, df: DataFrame, columns):
+        columns = self.COLUMNS if columns is None else columns
+        return [column for column in columns if column in df.columns]
+
+    def encode(self, df: DataFrame, columns=None, codes=False):
+        """列を符号化する
+
+        Args:
+            df (DataFrame): 対象のデータ
+            columns (list[str], optional): 符号化する列
+                (省略時はCOLUMNSのうち存在する列)
+            codes (bool): Trueの場合は整数のコード(int32、欠損値は-1)、
+                Falseの場合はカテゴリ型に変換する
+
+        Returns:
+            DataFrame: 符号化したデータ(複製)
+        """
+        df = df.copy()
+        for column in self.__columns(df, columns):
+            dictionary = self.dictionary(column)
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # カテゴリを辞書のコードに対応付ける
+                mapping = dictionary.encode(series.cat.categories)
+                values = np.append(mapping, np.int32(-1))[
+                    series.cat.codes.to_numpy()
+                ]
+            elif pd.api.types.is_integer_dtype(series.dtype):
+                # 符号化済み
+                values = series.to_numpy(dtype=np.int32)
+            else:
+                values = dictionary.encode(series)
+            if codes:
+                df[column] = values
+            else:
+                df[column] = pd.Categorical.from_codes(
+                    values,
+                    dtype=pd.CategoricalDtype(dictionary.categories),
+                )
+        return df
+
+    def decode(self, df: DataFrame, columns=None):
+        """符号化した列を元の文字列に戻す
+
+        Args:
+            df (DataFrame): 符号化したデータ
+            columns (list[str], optional): 戻す列
+                (省略時はCOLUMNSのうち存在する列)
+
+        Returns:
+            DataFrame: 文字列(object)に戻したデータ(複製)
+        """
+        df = df.copy()
+        for column in self.__columns(df, columns):
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes = series.cat.codes.to_numpy()
+                values = np.append(
+                    series.cat.categories.to_numpy(dtype=object), None
+                )[codes]
+            elif pd.api.types.is_integer_dtype(series.dtype):
+                values = self.dictionary(column).decode(series.to_numpy())
+            else:
+                continue
+            df[column] = pd.Series(values, index=df.index, dtype=object)
+        return df
+
+    def to_frames(self):
+        """辞書ごとのコードと文字列の一覧を取得する
+
+        Returns:
+            dict[str, DataFrame]: 辞書名とcode, valueのテーブル
+        """
+        return {
+            name: dictionary.to_frame()
+            for name, dictionary in self.dictionaries.items()
+        }
+
+    def save(self, path):
+        """辞書をJSONで保存する"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    name: dictionary.values
+                    for name, dictionary in self.dictionaries.items()
+                },
+                f,
+                ensure_ascii=False,
+            )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """保存した辞書からエンコーダーを生成する"""
+        with open(path, "r", encoding="utf-8") as f:
+            values = json.load(f)
+        return cls(
+            {
+                name: StringDictionary(dictionary_values)
+                for name, dictionary_values in values.items()
+            }
+        )
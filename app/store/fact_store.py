@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from .encoding import DictionaryEncoder
+
+
+class FactStore:
+    """iXBRLの事実(fact)を列指向で保持するクラス
+
+    IXBRLManagerのget_ix_non_fraction、get_ix_non_numericの出力を
+    列ごとの配列に格納し、要素名・コンテキスト・(要素名, コンテキスト)の
+    ハッシュインデックスを構築します。
+    繰り返しの多い文字列の列は、共有の辞書(DictionaryEncoder)の
+    カテゴリ型で保持します。複数のFactStoreで同じエンコーダーを
+    使用すると、コードが書類間で一致します。
+
+    Properties:
+        data (DataFrame): 列指向の事実データ
+
+    Methods:
+        lookup: 要素名とコンテキストから事実を取得する
+        by_name: 要素名から事実を取得する
+        by_context: コンテキストから事実を取得する
+        by_period: コンテキストの期間から事実を取得する
+        merge: 複数のFactStoreを結合する
+        to_codes: 文字列の列を辞書のコードに変換したデータを取得する
+
+    Examples:
+        >>> store = FactStore.from_manager(IXBRLManager(directory_path))
+        >>> store.lookup("tse-ed-t_NetSales", "CurrentYearDuration_ConsolidatedMember_ResultMember")
+    """
+
+    # 繰り返しの多い文字列の列はカテゴリ型で保持する
+    CATEGORY_COLUMNS = [
+        "xbrl_id",
+        "fact_type",
+        "context_ref",
+        "context_period",
+        "context_entity",
+        "context_category",
+        "name",
+        "unit_ref",
+        "format",
+        "document_type",
+        "report_type",
+    ]
+
+    COLUMNS = CATEGORY_COLUMNS + [
+        "xsi_nil",
+        "decimals",
+        "scale",
+        "numeric",
+        "value",
+    ]
+
+    def __init__(self, data: DataFrame = None, encoder=None) -> None:
+        if data is None:
+            data = DataFrame(columns=self.COLUMNS)
+        self.encoder = encoder or DictionaryEncoder()
+        self.data = self._compact(data)
+        self.__build_index()
+
+    @classmethod
+    def from_records(cls, non_fractions=(), non_numerics=(), encoder=None):
+        """非分数・非数値データのレコードからFactStoreを生成する
+
+        Args:
+            non_fractions (Iterable[list[dict]]): 非分数データ
+            non_numerics (Iterable[list[dict]]): 非数値データ
+            encoder (DictionaryEncoder, optional): 共有のエンコーダー
+
+        Returns:
+            FactStore: 生成したFactStore
+        """
+        frames = []
+        for fact_type, values_list in (
+            ("nonFraction", non_fractions),
+            ("nonNumeric", non_numerics),
+        ):
+            for values in values_list:
+                df = DataFrame(values)
+                if len(df) == 0:
+                    continue
+                df["fact_type"] = fact_type
+                frames.append(df)
+
+        if len(frames) == 0:
+            return cls(encoder=encoder)
+
+        return cls(pd.concat(frames, ignore_index=True), encoder)
+
+    @classmethod
+    def from_manager(cls, manager, document_type=None, encoder=None):
+        """IXBRLManagerからFactStoreを生成する
+
+        Args:
+            manager (IXBRLManager): iXBRLのマネージャー
+            document_type (str, optional): 対象の書類種別
+            encoder (DictionaryEncoder, optional): 共有のエンコーダー
+
+        Returns:
+            FactStore: 生成したFactStore
+        """
+        return cls.from_records(
+            manager.get_ix_non_fraction(document_type),
+            manager.get_ix_non_numeric(document_type),
+            encoder,
+        )
+
+    @classmethod
+    def merge(cls, stores, encoder=None):
+        """複数のFactStoreを結合する
+
+        Args:
+            stores (list[FactStore]): 結合するFactStore
+            encoder (DictionaryEncoder, optional): 結合後のエンコーダー
+                (省略時は先頭のFactStoreのエンコーダー)
+
+        Returns:
+            FactStore: 結合したFactStore
+        """
+        if encoder is None and len(stores) > 0:
+            encoder = stores[0].encoder
+        frames = [store.data for store in stores if len(store) > 0]
+        if len(frames) == 0:
+            return cls(encoder=encoder)
+        # カテゴリを共有の辞書全体にそろえ、カテゴリ型のまま結合する
+        frames = [
+            encoder.encode(df, cls.CATEGORY_COLUMNS) for df in frames
+        ]
+        return cls(pd.concat(frames, ignore_index=True), encoder)
+
+    def _compact(self, data: DataFrame) -> DataFrame:
+        """列をそろえて省メモリな型に変換する"""
+        data = data.reindex(columns=self.COLUMNS)
+
+        if data["context_ref"].isna().all() and len(data) > 0:
+            # contextRefをcontext_period, context_entity, context_categoryから復元
+            parts = data[
+                ["context_period", "context_entity", "context_category"]
+            ]
+            data["context_ref"] = (
+                parts.fillna("").astype(str).agg("_".join, axis=1)
+            ).str.rstrip("_")
+
+        data["numeric"] = pd.to_numeric(data["numeric"], errors="coerce")
+        data["decimals"] = pd.to_numeric(data["decimals"], errors="coerce")
+        data["scale"] = pd.to_numeric(data["scale"], errors="coerce")
+        # 欠損値はFalse(object型のfillnaによる型の変換の警告を避ける)
+        data["xsi_nil"] = data["xsi_nil"].eq(True)
+
+        return self.encoder.encode(
+            data, self.CATEGORY_COLUMNS
+        ).reset_index(drop=True)
+
+    def __build_index(self):
+        """ハッシュインデックスを構築する"""
+        data = self.data
+        self.__name_index = self.__group_indices(data, ["name"])
+        self.__context_index = self.__group_indices(data, ["context_ref"])
+        self.__fact_index = self.__group_indices(
+            data, ["name", "context_ref"]
+        )
+
+    @staticmethod
+    def __group_indices(data: DataFrame, keys):
+        if len(data) == 0:
+            return {}
+        indices = data.groupby(keys, observed=True, sort=False).indices
+        if len(keys) == 1:
+            # 単一キーの場合はタプルではなく値をキーにする
+            return {
+                (key[0] if isinstance(key, tuple) else key): value
+                for key, value in indices.items()
+            }
+        return indices
+
+    def __len__(self):
+        return len(self.data)
+
+    def __rows(self, positions, xbrl_id=None) -> DataFrame:
+        if positions is None:
+            positions = np.empty(0, dtype=np.intp)
+        df = self.data.iloc[positions]
+        if xbrl_id is not None:
+            df = df[df["xbrl_id"] == xbrl_id]
+        return df
+
+    def lookup(self, name, context_ref, xbrl_id=None):
+        """要素名とコンテキストから事実を取得する
+
+        Args:
+            name (str): 要素名 (例: tse-ed-t_NetSales)
+            context_ref (str): コンテキストID
+            xbrl_id (str, optional): 対象書類のxbrl_id
+
+        Returns:
+            list[dict]: 該当する事実
+        """
+        positions = self.__fact_index.get((name, context_ref))
+        return self.__records(self.__rows(positions, xbrl_id))
+
+    def by_name(self, name, xbrl_id=None) -> DataFrame:
+        """要素名から事実を取得する"""
+        return self.__rows(self.__name_index.get(name), xbrl_id)
+
+    def by_context(self, context_ref, xbrl_id=None) -> DataFrame:
+        """コンテキストIDから事実を取得する"""
+        return self.__rows(self.__context_index.get(context_ref), xbrl_id)
+
+    def by_period(self, context_period, xbrl_id=None) -> DataFrame:
+        """コンテキストの期間から事実を取得する"""
+        mask = self.data["context_period"] == context_period
+        return self.__rows(np.flatnonzero(mask.to_numpy()), xbrl_id)
+
+    def names(self):
+        """格納している要素名の一覧を取得する"""
+        return list(self.__name_index.keys())
+
+    def contexts(self):
+        """格納しているコンテキストIDの一覧を取得する"""
+        return list(self.__context_index.keys())
+
+    def memory_usage(self):
+        """データのメモリ使用量(byte)を取得する"""
+        return int(self.data.memory_usage(deep=True).sum())
+
+    def to_DataFrame(self):
+        """DataFrame形式で出力する"""
+        return self.data.copy()
+
+    def to_codes(self):
+        """文字列の列をエンコーダーの辞書のコード(int32)に変換した
+        データを取得する(DBへの保存用、辞書はencoder.to_framesで取得)
+
+        Returns:
+            DataFrame: コードに変換したデータ
+        """
+        return self.encoder.encode(
+            self.data, self.CATEGORY_COLUMNS, codes=True
+        )
+
+    def to_dict(self):
+        """辞書形式で出力する"""
+        return self.__records(self.data)
+
+    @staticmethod
+    def __records(df: DataFrame):
+        df = df.astype(object)
+        return df.where(df.notna(), None).to_dict(orient="records")
@@ -0,0 +1,367 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.batch import BatchRunner, ParquetSink, SQLiteSink, open_sink
+from app.batch.__main__ import main
+from app.batch.batch_runner import extract_tables
+from app.benchmarks import SyntheticFilingGenerator
+from app.models import XBRLModel
+from app.utils import Instrumentation, RunManifest
+
+
+@pytest.fixture
+def zip_dir(tmp_path):
+    zip_dir = tmp_path / "zips"
+    for seed in range(3):
+        SyntheticFilingGenerator(n_facts=100, seed=seed).write_zip(
+            zip_dir / f"filing{seed}.zip"
+        )
+    return zip_dir
+
+
+def count(db_path, query):
+    with sqlite3.connect(db_path) as connection:
+        return connection.execute(query).fetchone()[0]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run(zip_dir, tmp_path, workers):
+    db_path = tmp_path / "output.db"
+    with SQLiteSink(db_path) as sink:
+        runner = BatchRunner(
+            sink,
+            tmp_path / "work",
+            workers=workers,
+            batch_size=2,
+            tables=["ix_header", "ix_non_fraction", "cal_link_arcs"],
+        )
+        summary = runner.run(BatchRunner.sources([zip_dir]))
+
+    assert summary["filings"] == 3
+    assert summary["failed"] == 0
+    assert summary["facts"] > 0
+    assert summary["bytes"] > 0
+    assert summary["filings_per_second"] > 0
+    assert count(db_path, "SELECT COUNT(*) FROM ix_header") == 3
+    assert (
+        count(db_path, "SELECT COUNT(*) FROM ix_non_fraction")
+        == summary["facts"]
+    )
+    # 全てのテーブルのxbrl_idは書類のxbrl_idにそろう
+    assert (
+        count(db_path, "SELECT COUNT(DISTINCT xbrl_id) FROM cal_link_arcs")
+        == 3
+    )
+    assert (
+        count(
+            db_path,
+            "SELECT COUNT(*) FROM ix_header WHERE xbrl_id NOT IN "
+            "(SELECT xbrl_id FROM _batch_filings)",
+        )
+        == 0
+    )
+    # 解凍したディレクトリは削除される
+    assert sorted(path.name for path in zip_dir.iterdir()) == [
+        "filing0.zip",
+        "filing1.zip",
+        "filing2.zip",
+    ]
+
+
+def test_resume_and_errors(zip_dir, tmp_path):
+    db_path = tmp_path / "output.db"
+    (zip_dir / "broken.zip").write_bytes(b"not a zip")
+    sources = BatchRunner.sources([zip_dir])
+
+    with SQLiteSink(db_path) as sink:
+        summary = BatchRunner(sink, tmp_path / "work").run(sources)
+    assert summary["filings"] == 3
+    assert summary["failed"] == 1
+    assert summary["errors"][0]["source"].endswith("broken.zip")
+
+    with SQLiteSink(db_path) as sink:
+        summary = BatchRunner(sink, tmp_path / "work", resume=True).run(
+            sources
+        )
+    assert summary["skipped"] == 3
+    assert summary["filings"] == 0
+    # 失敗した書類は再度処理する
+    assert summary["failed"] == 1
+    assert count(db_path, "SELECT COUNT(*) FROM ix_header") == 3
+
+
+def test_manifest(zip_dir, tmp_path):
+    db_path = tmp_path / "output.db"
+    (zip_dir / "broken.zip").write_bytes(b"not a zip")
+    sources = BatchRunner.sources([zip_dir])
+
+    with RunManifest(tmp_path / "manifest.db", max_attempts=2) as manifest:
+        for expected_failed in [1, 1, 0]:
+            with SQLiteSink(db_path) as sink:
+                summary = BatchRunner(
+                    sink, tmp_path / "work", workers=2, manifest=manifest
+                ).run(sources)
+            # 失敗した書類は試行回数の上限(2回)まで再処理する
+            assert summary["failed"] == expected_failed
+        assert summary["skipped"] == 4
+        assert manifest.summary() == {"completed": 3, "failed": 1}
+        entry = manifest.entries(status="completed")[0]
+        assert entry["outputs"]["sink"] == "SQLiteSink"
+        assert entry["outputs"]["tables"]["ix_header"] == 1
+
+        # 内容が変わった書類のみ再処理する
+        SyntheticFilingGenerator(n_facts=60).write_zip(
+            zip_dir / "filing0.zip"
+        )
+        with SQLiteSink(db_path) as sink:
+            summary = BatchRunner(
+                sink, tmp_path / "work", manifest=manifest
+            ).run(sources)
+        assert summary["filings"] == 1
+        assert summary["skipped"] == 3
+
+
+def test_id_source(zip_dir, tmp_path):
+    db_path = tmp_path / "output.db"
+    sources = BatchRunner.sources([zip_dir])
+    for _ in range(2):
+        with SQLiteSink(db_path) as sink:
+            summary = BatchRunner(
+                sink, tmp_path / "work", workers=2, id_source="sm"
+            ).run(sources)
+    assert summary["filings"] == 3
+    # 同じxbrl_idの行は置き換えるため、再処理しても重複しない
+    assert count(db_path, "SELECT COUNT(*) FROM ix_header") == 3
+    assert (
+        count(db_path, "SELECT COUNT(*) FROM ix_non_fraction")
+        + count(db_path, "SELECT COUNT(*) FROM ix_non_numeric")
+        == summary["facts"]
+    )
+    assert (
+        count(
+            db_path, "SELECT COUNT(DISTINCT xbrl_id) FROM ix_non_fraction"
+        )
+        == 3
+    )
+
+
+def test_sources(zip_dir, tmp_path):
+    list_path = tmp_path / "sources.txt"
+    list_path.write_text(
+        "# コメント\nhttps://example.com/a.zip\n\n"
+        f"{(zip_dir / 'filing0.zip').as_posix()}\n",
+        encoding="utf-8",
+    )
+    sources = BatchRunner.sources(
+        [list_path, zip_dir / "filing1.zip", zip_dir]
+    )
+    assert sources[:2] == [
+        "https://example.com/a.zip",
+        (zip_dir / "filing0.zip").as_posix(),
+    ]
+    assert len(sources) == 6
+    assert BatchRunner.source_key(sources[0]) == sources[0]
+    assert BatchRunner.source_key(sources[1]) == (
+        (zip_dir / "filing0.zip").resolve().as_posix()
+    )
+
+    with pytest.raises(ValueError):
+        BatchRunner(None, tmp_path, tables=["unknown"])
+
+
+def test_open_sink(tmp_path):
+    with open_sink(tmp_path / "output.sqlite") as sink:
+        assert isinstance(sink, SQLiteSink)
+    pytest.importorskip("pyarrow")
+    with open_sink(tmp_path / "parquet") as sink:
+        assert isinstance(sink, ParquetSink)
+
+
+def test_parquet_sink(zip_dir, tmp_path):
+    pytest.importorskip("pyarrow")
+    output = tmp_path / "parquet"
+    with ParquetSink(output) as sink:
+        BatchRunner(sink, tmp_path / "work", batch_size=2).run(
+            BatchRunner.sources([zip_dir])
+        )
+        assert sink.completed() == {
+            (zip_dir / f"filing{seed}.zip").resolve().as_posix()
+            for seed in range(3)
+        }
+    assert len(list((output / "ix_header").glob("*.parquet"))) == 2
+    assert len(pd.read_parquet(output / "ix_header")) == 3
+
+
+def test_parquet_sink_edjp(get_xbrl_edjp_zip, tmp_path):
+    pytest.importorskip("pyarrow")
+    output = tmp_path / "parquet"
+    with ParquetSink(output) as sink:
+        summary = BatchRunner(sink, tmp_path / "work").run(
+            [get_xbrl_edjp_zip]
+        )
+    assert summary["failed"] == 0
+    df = pd.read_parquet(output / "ix_non_fraction")
+    assert len(df) == 269
+    assert df["numeric"].dtype == "float64"
+    assert (df["numeric"] < 0).any()
+
+
+def test_normalize(get_xbrl_edjp_zip, tmp_path):
+    model = XBRLModel(get_xbrl_edjp_zip, tmp_path.as_posix())
+    df = extract_tables(model, ["ix_non_fraction"])["ix_non_fraction"]
+    # numericは文字列と負の値(float)が混在する
+    assert pd.api.types.infer_dtype(df["numeric"], skipna=True) == "mixed"
+
+    normalized = ParquetSink.normalize(df)
+    assert normalized["numeric"].dtype == "float64"
+    assert (
+        normalized["numeric"].notna().sum() == df["numeric"].notna().sum()
+    )
+    assert ParquetSink.normalize(
+        pd.DataFrame({"value": ["a", 1.5, None]})
+    )["value"].tolist() == ["a", "1.5", None]
+
+
+def test_write_error(zip_dir, tmp_path):
+    class BrokenSink(SQLiteSink):
+        def write_batch(self, results, replace=False):
+            if any(r["source"].endswith("filing1.zip") for r in results):
+                raise ValueError("broken")
+            super().write_batch(results, replace)
+
+    db_path = tmp_path / "output.db"
+    with RunManifest(tmp_path / "manifest.db") as manifest:
+        with BrokenSink(db_path) as sink:
+            summary = BatchRunner(
+                sink, tmp_path / "work", batch_size=1, manifest=manifest
+            ).run(BatchRunner.sources([zip_dir]))
+        # 書き込みに失敗したバッチのみ失敗とし、処理を続ける
+        assert summary["filings"] == 2
+        assert summary["failed"] == 1
+        assert summary["errors"][0]["source"].endswith("filing1.zip")
+        assert summary["errors"][0]["error"] == "ValueError: broken"
+        assert manifest.summary() == {"completed": 2, "failed": 1}
+
+
+def test_sqlite_rollback(tmp_path):
+    db_path = tmp_path / "output.db"
+    df = pd.DataFrame({"xbrl_id": ["a"], "value": [1]})
+    results = [
+        {
+            "source": "a.zip",
+            "xbrl_id": "a",
+            "frames": {"ix_header": df, "invalid table": df},
+        }
+    ]
+    with SQLiteSink(db_path) as sink:
+        with pytest.raises(ValueError):
+            sink.write_batch(results)
+        # 後のテーブルで失敗した場合は、先のテーブルも書き込まない
+        assert sink.completed() == set()
+        # 以降のバッチは書き込める
+        sink.write_batch([{**results[0], "frames": {}}])
+    with sqlite3.connect(db_path) as connection:
+        tables = {
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+    assert "ix_header" not in tables
+    assert count(db_path, "SELECT COUNT(*) FROM _batch_filings") == 1
+
+
+def test_same_name(zip_dir, tmp_path):
+    nested = zip_dir / "nested"
+    SyntheticFilingGenerator(n_facts=50, seed=9).write_zip(
+        nested / "filing0.zip"
+    )
+    db_path = tmp_path / "output.db"
+    sources = BatchRunner.sources([zip_dir])
+    with SQLiteSink(db_path) as sink:
+        BatchRunner(sink, tmp_path / "work").run(sources[:2])
+    with SQLiteSink(db_path) as sink:
+        summary = BatchRunner(sink, tmp_path / "work", resume=True).run(
+            sources
+        )
+    # 同じ名前でもディレクトリが異なるzipファイルは別の書類として処理する
+    assert summary["skipped"] == 2
+    assert summary["filings"] == 2
+    assert count(db_path, "SELECT COUNT(*) FROM ix_header") == 4
+
+
+def test_main(zip_dir, tmp_path, capsys):
+    db_path = tmp_path / "output.db"
+    argv = [
+        zip_dir.as_posix(),
+        "--sink",
+        db_path.as_posix(),
+        "--work-dir",
+        (tmp_path / "work").as_posix(),
+        "--metrics",
+        (tmp_path / "metrics.json").as_posix(),
+    ]
+    assert main(argv) == 0
+    assert "filings/s" in capsys.readouterr().out
+    assert (tmp_path / "metrics.json").exists()
+
+    assert main(argv + ["--resume"]) == 0
+    assert "skipped: 3" in capsys.readouterr().out
+
+    manifest = ["--manifest", (tmp_path / "manifest.db").as_posix()]
+    assert main(argv + manifest) == 0
+    assert main(argv + manifest) == 0
+    assert "skipped: 3" in capsys.readouterr().out
+
+
+def test_worker_metrics(zip_dir, tmp_path):
+    enabled = Instrumentation.enabled
+    Instrumentation.set_enabled(True)
+    Instrumentation.reset()
+    try:
+        with SQLiteSink(tmp_path / "output.db") as sink:
+            BatchRunner(sink, tmp_path / "work", workers=2).run(
+                BatchRunner.sources([zip_dir])
+            )
+        snapshot = Instrumentation.snapshot()
+    finally:
+        Instrumentation.set_enabled(enabled)
+        Instrumentation.reset()
+    # ワーカープロセスの計測結果も集計する
+    assert snapshot["run"]["timers"]["filing"]["calls"] == 3
+    assert "IXBRLManager.get_ix_header" in snapshot["run"]["timers"]
+    assert len(snapshot["filings"]) == 3
+
+
+def test_worker_crash(zip_dir, tmp_path, monkeypatch):
+    from app.batch import batch_runner
+
+    class CrashingModel(XBRLModel):
+        def __init__(self, zip_path, *args):
+            # メモリ不足等でワーカーが異常終了する書類
+            if Path(zip_path).name == "filing1.zip":
+                os._exit(1)
+            super().__init__(zip_path, *args)
+
+    # ワーカーはforkで起動するため、差し替えたモデルを参照する
+    monkeypatch.setattr(batch_runner, "XBRLModel", CrashingModel)
+    db_path = tmp_path / "output.db"
+    sources = BatchRunner.sources([zip_dir])
+    with RunManifest(tmp_path / "manifest.db", max_attempts=2) as manifest:
+        for expected_failed in [1, 1, 0]:
+            with SQLiteSink(db_path) as sink:
+                summary = BatchRunner(
+                    sink, tmp_path / "work", workers=2, manifest=manifest
+                ).run(sources)
+            # 異常終了した書類のみ失敗とし、試行回数に数える
+            assert summary["failed"] == expected_failed
+        assert summary["errors"] == []
+        assert manifest.summary() == {"completed": 2, "failed": 1}
+        (entry,) = manifest.entries(status="failed")
+        assert entry["attempts"] == 2
+        assert entry["error"].startswith("BrokenProcessPool")
+    assert count(db_path, "SELECT COUNT(*) FROM ix_header") == 2
@@ -0,0 +1,111 @@
+import pytest
+
+from app.benchmarks import BenchmarkRunner
+from app.benchmarks.__main__ import main
+
+
+def results(**values):
+    return {
+        "results": {
+            "1k": {
+                name: {"min": value, "median": value}
+                for name, value in values.items()
+            }
+        }
+    }
+
+
+def test_run(tmp_path):
+    runner = BenchmarkRunner(tmp_path, tiers=[200], repeat=2)
+    data = runner.run()
+
+    benchmarks = data["results"]["200"]
+    assert "IxbrlParser.ix_non_fractions" in benchmarks
+    assert "LabelParser.resolved_labels" in benchmarks
+    assert "PreLinkManager.get_link_arcs" in benchmarks
+    assert "QualitativeManager.get_qualitative_infos" in benchmarks
+    for stats in benchmarks.values():
+        assert len(stats["runs"]) == 2
+        assert stats["min"] <= stats["median"]
+
+    path = runner.save(data, tmp_path / "results.json")
+    assert BenchmarkRunner.load(path)["results"] == data["results"]
+    # 同じ結果同士では遅くなったベンチマークはない
+    assert BenchmarkRunner.compare(data, data) == []
+
+
+def test_selected_benchmarks(tmp_path, monkeypatch):
+    from app.parser import IxbrlParser, LabelParser
+
+    def not_selected(*args, **kwargs):
+        raise AssertionError("選択していないベンチマークの準備")
+
+    # 選択したベンチマークのみ準備する
+    monkeypatch.setattr(LabelParser, "create", not_selected)
+    runner = BenchmarkRunner(
+        tmp_path,
+        tiers=[100],
+        repeat=1,
+        benchmarks=["IxbrlParser.ix_non_numeric"],
+    )
+    created = []
+    create = IxbrlParser.create.__func__
+    monkeypatch.setattr(
+        IxbrlParser,
+        "create",
+        classmethod(
+            lambda cls, *args: created.append(args) or create(cls, *args)
+        ),
+    )
+    data = runner.run()
+    assert list(data["results"]["100"]) == ["IxbrlParser.ix_non_numeric"]
+    # パーサーの読み込みは計測の前に1回のみ
+    assert len(created) == 1
+
+
+def test_tier_name():
+    assert BenchmarkRunner.tier_name("1M") == "1m"
+    assert BenchmarkRunner.tier_facts("10k") == 10_000
+    assert (
+        BenchmarkRunner.tier_facts(BenchmarkRunner.tier_name(500)) == 500
+    )
+    with pytest.raises(ValueError):
+        BenchmarkRunner.tier_name("large")
+
+
+def test_compare():
+    baseline = results(a=0.100, b=0.100, c=0.001, d=0.100)
+    current = results(a=0.110, b=0.200, c=0.004, e=1.0)
+
+    regressions = BenchmarkRunner.compare(current, baseline, threshold=0.2)
+
+    # aはしきい値以内、cは揺らぎとして無視、d/eは片方にのみ存在する
+    assert [item["name"] for item in regressions] == ["b"]
+    assert regressions[0]["ratio"] == pytest.approx(2.0)
+
+
+def test_main(tmp_path):
+    args = [
+        "--work-dir",
+        str(tmp_path),
+        "--tiers",
+        "100",
+        "--repeat",
+        "1",
+        "--benchmarks",
+        "QualitativeParser.qualitative_info",
+    ]
+    baseline = tmp_path / "baseline.json"
+    assert (
+        main(args + ["--baseline", str(baseline), "--update-baseline"])
+        == 0
+    )
+    assert main(args + ["--baseline", str(baseline)]) == 0
+
+    # ベースラインより大幅に遅い場合は失敗する
+    data = BenchmarkRunner.load(baseline)
+    for stats in data["results"]["100"].values():
+        stats["min"] = 0.0
+    BenchmarkRunner.save(data, baseline)
+    args += ["--baseline", str(baseline), "--min-seconds", "0"]
+    assert main(args) == 1
@@ -0,0 +1,78 @@
+import zipfile
+
+import pytest
+
+from app.benchmarks import SyntheticFilingGenerator
+from app.manager import (
+    CalLinkManager,
+    DefLinkManager,
+    IXBRLManager,
+    LabelManager,
+    PreLinkManager,
+    QualitativeManager,
+)
+
+
+@pytest.fixture
+def filing_dir(tmp_path):
+    generator = SyntheticFilingGenerator(
+        n_facts=101, n_arcs=120, n_labels=60, n_sections=6
+    )
+    zip_path = generator.write_zip(tmp_path / "filing.zip")
+    with zipfile.ZipFile(zip_path) as zf:
+        zf.extractall(tmp_path / "filing")
+    return tmp_path / "filing"
+
+
+def test_files(tmp_path):
+    generator = SyntheticFilingGenerator(n_facts=10, n_documents=3)
+    names = [name for name, _ in generator.files()]
+    assert len([name for name in names if name.endswith("ixbrl.htm")]) == 4
+    for suffix in [".xsd", "lab.xml", "lab-en.xml", "cal.xml", "pre.xml"]:
+        assert any(name.endswith(suffix) for name in names)
+    assert "XBRLData/Attachment/qualitative.htm" in names
+
+    # zipとディレクトリに同じ内容を書き出す
+    zip_path = generator.write_zip(tmp_path / "a.zip")
+    directory = generator.write(tmp_path / "b")
+    with zipfile.ZipFile(zip_path) as zf:
+        for name in names:
+            assert zf.read(name) == (directory / name).read_bytes()
+
+
+def test_invalid_documents():
+    with pytest.raises(ValueError):
+        SyntheticFilingGenerator(n_documents=5)
+
+
+def test_managers(filing_dir, tmp_path):
+    output_path = (tmp_path / "output").as_posix()
+
+    manager = IXBRLManager(filing_dir)
+    assert manager.xbrl_type() == ("edjp", "決算短信(日本基準)")
+    facts = [
+        fact
+        for values in manager.get_ix_non_fraction()
+        for fact in values
+        if fact["document_type"] != "sm"
+    ]
+    assert len(facts) == 101
+    header = manager.get_ix_header()
+    assert header["securities_code"] == "9999"
+    assert header["reporting_date"] == "2024-05-15"
+
+    manager = LabelManager(filing_dir, output_path)
+    assert sum(len(values) for values in manager.get_link_labels()) == 60
+
+    # 51要素の木に120アークのため、拡張リンクロールが3つになる
+    for manager_class in [CalLinkManager, PreLinkManager]:
+        manager = manager_class(filing_dir, output_path)
+        assert sum(len(v) for v in manager.get_link_arcs()) == 120
+        assert sum(len(v) for v in manager.get_link_roles()) == 3
+    manager = DefLinkManager(filing_dir, output_path, document_type="fr")
+    arcs = [arc for values in manager.get_link_arcs() for arc in values]
+    assert len(arcs) == 120 + 5 * 3
+
+    manager = QualitativeManager(filing_dir).qualitative_infos()
+    heads = {section["head3"] for section in manager.data}
+    assert len(heads - {""}) == 6
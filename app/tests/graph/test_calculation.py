@@ -0,0 +1,86 @@
+import pytest
+from pandas import DataFrame
+
+from app.graph import CalculationGraph
+from app.manager import CalLinkManager, IXBRLManager
+from app.store import FactStore
+
+
+@pytest.fixture
+def calculation_graph(get_xbrl_in_edjp, get_output_dir):
+    manager = CalLinkManager(get_xbrl_in_edjp, get_output_dir)
+    return CalculationGraph.from_manager(manager)
+
+
+def test_calculation_graph(calculation_graph):
+    assert "ConsolidatedBalanceSheet" in calculation_graph.roles
+    children = calculation_graph.children(
+        "ConsolidatedBalanceSheet", "jppfs_cor_Assets"
+    )
+    assert ("jppfs_cor_CurrentAssets", 1.0) in children
+    assert ("jppfs_cor_NoncurrentAssets", 1.0) in children
+    # 存在しない要素は空のリストを返す
+    assert calculation_graph.children("dummy", "jppfs_cor_Assets") == []
+
+    df = calculation_graph.to_DataFrame()
+    assert isinstance(df, DataFrame)
+    assert set(df["weight"]) <= {1.0, -1.0}
+
+
+def test_check(calculation_graph, get_xbrl_in_edjp):
+    facts = FactStore.from_manager(IXBRLManager(get_xbrl_in_edjp))
+    df = calculation_graph.check(facts)
+    assert isinstance(df, DataFrame)
+    # 当期末の流動資産のみ、子要素の合計との差が丸め幅を超える
+    assert len(df) == 1
+    row = df.iloc[0]
+    assert row["role"] == "ConsolidatedBalanceSheet"
+    assert row["concept"] == "jppfs_cor_CurrentAssets"
+    assert row["context_ref"] == "CurrentYearInstant"
+    assert row["difference"] == 7_000_000
+    assert row["children"] == 11
+    assert row["computed"] + row["difference"] == row["reported"]
+
+
+def test_check_inconsistency():
+    arcs = [
+        {
+            "attr_value": "Role",
+            "xlink_from": "total",
+            "xlink_to": f"item{i}",
+            "xlink_arcrole": None,
+            "xlink_order": float(i),
+            "xlink_weight": weight,
+        }
+        for i, weight in enumerate([1.0, 1.0, -1.0])
+    ]
+    locs = [
+        {"attr_value": "Role", "xlink_label": label, "xlink_href": label}
+        for label in ["total", "item0", "item1", "item2"]
+    ]
+    graph = CalculationGraph(arcs, locs)
+
+    def fact(name, numeric, context="Current"):
+        return {
+            "name": name,
+            "context_period": context,
+            "numeric": numeric,
+            "scale": 6,
+            "decimals": -6,
+        }
+
+    facts = [
+        fact("total", 5),
+        fact("item0", 3),
+        fact("item1", 4),
+        fact("item2", 2),
+        fact("total", 9, "Prior"),
+        fact("item0", 3, "Prior"),
+        fact("item1", 4, "Prior"),
+    ]
+    df = graph.check(facts)
+    # 丸め幅を超える差がある前期のみ不一致となる
+    assert len(df) == 1
+    assert df["context_ref"][0] == "Prior"
+    assert df["computed"][0] == 7_000_000
+    assert df["difference"][0] == 2_000_000
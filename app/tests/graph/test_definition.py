@@ -0,0 +1,70 @@
+import pytest
+from pandas import DataFrame
+
+from app.graph import DimensionIndex
+from app.manager import DefLinkManager, IXBRLManager
+from app.store import FactStore
+
+ROLE = "http://www.xbrl.tdnet.info/jp/tse/tdnet/role/RoleForecasts"
+
+
+@pytest.fixture
+def def_link_manager(get_xbrl_in_edjp, get_output_dir):
+    return DefLinkManager(get_xbrl_in_edjp, get_output_dir, "sm")
+
+
+@pytest.fixture
+def dimension_index(def_link_manager):
+    return DimensionIndex.from_manager(def_link_manager)
+
+
+def test_dimension_index(dimension_index):
+    assert ROLE in dimension_index.roles
+    assert dimension_index.dimensions(ROLE, "tse-ed-t_ForecastsTable") == [
+        "tse-ed-t_ConsolidatedNonconsolidatedAxis",
+        "tse-ed-t_ResultForecastAxis",
+    ]
+    assert dimension_index.members(
+        "tse-ed-t_ResultForecastAxis", ROLE, "tse-ed-t_ForecastsTable"
+    ) == [
+        "tse-ed-t_ForecastMember",
+        "tse-ed-t_UpperMember",
+        "tse-ed-t_LowerMember",
+    ]
+
+    df = dimension_index.layout(ROLE)
+    assert isinstance(df, DataFrame)
+    assert len(df) == 4
+
+
+def test_is_valid_member(dimension_index):
+    assert dimension_index.is_valid_member(
+        "tse-ed-t_NetSales", ["ConsolidatedMember", "ForecastMember"]
+    )
+    assert not dimension_index.is_valid_member(
+        "tse-ed-t_NetSales", ["ConsolidatedMember", "DummyMember"]
+    )
+    # ハイパーキューブに含まれない要素は検証の対象外
+    assert dimension_index.is_valid_member("dummy", ["DummyMember"])
+
+
+def test_validate(dimension_index, get_xbrl_in_edjp):
+    facts = FactStore.from_manager(IXBRLManager(get_xbrl_in_edjp))
+    assert len(dimension_index.validate(facts)) == 0
+
+    df = facts.to_DataFrame()
+    df = df[df["name"] == "tse-ed-t_NetSales"].head(1).copy()
+    df["context_category"] = "DummyMember"
+    assert len(dimension_index.validate(df)) == 1
+
+
+def test_persist(def_link_manager, dimension_index, tmp_path):
+    index = DimensionIndex.from_manager(def_link_manager, tmp_path)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    assert index.to_dict() == dimension_index.to_dict()
+    # 保存した索引を読み込む
+    index = DimensionIndex.from_manager(def_link_manager, tmp_path)
+    assert index.to_dict() == dimension_index.to_dict()
+    assert index.is_valid_member(
+        "tse-ed-t_NetSales", ["ConsolidatedMember", "ForecastMember"]
+    )
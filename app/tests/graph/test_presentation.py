@@ -0,0 +1,68 @@
+import pytest
+from pandas import DataFrame
+
+from app.graph import PresentationTree
+from app.manager import PreLinkManager
+
+
+@pytest.fixture
+def pre_link_manager(get_xbrl_in_edjp, get_output_dir):
+    return PreLinkManager(get_xbrl_in_edjp, get_output_dir)
+
+
+def test_presentation_tree(pre_link_manager):
+    tree = PresentationTree.from_manager(pre_link_manager)
+    assert "ConsolidatedBalanceSheet" in tree.roles
+
+    df = tree.tree("ConsolidatedBalanceSheet")
+    assert isinstance(df, DataFrame)
+    assert list(df.columns) == PresentationTree.COLUMNS
+    # 先頭は根の要素
+    assert df["depth"].iloc[0] == 0
+    assert df["parent"].iloc[0] is None
+    # 親要素は子要素より先に並ぶ
+    seen = set()
+    for row in df.itertuples():
+        if row.depth > 0:
+            assert row.parent in seen
+        seen.add(row.concept)
+    # 深さは1ずつしか深くならない
+    assert (df["depth"].diff().dropna() <= 1).all()
+
+    # 存在しないロールは空のDataFrameを返す
+    assert len(tree.tree("dummy")) == 0
+
+
+def test_tree_order():
+    arcs = [
+        {
+            "attr_value": "Role",
+            "xlink_from": p,
+            "xlink_to": c,
+            "xlink_order": o,
+        }
+        for p, c, o in [
+            ("A", "C", 2.0),
+            ("A", "B", 1.0),
+            ("B", "D", 1.0),
+            ("C", "E", 1.0),
+        ]
+    ]
+    locs = [
+        {"attr_value": "Role", "xlink_label": label, "xlink_href": label}
+        for label in "ABCDE"
+    ]
+    df = PresentationTree(arcs, locs).tree("Role")
+    assert df["concept"].tolist() == ["A", "B", "D", "C", "E"]
+    assert df["depth"].tolist() == [0, 1, 2, 1, 2]
+    assert df["parent"].tolist() == [None, "A", "B", "A", "C"]
+
+
+def test_tree_cache(pre_link_manager):
+    PresentationTree.clear_cache()
+    PresentationTree.from_manager(pre_link_manager)
+    size = PresentationTree.cache_size()
+    assert size > 0
+    # 同じ関係のロールは再構築されない
+    PresentationTree.from_manager(pre_link_manager)
+    assert PresentationTree.cache_size() == size
@@ -0,0 +1,128 @@
+import pytest
+from pandas import DataFrame
+
+from app.manager import FilingContext, FilingManifest
+from app.parser import IxbrlParser
+
+
+@pytest.fixture
+def context(get_xbrl_in_edjp):
+    FilingContext.invalidate(get_xbrl_in_edjp)
+    return FilingContext.of(get_xbrl_in_edjp)
+
+
+def test_context_shared(context, get_xbrl_in_edjp):
+    assert FilingContext.of(get_xbrl_in_edjp) is context
+    assert context.manifest is FilingManifest.of(get_xbrl_in_edjp)
+
+
+def test_link_base_refs(context):
+    df = context.link_base_refs()
+    assert isinstance(df, DataFrame)
+    assert len(df) > 0
+    # 複製を返すため、変更しても共有データに影響しない
+    df.drop(df.index, inplace=True)
+    assert len(context.link_base_refs()) > 0
+
+
+def test_extract_cache(context, get_xbrl_test_ixbrl):
+    records = context.extract(
+        IxbrlParser, get_xbrl_test_ixbrl, "ix_non_fractions"
+    )
+    assert len(records) > 0
+    # 複製を返すため、変更しても共有データに影響しない
+    records[0]["name"] = None
+    records.clear()
+    cached = context.extract(
+        IxbrlParser, get_xbrl_test_ixbrl, "ix_non_fractions"
+    )
+    assert len(cached) > 0
+    assert cached[0]["name"] is not None
+
+    # メソッドごとに抽出結果を保持する
+    non_numeric = context.extract(
+        IxbrlParser, get_xbrl_test_ixbrl, "ix_non_numeric"
+    )
+    assert non_numeric != cached
+    # 破棄した後は解析し直す
+    context.clear()
+    records = context.extract(
+        IxbrlParser, get_xbrl_test_ixbrl, "ix_non_fractions"
+    )
+    assert records[0]["xbrl_id"] != cached[0]["xbrl_id"]
+
+
+def test_extract_threads(context, get_xbrl_test_ixbrl):
+    from concurrent.futures import ThreadPoolExecutor
+
+    methods = ["ix_non_fractions", "ix_non_numeric"] * 4
+    parser = IxbrlParser.create(get_xbrl_test_ixbrl)
+    expected = {
+        method: [r["name"] for r in getattr(parser, method)().data]
+        for method in set(methods)
+    }
+    # 同じファイルを複数のスレッドで扱っても結果が混ざらない
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(
+            executor.map(
+                lambda method: (
+                    method,
+                    context.extract(
+                        IxbrlParser, get_xbrl_test_ixbrl, method
+                    ),
+                ),
+                methods,
+            )
+        )
+    for method, records in results:
+        assert [r["name"] for r in records] == expected[method]
+
+
+def test_invalidate(context, get_xbrl_in_edjp):
+    manifest = context.manifest
+    FilingContext.invalidate(get_xbrl_in_edjp)
+    assert FilingContext.of(get_xbrl_in_edjp) is not context
+    assert FilingManifest.of(get_xbrl_in_edjp) is not manifest
+
+
+def test_xbrl_id(context, get_xbrl_test_ixbrl, get_xbrl_in_edjp):
+    from app.manager import BaseXbrlManager
+
+    records = context.extract(
+        IxbrlParser, get_xbrl_test_ixbrl, "ix_non_fractions"
+    )
+    assert context.xbrl_id is None
+    assert (
+        BaseXbrlManager(get_xbrl_in_edjp).xbrl_id != records[0]["xbrl_id"]
+    )
+
+    # 抽出済みのレコードと以降に生成するマネージャーに引き継ぐ
+    context.set_xbrl_id("xbrl_id")
+    records = context.extract(
+        IxbrlParser, get_xbrl_test_ixbrl, "ix_non_fractions"
+    )
+    assert {record["xbrl_id"] for record in records} == {"xbrl_id"}
+    assert BaseXbrlManager(get_xbrl_in_edjp).xbrl_id == "xbrl_id"
+
+    # サマリーの内容から生成するため、常に同じxbrl_idになる
+    xbrl_id = context.content_xbrl_id()
+    assert len(xbrl_id) == 36
+    assert FilingContext(get_xbrl_in_edjp).content_xbrl_id() == xbrl_id
+
+
+def test_released_with_managers(get_xbrl_in_edjp):
+    import gc
+    import weakref
+
+    from app.manager import IXBRLManager
+
+    FilingContext.invalidate(get_xbrl_in_edjp)
+    manager = IXBRLManager(get_xbrl_in_edjp)
+    manager.get_ix_non_fraction()
+    context = weakref.ref(manager.context)
+    assert FilingContext.of(get_xbrl_in_edjp) is context()
+
+    # マネージャーを破棄すると抽出したレコードとともに破棄される
+    del manager
+    gc.collect()
+    assert context() is None
@@ -1,7 +1,8 @@
 import pytest
+from pandas import DataFrame
 
 from app.manager import IXBRLManager
-from app.tag import IxHeader, IxNonFraction, IxNonNumeric
+from app.tag import IxHeader, IxNonFraction, IxNonNumeric, IxSummary
 
 
 @pytest.fixture
@@ -40,11 +41,37 @@ def test_get_header(ixbrl_manager):
     print(value)
 
 
+def test_get_header_values(ixbrl_manager):
+    value = ixbrl_manager.get_ix_header()
+    assert value["xbrl_id"] == ixbrl_manager.xbrl_id
+    # 全ファイルの非数値データから取得した値と一致するか確認
+    names = {
+        item["name"].split("_")[-1]: item["value"]
+        for values in ixbrl_manager.get_ix_non_numeric()
+        for item in values
+    }
+    assert value["company_name"] == names["CompanyName"]
+    assert value["securities_code"] == names["SecuritiesCode"]
+    assert value["document_name"] == names["DocumentName"]
+    assert value["reporting_date"] == names["FilingDate"]
+    assert value["current_period"] == names["TypeOfCurrentPeriodDEI"]
+
+
 def test_get_summary(ixbrl_manager):
     print("サマリー情報を取得します。")
     for value in ixbrl_manager.get_ix_summary():
-        # assert isinstance(value, dict)
+        assert isinstance(value, dict)
         # IxSummaryに格納可能なデータか確認
-        # assert IxSummary.is_valid(value)
-        # print(value)
+        assert IxSummary.is_valid(value)
         print(value)
+
+
+def test_get_summaries(ixbrl_manager, get_xbrl_in_edjp):
+    other = IXBRLManager(get_xbrl_in_edjp)
+    df = IXBRLManager.get_ix_summaries([ixbrl_manager, other])
+    assert isinstance(df, DataFrame)
+    assert set(df["xbrl_id"]) == {ixbrl_manager.xbrl_id, other.xbrl_id}
+    # xbrl_idとコンテキストごとに1行となるか確認
+    keys = ["xbrl_id", *IXBRLManager.SUMMARY_INDEX]
+    assert not df.duplicated(keys).any()
+    assert "net_sales" in df.columns
@@ -45,3 +45,48 @@ def test_get_link_label_arcs(label_manager):
         for value in values:
             assert isinstance(value, dict)
             assert LabelArc.is_valid(value)
+
+
+@pytest.fixture
+def local_label_manager(label_manager):
+    # ネットワークに接続しないよう、ローカルのラベルファイルに限定する
+    files = label_manager.files
+    label_manager.files = files[
+        ~files["xlink_href"].str.startswith("http")
+    ]
+    return label_manager
+
+
+def test_get_label_table(local_label_manager):
+    df = local_label_manager.get_label_table()
+    assert len(df) > 0
+    assert df["xlink_href"].is_unique
+    assert "label" in df.columns
+
+    labels = local_label_manager.get_label_dict()
+    assert len(labels) == len(df)
+    row = df.iloc[0]
+    assert labels[row["xlink_href"]]["label"] == row["label"]
+
+
+def test_get_label_table_both(get_xbrl_in_edjp, get_output_dir):
+    output_dir = get_output_dir / "label"
+    manager = LabelManager(get_xbrl_in_edjp, output_dir.as_posix(), "both")
+    assert manager.lang == "both"
+    files = manager.files
+    manager.files = files[~files["xlink_href"].str.startswith("http")]
+
+    df = manager.get_label_table()
+    assert df["xlink_href"].is_unique
+    assert {"label_jp", "label_en"} <= set(df.columns)
+    assert df["label_jp"].notna().any()
+    assert df["label_en"].notna().any()
+
+    # 日本語のみの結果と一致する
+    manager.set_language("jp")
+    manager.files = manager.files[
+        ~manager.files["xlink_href"].str.startswith("http")
+    ]
+    jp = manager.get_label_table().set_index("xlink_href")["label"]
+    both = df.set_index("xlink_href")["label_jp"]
+    assert both.loc[jp.index].equals(jp.rename("label_jp"))
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from app.manager import (
+    BaseXbrlManager,
+    FilingContext,
+    FilingManifest,
+    IXBRLManager,
+)
+
+
+@pytest.fixture
+def manifest(get_xbrl_in_edjp):
+    FilingManifest.invalidate(get_xbrl_in_edjp)
+    return FilingManifest.of(get_xbrl_in_edjp)
+
+
+def test_manifest_files(manifest, get_xbrl_in_edjp):
+    expected = sorted(
+        file.as_posix()
+        for file in Path(get_xbrl_in_edjp).glob("**/*")
+        if file.is_file() and not file.name.startswith(".")
+    )
+    assert manifest.files == expected
+
+
+def test_manifest_shared(manifest, get_xbrl_in_edjp):
+    # 同じディレクトリのマネージャーは同じマニフェストを共有する
+    assert FilingManifest.of(get_xbrl_in_edjp) is manifest
+    assert BaseXbrlManager(get_xbrl_in_edjp).manifest is manifest
+    assert IXBRLManager(get_xbrl_in_edjp).manifest is manifest
+
+
+def test_manifest_invalidate(manifest, get_xbrl_in_edjp):
+    manager = BaseXbrlManager(get_xbrl_in_edjp)
+    context = manager.context
+    assert manager.context is context
+    # 破棄した後は新しいコンテキストを参照する
+    manager.invalidate_manifest()
+    assert manager.context is not context
+    assert manager.context is FilingContext.of(get_xbrl_in_edjp)
+    rebuilt = manager.manifest
+    assert rebuilt is not manifest
+    assert rebuilt.files == manifest.files
+    # 全てのマニフェストを破棄
+    FilingManifest.invalidate()
+    assert FilingManifest.of(get_xbrl_in_edjp) is not rebuilt
+
+
+def test_parse_filename():
+    result = FilingManifest.parse_filename(
+        "a/tse-acedjpsm-85660-20240502385660-ixbrl.htm"
+    )
+    assert result["document_type"] == "sm"
+    assert result["report_type"] == "edjp"
+    assert result["role"] == "ixbrl"
+    result = FilingManifest.parse_filename(
+        "a/0101010-acbs01-tse-acedjpfr-85660-2024-03-31-01-2024-05-02-ixbrl.htm"
+    )
+    assert result["document_type"] == "bs"
+    assert result["report_type"] == "edjp"
+    result = FilingManifest.parse_filename(
+        "a/tse-rvfc-22180-20240514595320-ixbrl.htm"
+    )
+    assert result["report_type"] == "rvfc"
+    result = FilingManifest.parse_filename("a/qualitative.htm")
+    assert result["role"] == "qualitative"
+    assert result["suffix"] == ".htm"
+
+
+def test_manifest_resolve(manifest):
+    name = "tse-acedjpfr-85660-2024-03-31-01-2024-05-02-lab.xml"
+    result = manifest.resolve(name)
+    assert result.endswith("/XBRLData/Attachment/" + name)
+    assert manifest.resolve("./" + name) == result
+    assert manifest.resolve("Attachment/" + name) == result
+    assert manifest.resolve("Summary/" + name) is None
+    assert manifest.resolve("dummy.xml") is None
@@ -0,0 +1,41 @@
+import zipfile
+
+import pytest
+from pandas import DataFrame
+
+from app.manager import QualitativeManager
+
+
+@pytest.fixture
+def qualitative_manager(get_xbrl_edjp_zip, tmp_path):
+    with zipfile.ZipFile(get_xbrl_edjp_zip) as zf:
+        zf.extractall(tmp_path)
+    return QualitativeManager(tmp_path.as_posix())
+
+
+def test_qualitative_infos(qualitative_manager):
+    # document_typeを指定しない場合は全てのファイルを対象とする
+    manager = qualitative_manager.qualitative_infos()
+    df = manager.to_DataFrame()
+    assert isinstance(df, DataFrame)
+    assert len(df) > 0
+    assert list(df.columns) == [
+        "xbrl_id",
+        "head2",
+        "head3",
+        "head4",
+        "content",
+    ]
+    # 書類と結合できるよう、マネージャーのxbrl_idを出力する
+    assert (df["xbrl_id"] == qualitative_manager.xbrl_id).all()
+
+    document_type = qualitative_manager.files["document_type"].iloc[0]
+    data = qualitative_manager.qualitative_infos(document_type).to_dict()
+    assert len(data) == len(df)
+
+
+def test_get_qualitative_infos(qualitative_manager):
+    values = list(qualitative_manager.get_qualitative_infos())
+    assert len(values) == len(qualitative_manager.files)
+    data = qualitative_manager.qualitative_infos().to_dict()
+    assert [value for file in values for value in file] == data
@@ -0,0 +1,52 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from app.manager import TaxonomyLabelCache
+from app.parser import LabelParser
+
+URL = "http://www.example.com/taxonomy/2024-01-01/example-lab.xml"
+
+
+@pytest.fixture
+def taxonomy_label(get_xbrl_test_label, tmp_path):
+    # ダウンロード済みのタクソノミのラベルファイルを用意する
+    file_path = tmp_path / "taxonomy/2024-01-01/example-lab.xml"
+    file_path.parent.mkdir(parents=True)
+    shutil.copy(get_xbrl_test_label, file_path)
+    TaxonomyLabelCache.clear()
+    yield tmp_path
+    TaxonomyLabelCache.clear()
+
+
+def test_get(taxonomy_label, monkeypatch):
+    df = TaxonomyLabelCache.get(URL, taxonomy_label.as_posix())
+    assert len(df) > 0
+    assert df["xlink_href"].is_unique
+    # プロセス内で共有され、変更しても共有のデータに影響しない
+    df.drop(df.index, inplace=True)
+    df = TaxonomyLabelCache.get(URL, taxonomy_label.as_posix())
+    assert len(df) > 0
+    # ディスクに保存される
+    cache_files = list(
+        (taxonomy_label / TaxonomyLabelCache.CACHE_DIR_NAME).glob("*.npz")
+    )
+    assert len(cache_files) == 1
+    # pickleを使用せずに読み込める
+    with np.load(cache_files[0], allow_pickle=False) as npz:
+        assert npz["columns"].tolist() == df.columns.tolist()
+
+    # ディスクから読み込む場合はラベルファイルを解析しない
+    def raise_error(self):
+        raise AssertionError
+
+    monkeypatch.setattr(LabelParser, "resolved_labels", raise_error)
+    TaxonomyLabelCache.clear()
+    cached = TaxonomyLabelCache.get(URL, taxonomy_label.as_posix())
+    assert cached.equals(df)
+
+
+def test_is_taxonomy(get_xbrl_test_label):
+    assert TaxonomyLabelCache.is_taxonomy(URL)
+    assert not TaxonomyLabelCache.is_taxonomy(get_xbrl_test_label)
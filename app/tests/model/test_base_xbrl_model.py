@@ -12,3 +12,60 @@ def base_xbrl_model(get_xbrl_edjp_zip, get_output_dir):
 
 def test_base_xbrl_model_instance(base_xbrl_model):
     assert isinstance(base_xbrl_model, BaseXbrlModel)
+
+
+def test_id_source(tmp_path):
+    from app.benchmarks import SyntheticFilingGenerator
+    from app.models import XBRLModel
+
+    zip_path = tmp_path / "filing.zip"
+    SyntheticFilingGenerator(n_facts=50).write_zip(zip_path)
+
+    def xbrl_ids(id_source):
+        model = XBRLModel(zip_path, tmp_path / "output", id_source)
+        header = model.ixbrl_manager.get_ix_header()
+        arcs = model.cal_link_manager.get_link_arcs()
+        # マネージャーとパーサーの出力はモデルのxbrl_idにそろう
+        assert header["xbrl_id"] == model.xbrl_id
+        assert {row["xbrl_id"] for rows in arcs for row in rows} == {
+            model.xbrl_id
+        }
+        return model.xbrl_id
+
+    assert xbrl_ids(None) != xbrl_ids(None)
+    assert xbrl_ids("zip") == xbrl_ids("zip")
+    assert xbrl_ids("sm") == xbrl_ids("sm")
+    assert xbrl_ids("zip") != xbrl_ids("sm")
+
+    # zipを作成し直しても、サマリーの内容が同じであれば同じxbrl_idになる
+    sm_id = xbrl_ids("sm")
+    zip_id = xbrl_ids("zip")
+    SyntheticFilingGenerator(n_facts=50, n_sections=3).write_zip(zip_path)
+    assert xbrl_ids("sm") == sm_id
+    assert xbrl_ids("zip") != zip_id
+
+    with pytest.raises(ValueError):
+        BaseXbrlModel(zip_path, tmp_path / "output", "unknown")
+
+
+@pytest.mark.parametrize("id_source", [None, "zip", "sm"])
+def test_unzip_metrics(tmp_path, id_source):
+    from app.benchmarks import SyntheticFilingGenerator
+    from app.utils import Instrumentation
+
+    zip_path = tmp_path / "filing.zip"
+    SyntheticFilingGenerator(n_facts=50).write_zip(zip_path)
+    enabled = Instrumentation.enabled
+    Instrumentation.set_enabled(True)
+    Instrumentation.reset()
+    try:
+        model = BaseXbrlModel(zip_path, tmp_path / "output", id_source)
+        # 解凍の計測はxbrl_idの決定後に書類に集計する
+        stats = Instrumentation.snapshot(model.xbrl_id)
+        filings = Instrumentation.snapshot()["filings"]
+    finally:
+        Instrumentation.set_enabled(enabled)
+        Instrumentation.reset()
+    assert "BaseXbrlModel.unzip" in stats["timers"]
+    assert stats["counters"]["BaseXbrlModel.unzip_files"] > 0
+    assert None not in filings
@@ -229,3 +229,13 @@ def test_xbrl_models(get_xbrl_zip_dir, get_output_dir):
                 for item in value.get_link_locs():
                     pprint.pprint(item)
                 assert isinstance(value, CalLinkManager)
+
+
+def test_lazy_managers(xbrl_model_edjp):
+    model = xbrl_model_edjp
+    # マネージャーは初回アクセス時に生成され、以降は同じインスタンスを返す
+    manager = model.ixbrl_manager
+    assert manager is model.ixbrl_manager
+    assert model.cal_link_manager is model.cal_link_manager
+    # 同じディレクトリのマネージャーはコンテキストを共有する
+    assert manager.context is model.cal_link_manager.context
@@ -66,3 +66,12 @@ def test_non_fraction(get_parser):
     assert len(result) > 0
     # column check
     assert sorted(IxNonFraction.keys()) == sorted(result.columns.tolist())
+
+
+def test_iter_non_numeric(get_parser):
+    parser = get_parser
+    expected = parser.ix_non_numeric().to_dict()
+    result = list(parser.iter_non_numeric())
+    assert result == expected
+    for value in result:
+        assert IxNonNumeric.is_valid(value)
@@ -79,3 +79,15 @@ def test_role_refs(get_parser):
         )
     except TagNotFoundError:
         assert True
+
+
+def test_resolved_labels(get_parser):
+    parser = get_parser
+    parser.resolved_labels()
+    result_df = parser.to_DataFrame()
+    assert isinstance(result_df, pd.DataFrame)
+    assert result_df.shape[0] > 0
+    # 要素ごとに1行
+    assert result_df["xlink_href"].is_unique
+    assert "label" in result_df.columns
+    assert result_df["label"].notna().all()
@@ -0,0 +1,89 @@
+import zipfile
+
+import pytest
+
+from app.parser import QualitativeParser
+
+HTML = """<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>qualitative</title><style>p { margin: 0 }</style></head>
+<body><div class="root">
+<p class="smt_head2">１．経営成績</p>
+<div><p>売上高は<span>増加</span>しました。</p></div>
+<h3 class="smt_head3">概況</h3>
+<p class="smt_text3">本文<span>（注記）</span></p>
+<table><tr><td><p>表</p></td></tr></table>
+<p class="smt_head2">２．財政状態</p>
+<p>資産は減少しました。</p>
+</div></body></html>
+"""
+
+
+@pytest.fixture
+def get_qualitative(tmp_path):
+    file_path = tmp_path / "qualitative.htm"
+    file_path.write_text(HTML, encoding="utf-8")
+    return file_path.as_posix()
+
+
+@pytest.fixture
+def get_qualitative_in_zip(get_xbrl_edjp_zip, tmp_path):
+    with zipfile.ZipFile(get_xbrl_edjp_zip) as zf:
+        name = next(
+            name
+            for name in zf.namelist()
+            if name.endswith("qualitative.htm")
+        )
+        return zf.extract(name, tmp_path)
+
+
+def test_qualitative_info(get_qualitative):
+    parser = QualitativeParser(get_qualitative)
+    parser.xbrl_id = "xbrl_id"
+    assert parser.qualitative_info().to_dict() == [
+        {
+            "xbrl_id": "xbrl_id",
+            "head2": "１．経営成績",
+            "head3": "",
+            "head4": "",
+            "content": "売上高は増加しました。",
+        },
+        {
+            "xbrl_id": "xbrl_id",
+            "head2": "１．経営成績",
+            "head3": "概況",
+            "head4": "",
+            "content": "",
+        },
+        {
+            "xbrl_id": "xbrl_id",
+            "head2": "１．経営成績",
+            "head3": "概況",
+            "head4": "本文（注記）",
+            "content": "表",
+        },
+        {
+            "xbrl_id": "xbrl_id",
+            "head2": "２．財政状態",
+            "head3": "概況",
+            "head4": "",
+            "content": "資産は減少しました。",
+        },
+    ]
+
+
+def test_iter_qualitative_info(get_qualitative_in_zip):
+    parser = QualitativeParser.create(get_qualitative_in_zip)
+    sections = list(parser.iter_qualitative_info())
+    assert len(sections) > 0
+    for section in sections:
+        assert sorted(section.keys()) == [
+            "content",
+            "head2",
+            "head3",
+            "head4",
+            "xbrl_id",
+        ]
+        assert section["xbrl_id"] == parser.xbrl_id
+        assert section["head2"] != ""
+    assert parser.qualitative_info().to_dict() == sections
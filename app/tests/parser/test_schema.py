@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from app.parser import SchemaParser
+from app.tag import SchemaLinkBaseRef
+
+
+@pytest.fixture
+def get_xsd_files(get_xbrl_in_edjp):
+    return [
+        file.as_posix() for file in Path(get_xbrl_in_edjp).rglob("*.xsd")
+    ]
+
+
+def test_prescan_link_base_refs(get_xsd_files):
+    assert len(get_xsd_files) > 0
+    for file in get_xsd_files:
+        parser = SchemaParser.prescan(file)
+        assert isinstance(parser, SchemaParser)
+        # 全体を解析した結果と一致するか確認
+        expected = SchemaParser.create(file).link_base_refs().to_dict()
+        assert parser.to_dict() == expected
+        assert len(parser.to_dict()) > 0
+        for value in parser.to_dict():
+            assert SchemaLinkBaseRef.is_valid(value)
@@ -0,0 +1,142 @@
+import pytest
+
+from app.search import FullTextIndex
+
+SECTIONS = [
+    {
+        "head2": "１．経営成績等の概況",
+        "head3": "",
+        "head4": "",
+        "content": "当期の売上高は前期比で増加しました。",
+    },
+    {
+        "head2": "１．経営成績等の概況",
+        "head3": "（２）財政状態",
+        "head4": "",
+        "content": "資産合計は減少しました。負債合計は増加しました。",
+    },
+    {
+        "head2": "２．注記事項",
+        "head3": "",
+        "head4": "",
+        "content": "該当事項はありません。",
+    },
+]
+
+
+@pytest.fixture
+def full_text_index(tmp_path):
+    index = FullTextIndex(tmp_path)
+    index.add("A", SECTIONS).commit()
+    index.add("B", SECTIONS[1:]).commit()
+    return index
+
+
+def brute_force(sections_by_id, query):
+    phrases = FullTextIndex.normalize(query).split()
+    return sorted(
+        (xbrl_id, number)
+        for xbrl_id, sections in sections_by_id.items()
+        for number, section in enumerate(sections)
+        if all(
+            phrase in FullTextIndex.section_text(section)
+            for phrase in phrases
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "経営成績",
+        "増加",
+        "資産合計 増加",
+        "該当事項はありません",
+        "合",
+        "ＡＢＣ",
+        "注記",
+    ],
+)
+def test_search(full_text_index, tmp_path, query):
+    expected = brute_force({"A": SECTIONS, "B": SECTIONS[1:]}, query)
+    assert sorted(full_text_index.search(query)) == expected
+    # ディスクから読み込んだインデックスでも同じ結果となる
+    assert sorted(FullTextIndex(tmp_path).search(query)) == expected
+
+
+def test_single_character(tmp_path):
+    sections = [
+        {"head2": "A", "head3": "", "head4": "", "content": "甲 乙\n丙"},
+        {"head2": "B", "head3": "", "head4": "", "content": "甲乙"},
+    ]
+    index = FullTextIndex(tmp_path).add("A", sections).commit()
+    # 空白や見出しの境界に挟まれた1文字も検索できる
+    for query in ["a", "甲", "乙", "丙", "甲乙"]:
+        expected = brute_force({"A": sections}, query)
+        assert sorted(index.search(query)) == expected
+    assert index.search("丙") == [("A", 0)]
+
+
+def test_phrase(full_text_index):
+    # バイグラムを全て含んでも連続しない場合は一致しない
+    assert full_text_index.search("増加しました資産") == []
+    assert full_text_index.search("") == []
+
+
+def test_replace(full_text_index, tmp_path):
+    assert ("A", 0) in full_text_index.search("売上高")
+    full_text_index.add("A", SECTIONS[2:]).commit()
+    index = FullTextIndex(tmp_path)
+    assert index.search("売上高") == []
+    assert index.search("該当事項") == [("B", 1), ("A", 0)]
+    assert index.xbrl_ids() == ["A", "B"]
+    assert index.document("A", 0)["head2"] == "２．注記事項"
+
+
+def test_pending_duplicates(tmp_path):
+    index = FullTextIndex(tmp_path)
+    index.add("A", SECTIONS).add("A", SECTIONS[2:]).commit()
+    # commit前に同じxbrl_idを追加した場合は最後の追加のみ登録する
+    assert index.search("該当事項") == [("A", 0)]
+    assert index.search("売上高") == []
+
+
+def test_commit_without_postings(full_text_index, tmp_path):
+    # 置き換える書類の判定に既存のポスティングリストを読み込まない
+    for path in tmp_path.glob("segment-*/postings.npz"):
+        path.unlink()
+    FullTextIndex(tmp_path).add("B", SECTIONS[:1]).commit()
+    assert FullTextIndex(tmp_path).xbrl_ids() == ["A", "B"]
+
+
+def test_merge(full_text_index, tmp_path):
+    full_text_index.add("A", SECTIONS[2:]).commit()
+    expected = {
+        query: sorted(full_text_index.search(query))
+        for query in ["経営成績", "増加", "該当事項", "合", "売上高"]
+    }
+    full_text_index.merge()
+    assert len(list(tmp_path.glob("segment-*"))) == 1
+    for index in [full_text_index, FullTextIndex(tmp_path)]:
+        for query, hits in expected.items():
+            assert sorted(index.search(query)) == hits
+        assert index.xbrl_ids() == ["A", "B"]
+        assert index.document("A", 0)["head2"] == "２．注記事項"
+
+
+def test_compaction(tmp_path):
+    index = FullTextIndex(tmp_path)
+    sections_by_id = {}
+    for number in range(120):
+        xbrl_id = f"id{number % 100:03d}"
+        sections = SECTIONS[number % 3 :]
+        sections_by_id[xbrl_id] = sections
+        index.add(xbrl_id, sections).commit()
+    # 書類ごとに追加してもセグメント数は書類数の対数程度となる
+    assert len(list(tmp_path.glob("segment-*"))) < 2 * index.MERGE_FACTOR
+    index = FullTextIndex(tmp_path)
+    assert index.xbrl_ids() == sorted(sections_by_id)
+    for query in ["経営成績", "資産合計 増加", "注記"]:
+        assert sorted(index.search(query)) == brute_force(
+            sections_by_id, query
+        )
@@ -0,0 +1,124 @@
+import pytest
+
+from app.search import MinHash, NearDuplicateIndex
+
+BOILERPLATE = (
+    "当第１四半期連結累計期間におけるわが国経済は、雇用・所得環境の改善や"
+    "インバウンド需要の回復により、緩やかな回復基調で推移しました。"
+)
+
+
+def sections(*contents):
+    return [
+        {
+            "head2": "経営成績等の概況",
+            "head3": "",
+            "head4": "",
+            "content": c,
+        }
+        for c in contents
+    ]
+
+
+@pytest.fixture
+def near_duplicate_index():
+    index = NearDuplicateIndex()
+    index.add(
+        "A-1Q", sections(BOILERPLATE, "売上高は前期比で増加しました。" * 5)
+    )
+    index.add(
+        "A-2Q", sections(BOILERPLATE + "以上", "全く別の説明文です。" * 5)
+    )
+    index.add("B-1Q", sections("", "該当事項はありません。"))
+    return index
+
+
+def test_signature():
+    hasher = MinHash()
+    signature = hasher.signature(BOILERPLATE)
+    assert signature.shape == (hasher.num_perm,)
+    assert (
+        MinHash.similarity(signature, hasher.signature(BOILERPLATE)) == 1
+    )
+    other = hasher.signature("全く別の説明文です。")
+    assert MinHash.similarity(signature, other) < 0.2
+
+
+def test_clusters(near_duplicate_index):
+    # 本文のないセクションは対象外
+    assert len(near_duplicate_index) == 5
+    df = near_duplicate_index.clusters(threshold=0.8)
+    assert df["cluster"].nunique() == 1
+    assert sorted(df["xbrl_id"]) == ["A-1Q", "A-2Q"]
+    assert (df["section"] == 0).all()
+
+
+def test_changed_sections(near_duplicate_index):
+    df = near_duplicate_index.changed_sections("A-1Q", "A-2Q")
+    assert df["changed"].tolist() == [False, True]
+    assert df["similarity"][0] > 0.8
+
+
+def test_save_load(near_duplicate_index, tmp_path):
+    path = tmp_path / "A-2Q.npz"
+    near_duplicate_index.save("A-2Q", path)
+    index = NearDuplicateIndex().load(path)
+    assert len(index) == 2
+    index.add(
+        "A-1Q", sections(BOILERPLATE, "売上高は前期比で増加しました。" * 5)
+    )
+    assert index.changed_sections("A-1Q", "A-2Q")["changed"].tolist() == [
+        False,
+        True,
+    ]
+    # 見出しとセクション番号は保存した値のまま読み込む
+    columns = ["xbrl_id", "section", "head2"]
+    assert (
+        index.changed_sections("A-1Q", "A-2Q")[columns]
+        .astype(str)
+        .equals(
+            near_duplicate_index.changed_sections("A-1Q", "A-2Q")[
+                columns
+            ].astype(str)
+        )
+    )
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(bands=16, rows=8).load(path)
+
+
+def test_save_load_none(tmp_path):
+    index = NearDuplicateIndex()
+    index.add(
+        "A-1Q",
+        [{"head2": "概況", "head3": None, "head4": "", "content": "本文"}],
+    )
+    path = tmp_path / "A-1Q.npz"
+    index.save("A-1Q", path)
+    # 見出しがない(None)値と空の見出しを区別して読み込む
+    df = NearDuplicateIndex().load(path).changed_sections("A-1Q", "A-1Q")
+    assert df["head3"].tolist() == [None]
+    assert df["head4"].tolist() == [""]
+
+    # 読み込み済みの書類を読み込んでも重複しない
+    index.load(path)
+    assert len(index) == 1
+
+
+def test_add_same_xbrl_id(near_duplicate_index):
+    # 追加済みの書類は既存のセクションを置き換える
+    near_duplicate_index.add("A-1Q", sections(BOILERPLATE))
+    assert len(near_duplicate_index) == 4
+    df = near_duplicate_index.clusters(threshold=0.8)
+    assert sorted(df["xbrl_id"]) == ["A-1Q", "A-2Q"]
+    assert len(near_duplicate_index.changed_sections("A-2Q", "A-1Q")) == 1
+
+    near_duplicate_index.add("A-1Q", sections("全く別の説明文です。" * 5))
+    df = near_duplicate_index.clusters(threshold=0.8)
+    assert sorted(zip(df["xbrl_id"], df["section"])) == [
+        ("A-1Q", 0),
+        ("A-2Q", 1),
+    ]
+
+    near_duplicate_index.remove("A-2Q")
+    assert len(near_duplicate_index) == 2
+    assert len(near_duplicate_index.clusters(threshold=0.8)) == 0
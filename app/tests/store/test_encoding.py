@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas import DataFrame
+
+from app.manager import IXBRLManager
+from app.store import DictionaryEncoder, FactStore, StringDictionary
+
+
+@pytest.fixture
+def facts(get_xbrl_in_edjp):
+    manager = IXBRLManager(get_xbrl_in_edjp)
+    return DataFrame(
+        [
+            record
+            for records in manager.get_ix_non_fraction()
+            for record in records
+        ]
+    )
+
+
+def test_string_dictionary():
+    dictionary = StringDictionary(["a"])
+    codes = dictionary.encode(["b", None, "a", "b", np.nan])
+    assert codes.tolist() == [1, -1, 0, 1, -1]
+    assert codes.dtype == np.int32
+    assert dictionary.decode(codes).tolist() == ["b", None, "a", "b", None]
+    # 一度割り当てたコードは変わらない
+    assert dictionary.encode(["c", "a"]).tolist() == [2, 0]
+    assert dictionary.to_frame()["value"].tolist() == ["a", "b", "c"]
+
+
+def test_round_trip(facts):
+    encoder = DictionaryEncoder()
+    encoded = encoder.encode(facts)
+    codes = encoder.encode(facts, codes=True)
+
+    assert isinstance(encoded["name"].dtype, pd.CategoricalDtype)
+    assert codes["name"].dtype == np.int32
+    # カテゴリ型のコードは辞書のコードと一致する
+    assert (encoded["name"].cat.codes == codes["name"]).all()
+
+    for df in [encoded, codes]:
+        decoded = encoder.decode(df)
+        columns = [c for c in DictionaryEncoder.COLUMNS if c in facts]
+        pd.testing.assert_frame_equal(
+            decoded[columns],
+            facts[columns]
+            .astype(object)
+            .where(facts[columns].notna(), None),
+        )
+
+
+def test_shared_dictionaries(facts, tmp_path):
+    encoder = DictionaryEncoder()
+    first = encoder.encode(facts.iloc[:10])
+    second = encoder.encode(facts.iloc[10:])
+    # 同じエンコーダーで変換した列はカテゴリ型のまま結合できる
+    merged = pd.concat(
+        [encoder.encode(first), encoder.encode(second)], ignore_index=True
+    )
+    assert isinstance(merged["name"].dtype, pd.CategoricalDtype)
+    # 要素名とコンテキストは列をまたいで辞書を共有する
+    assert "concept" in encoder.dictionaries
+    assert "context" in encoder.dictionaries
+    assert "filing" in encoder.dictionaries
+
+    path = encoder.save(tmp_path / "dictionaries.json")
+    loaded = DictionaryEncoder.load(path)
+    codes = encoder.encode(facts, codes=True)
+    pd.testing.assert_frame_equal(
+        loaded.decode(codes), encoder.decode(codes)
+    )
+    assert set(loaded.to_frames()) == set(encoder.dictionaries)
+
+
+def test_memory(facts):
+    plain = facts.reindex(columns=FactStore.COLUMNS).astype(
+        {column: object for column in FactStore.CATEGORY_COLUMNS}
+    )
+    store = FactStore(facts)
+    codes = store.to_codes()
+    plain_size = plain[FactStore.CATEGORY_COLUMNS].memory_usage(deep=True)
+    codes_size = codes[FactStore.CATEGORY_COLUMNS].memory_usage(deep=True)
+    # 文字列の列は数倍小さくなる
+    assert plain_size.sum() > codes_size.sum() * 4
+
+
+def test_fact_store_encoder(get_xbrl_in_edjp):
+    encoder = DictionaryEncoder()
+    first = FactStore.from_manager(
+        IXBRLManager(get_xbrl_in_edjp), None, encoder
+    )
+    second = FactStore.from_manager(
+        IXBRLManager(get_xbrl_in_edjp), None, encoder
+    )
+    merged = FactStore.merge([first, second])
+    assert merged.encoder is encoder
+    assert len(merged) == len(first) + len(second)
+    assert isinstance(merged.data["name"].dtype, pd.CategoricalDtype)
+    assert len(encoder.dictionaries["filing"]) == 2
+    assert encoder.decode(merged.to_codes())["name"].equals(
+        merged.data["name"].astype(object)
+    )
@@ -0,0 +1,75 @@
+import pytest
+from pandas import DataFrame
+
+from app.manager import IXBRLManager
+from app.store import FactStore
+
+
+@pytest.fixture
+def fact_store(get_xbrl_in_edjp):
+    return FactStore.from_manager(IXBRLManager(get_xbrl_in_edjp))
+
+
+def test_fact_store_instance(fact_store):
+    assert isinstance(fact_store, FactStore)
+    assert len(fact_store) > 0
+    assert fact_store.memory_usage() > 0
+
+
+def test_lookup(fact_store):
+    context_ref = "CurrentYearDuration_ConsolidatedMember_ResultMember"
+    result = fact_store.lookup("tse-ed-t_NetSales", context_ref)
+    assert len(result) == 1
+    assert result[0]["name"] == "tse-ed-t_NetSales"
+    assert result[0]["context_ref"] == context_ref
+    assert result[0]["numeric"] is not None
+    # 存在しない要素は空のリストを返す
+    assert fact_store.lookup("dummy", context_ref) == []
+
+
+def test_slices(fact_store):
+    df = fact_store.by_period("CurrentYearDuration")
+    assert isinstance(df, DataFrame)
+    assert len(df) > 0
+    assert (df["context_period"] == "CurrentYearDuration").all()
+    for name in fact_store.names()[:5]:
+        assert (fact_store.by_name(name)["name"] == name).all()
+    for context_ref in fact_store.contexts()[:5]:
+        df = fact_store.by_context(context_ref)
+        assert (df["context_ref"] == context_ref).all()
+
+
+def test_merge(fact_store, get_xbrl_in_edjp):
+    other = FactStore.from_manager(IXBRLManager(get_xbrl_in_edjp))
+    merged = FactStore.merge([fact_store, other])
+    assert len(merged) == len(fact_store) + len(other)
+    xbrl_ids = set(merged.to_DataFrame()["xbrl_id"])
+    assert len(xbrl_ids) == 2
+    context_ref = "CurrentYearDuration_ConsolidatedMember_ResultMember"
+    assert len(merged.lookup("tse-ed-t_NetSales", context_ref)) == 2
+    # xbrl_idで絞り込み
+    xbrl_id = xbrl_ids.pop()
+    result = merged.lookup("tse-ed-t_NetSales", context_ref, xbrl_id)
+    assert len(result) == 1
+
+
+def test_empty_store():
+    store = FactStore()
+    assert len(store) == 0
+    assert store.lookup("dummy", "dummy") == []
+    assert len(store.by_period("dummy")) == 0
+
+
+def test_xsi_nil_without_warning():
+    import warnings
+
+    # 非分数データはxsi_nilを持たないため、結合すると欠損値となる
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        store = FactStore(
+            DataFrame(
+                {"name": ["a", "b"], "xsi_nil": [None, True]}, dtype=object
+            )
+        )
+    assert store.data["xsi_nil"].tolist() == [False, True]
+    assert store.data["xsi_nil"].dtype == bool
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from app.parser import LabelParser
+from app.utils import Instrumentation
+
+
+@pytest.fixture(autouse=True)
+def instrumentation():
+    enabled = Instrumentation.enabled
+    Instrumentation.set_enabled(True)
+    Instrumentation.reset()
+    yield Instrumentation
+    Instrumentation.set_enabled(enabled)
+    Instrumentation.reset()
+
+
+class Extractor:
+    def __init__(self) -> None:
+        self.data = []
+
+    @Instrumentation.timed()
+    def extract(self, n):
+        self.data = list(range(n))
+        return self
+
+    @Instrumentation.timed_generator(per_xbrl_id=True)
+    def values(self, n):
+        yield from range(n)
+
+    @property
+    def xbrl_id(self):
+        return "manager-id"
+
+
+def test_timer_and_counter():
+    with Instrumentation.filing("A"):
+        with Instrumentation.timer("fetch"):
+            pass
+        Instrumentation.count("rows", 3)
+    with Instrumentation.timer("fetch"):
+        pass
+    Instrumentation.count("rows", 2, xbrl_id="B")
+
+    snapshot = Instrumentation.snapshot()
+    assert snapshot["run"]["timers"]["fetch"]["calls"] == 2
+    assert snapshot["run"]["counters"] == {"rows": 5}
+    assert snapshot["filings"]["A"]["timers"]["fetch"]["calls"] == 1
+    assert snapshot["filings"]["A"]["timers"]["filing"]["calls"] == 1
+    assert snapshot["filings"]["A"]["counters"] == {"rows": 3}
+    assert Instrumentation.snapshot("B")["counters"] == {"rows": 2}
+    assert Instrumentation.snapshot("C") is None
+
+
+def test_merge():
+    with Instrumentation.filing("A"):
+        with Instrumentation.timer("fetch"):
+            pass
+        Instrumentation.count("rows", 3)
+    # ワーカープロセスで集計した書類の集計結果を加算する
+    snapshot = Instrumentation.snapshot("A")
+    Instrumentation.merge(snapshot, "A")
+    Instrumentation.merge(snapshot, "B")
+
+    merged = Instrumentation.snapshot()
+    assert merged["run"]["timers"]["fetch"]["calls"] == 3
+    assert merged["run"]["counters"] == {"rows": 9}
+    assert merged["filings"]["A"]["timers"]["fetch"]["calls"] == 2
+    assert merged["filings"]["B"] == snapshot
+
+
+def test_decorators():
+    extractor = Extractor()
+    assert extractor.extract(4) is extractor
+
+    values = extractor.values(3)
+    assert next(values) == 0
+    assert list(values) == [1, 2]
+
+    run = Instrumentation.snapshot()["run"]
+    assert run["timers"]["Extractor.extract"]["calls"] == 1
+    assert run["counters"]["Extractor.extract.rows"] == 4
+    assert run["counters"]["Extractor.values.items"] == 3
+    manager = Instrumentation.snapshot("manager-id")
+    assert manager["counters"] == {"Extractor.values.items": 3}
+
+
+def test_disabled():
+    Instrumentation.set_enabled(False)
+    with Instrumentation.filing("A"):
+        with Instrumentation.timer("fetch"):
+            pass
+    Extractor().extract(2)
+    assert list(Extractor().values(2)) == [0, 1]
+
+    snapshot = Instrumentation.snapshot()
+    assert snapshot["run"]["timers"] == {}
+    assert snapshot["filings"] == {}
+
+
+def test_parser(get_xbrl_test_label):
+    with Instrumentation.filing("label"):
+        LabelParser.create(get_xbrl_test_label).link_labels()
+
+    stats = Instrumentation.snapshot("label")
+    for name in [
+        "LabelParser.create",
+        "LabelParser._read_xbrl",
+        "LabelParser.link_labels",
+    ]:
+        assert stats["timers"][name]["calls"] == 1
+    assert stats["counters"]["LabelParser.link_labels.rows"] > 0
+
+
+def test_export(tmp_path):
+    with Instrumentation.filing('A"1'):
+        with Instrumentation.timer("parse"):
+            pass
+        Instrumentation.count("rows", 10)
+
+    path = tmp_path / "metrics.json"
+    text = Instrumentation.to_json(path)
+    assert json.loads(path.read_text(encoding="utf-8")) == json.loads(text)
+
+    prometheus = Instrumentation.to_prometheus(filings=True)
+    assert "# TYPE pyxbrltools_stage_seconds_total counter" in prometheus
+    assert 'pyxbrltools_stage_calls_total{stage="parse"} 1' in prometheus
+    assert 'pyxbrltools_events_total{name="rows"} 10' in prometheus
+    assert (
+        'pyxbrltools_events_total{name="rows",filing="A\\"1"} 10'
+        in prometheus
+    )
@@ -0,0 +1,83 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.benchmarks import BenchmarkRunner
+from app.utils import lazy_attributes
+
+ROOT = Path(__file__).resolve().parents[3]
+
+HEAVY_MODULES = [
+    "pandas",
+    "requests",
+    "bs4",
+    "lxml",
+    "psycopg2",
+    "datetimejp",
+]
+
+
+def loaded_modules(code):
+    """新しいプロセスでコードを実行し、読み込まれた依存パッケージを取得する"""
+    code += (
+        "\nimport sys\n"
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    return eval(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_packages_without_heavy_modules():
+    modules = ", ".join(BenchmarkRunner.IMPORT_PACKAGES)
+    assert loaded_modules(f"import {modules}") == []
+
+
+def test_import_on_first_use():
+    modules = ", ".join(BenchmarkRunner.IX_HEADER_MODULES)
+    assert loaded_modules(f"import {modules}") == ["lxml"]
+    assert loaded_modules("from app.models import XBRLModel") == ["lxml"]
+
+    # ヘッダー情報はlxmlで逐次読み込むため、bs4を読み込まない
+    loaded = loaded_modules(
+        "from app.manager import IXBRLManager\n"
+        "IXBRLManager('app/tests/.data/test/edjp').get_ix_header()"
+    )
+    assert "bs4" not in loaded
+    assert "pandas" in loaded
+
+    assert "psycopg2" in loaded_modules(
+        "from app.connect import PostgresConnector"
+    )
+
+
+def test_import_app():
+    # 読み込み時間は環境に依存するため、依存パッケージの有無で判定する
+    loaded = loaded_modules("import app")
+    assert "pandas" not in loaded
+    assert "bs4" not in loaded
+    assert "lxml" not in loaded
+
+
+def test_lazy_attributes():
+    import app.parser
+
+    assert "IxbrlParser" in dir(app.parser)
+    assert app.parser.IxbrlParser is app.parser.ixbrl_parser.IxbrlParser
+    assert "IxbrlParser" in vars(app.parser)
+
+    with pytest.raises(AttributeError):
+        app.parser.NotExists
+
+    getattr_, dir_ = lazy_attributes(
+        "app.utils", {"Alias": (".utils", "Utils")}
+    )
+    assert getattr_("Alias").__name__ == "Utils"
+    assert "Alias" in dir_()
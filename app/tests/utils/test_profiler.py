@@ -0,0 +1,141 @@
+import json
+import pstats
+
+import pytest
+
+from app.models import BaseXbrlModel
+from app.utils import FilingProfiler
+
+
+@pytest.fixture(autouse=True)
+def profiler():
+    yield FilingProfiler
+    FilingProfiler.disable()
+
+
+def workload(n):
+    return sorted(str(i) * 3 for i in range(n))
+
+
+def test_disabled(tmp_path):
+    assert FilingProfiler.enabled is False
+    with FilingProfiler.profile("A", "a.zip", tmp_path):
+        workload(100)
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_xbrl_id_and_zip_pattern(tmp_path):
+    FilingProfiler.configure(xbrl_ids=["A"], zip_pattern="*edjp*")
+
+    with FilingProfiler.profile("A", "x.zip", tmp_path):
+        workload(1000)
+    with FilingProfiler.profile("B", "tse-edjp.zip", tmp_path):
+        # プロファイル中の入れ子の呼び出しは何もしない
+        with FilingProfiler.profile("A", None, tmp_path):
+            workload(1000)
+    with FilingProfiler.profile("C", "x.zip", tmp_path):
+        workload(1000)
+
+    directory = tmp_path / "profiles"
+    index = json.loads((directory / "index.json").read_text())
+    assert {key: value["reason"] for key, value in index.items()} == {
+        "A": "xbrl_id",
+        "B": "zip_pattern",
+    }
+    stats = pstats.Stats((directory / "A.pstats").as_posix())
+    assert any(func[2] == "workload" for func in stats.stats)
+    report = (directory / "A.alloc.txt").read_text()
+    assert "traced_peak_bytes" in report
+
+
+def test_slowest(tmp_path):
+    FilingProfiler.configure(slowest=2, output_dir=tmp_path / "out")
+
+    for key, n in [("small", 10), ("large", 200_000), ("medium", 50_000)]:
+        with FilingProfiler.profile(key):
+            workload(n)
+    with FilingProfiler.profile("tiny"):
+        workload(1)
+
+    directory = tmp_path / "out" / "profiles"
+    index = json.loads((directory / "index.json").read_text())
+    assert set(index) == {"large", "medium"}
+    assert sorted(path.name for path in directory.glob("*.pstats")) == [
+        "large.pstats",
+        "medium.pstats",
+    ]
+
+
+def profile_keys(keys, output_dir):
+    FilingProfiler.configure(xbrl_ids=keys, output_dir=output_dir)
+    for key in keys:
+        with FilingProfiler.profile(key):
+            workload(100)
+
+
+def test_index_from_processes(tmp_path):
+    import multiprocessing
+
+    # 複数のプロセスが同じ一覧に書き込んでも書類が欠落しない
+    processes = [
+        multiprocessing.Process(
+            target=profile_keys,
+            args=([f"{n}-{i}" for i in range(5)], tmp_path),
+        )
+        for n in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    index = json.loads((tmp_path / "profiles" / "index.json").read_text())
+    assert len(index) == 20
+
+
+def test_output_error(tmp_path, monkeypatch):
+    FilingProfiler.configure(xbrl_ids=["A", "B"], output_dir=tmp_path)
+    directory = tmp_path / "profiles"
+    directory.mkdir()
+    (directory / "index.json").write_text("{")
+
+    # 読み込めない一覧は作成し直す
+    with FilingProfiler.profile("A"):
+        workload(100)
+    index = json.loads((directory / "index.json").read_text())
+    assert set(index) == {"A"}
+
+    # 出力の失敗は警告のみで、処理中の例外は送出しない
+    def broken(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(FilingProfiler, "_finish", broken)
+    with pytest.warns(RuntimeWarning, match="disk full"):
+        with FilingProfiler.profile("B"):
+            workload(100)
+    monkeypatch.undo()
+    with FilingProfiler.profile("B"):
+        workload(100)
+    index = json.loads((directory / "index.json").read_text())
+    assert set(index) == {"A", "B"}
+
+
+def test_configure_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("XBRL_PROFILE", "xbrl_id=A,B;zip=*.zip;top=5")
+    monkeypatch.setenv("XBRL_PROFILE_DIR", str(tmp_path))
+    FilingProfiler.configure_from_env()
+    assert FilingProfiler.enabled is True
+
+    with FilingProfiler.profile("B"):
+        workload(10)
+    assert (tmp_path / "profiles" / "B.pstats").exists()
+
+
+def test_xbrl_models(get_xbrl_zip_dir, tmp_path):
+    FilingProfiler.configure(zip_pattern="edjp.zip")
+
+    for model in BaseXbrlModel.xbrl_models(get_xbrl_zip_dir, tmp_path):
+        model.xbrl_type
+        del model
+
+    index = json.loads((tmp_path / "profiles" / "index.json").read_text())
+    assert list(index) == ["edjp"]
@@ -0,0 +1,114 @@
+import pytest
+
+from app.benchmarks import SyntheticFilingGenerator
+from app.models import XBRLModel
+from app.utils import RunManifest
+
+
+@pytest.fixture
+def zip_dir(tmp_path):
+    zip_dir = tmp_path / "zips"
+    for seed in range(2):
+        SyntheticFilingGenerator(n_facts=50, seed=seed).write_zip(
+            zip_dir / f"filing{seed}.zip"
+        )
+    return zip_dir
+
+
+def test_status(tmp_path):
+    with RunManifest(tmp_path / "manifest.db", "v1", max_attempts=2) as m:
+        assert m.should_process("a")
+
+        m.start("a", "a.zip")
+        assert m.get("a")["status"] == "running"
+        m.fail("a", "error")
+        assert m.get("a")["attempts"] == 1
+        assert m.should_process("a")
+
+        # 試行回数の上限に達した書類は処理しない
+        m.start("a", "a.zip")
+        m.fail("a", "error")
+        assert not m.should_process("a")
+        assert m.skip_hashes() == {"a"}
+
+        m.start("b", "b.zip")
+        m.complete("b", "xbrl_id", 1.5, {"tables": {"ix_header": 1}})
+        entry = m.get("b")
+        assert entry["status"] == "completed"
+        assert entry["outputs"] == {"tables": {"ix_header": 1}}
+        assert not m.should_process("b")
+        assert m.summary() == {"completed": 1, "failed": 1}
+
+    # パーサーのバージョンが変わった場合は再処理する
+    with RunManifest(tmp_path / "manifest.db", "v2") as m:
+        assert m.should_process("a")
+        assert m.should_process("b")
+        assert m.entries() == []
+
+
+def test_content_hash(zip_dir):
+    hashes = {
+        RunManifest.content_hash(path) for path in zip_dir.glob("*.zip")
+    }
+    assert len(hashes) == 2
+    assert RunManifest.content_hash(
+        zip_dir / "filing0.zip"
+    ) == RunManifest.content_hash(zip_dir / "filing0.zip")
+    assert "+" in RunManifest.default_parser_version()
+
+
+def test_xbrl_models(zip_dir, tmp_path):
+    with RunManifest(tmp_path / "manifest.db") as manifest:
+        models = XBRLModel.xbrl_models(
+            zip_dir, tmp_path / "output", manifest
+        )
+        # 1件目の処理中に中断する
+        for model in models:
+            break
+        models.close()
+        assert manifest.summary() == {"failed": 1}
+
+        xbrl_ids = [
+            model.xbrl_id
+            for model in XBRLModel.xbrl_models(
+                zip_dir, tmp_path / "output", manifest
+            )
+        ]
+        assert len(xbrl_ids) == 2
+        assert manifest.summary() == {"completed": 2}
+        assert {entry["xbrl_id"] for entry in manifest.entries()} == set(
+            xbrl_ids
+        )
+
+        # 完了済みの書類はスキップする
+        assert (
+            list(
+                XBRLModel.xbrl_models(
+                    zip_dir, tmp_path / "output", manifest
+                )
+            )
+            == []
+        )
+
+        # 内容が変わった書類は再処理する
+        SyntheticFilingGenerator(n_facts=60).write_zip(
+            zip_dir / "filing0.zip"
+        )
+        models = list(
+            XBRLModel.xbrl_models(zip_dir, tmp_path / "output", manifest)
+        )
+        assert len(models) == 1
+
+        # 呼び出し側で記録した失敗は完了で上書きしない
+        SyntheticFilingGenerator(n_facts=80).write_zip(
+            zip_dir / "filing1.zip"
+        )
+        for model in XBRLModel.xbrl_models(
+            zip_dir, tmp_path / "output", manifest
+        ):
+            manifest.fail(
+                manifest.content_hash(model.xbrl_zip_path), "ValueError"
+            )
+        assert manifest.summary() == {"completed": 3, "failed": 1}
+        (entry,) = manifest.entries(status="failed")
+        assert entry["error"] == "ValueError"
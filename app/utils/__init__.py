@@ -1,3 +1,27 @@
-from .utils import Utils
+from typing import TYPE_CHECKING
 
-__all__ = ["Utils"]
+from .lazy_loader import lazy_attributes
+
+if TYPE_CHECKING:
+    from .instrumentation import Instrumentation
+    from .profiler import FilingProfiler
+    from .run_manifest import RunManifest
+    from .utils import Utils
+
+__all__ = [
+    "FilingProfiler",
+    "Instrumentation",
+    "RunManifest",
+    "Utils",
+    "lazy_attributes",
+]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "FilingProfiler": (".profiler", "FilingProfiler"),
+        "Instrumentation": (".instrumentation", "Instrumentation"),
+        "RunManifest": (".run_manifest", "RunManifest"),
+        "Utils": (".utils", "Utils"),
+    },
+)
@@ -0,0 +1,438 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+
+class _Timer:
+    """処理時間を計測するコンテキストマネージャー"""
+
+    __slots__ = ("name", "xbrl_id", "start")
+
+    def __init__(self, name, xbrl_id=None) -> None:
+        self.name = name
+        self.xbrl_id = xbrl_id
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        Instrumentation.record(
+            self.name, time.perf_counter() - self.start, self.xbrl_id
+        )
+        return False
+
+
+class _NullTimer:
+    """計測が無効な場合のコンテキストマネージャー(何もしない)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _Filing:
+    """書類単位の集計の範囲を設定するコンテキストマネージャー"""
+
+    __slots__ = ("xbrl_id", "token", "timer")
+
+    def __init__(self, xbrl_id) -> None:
+        self.xbrl_id = xbrl_id
+
+    def __enter__(self):
+        self.token = Instrumentation._current.set(self.xbrl_id)
+        self.timer = _Timer("filing", self.xbrl_id).__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.__exit__(*exc_info)
+        Instrumentation._current.reset(self.token)
+        return False
+
+
+class Instrumentation:
+    """処理段階ごとの処理時間と件数を集計するクラス
+
+    名前付きのタイマーとカウンターを、実行全体(run)と書類(filing)
+    ごとに集計します。本番環境で有効のまま使用できるよう、
+    1回の計測はperf_counterの呼び出しと辞書の更新のみです。
+    環境変数XBRL_INSTRUMENTATIONに0を指定すると計測を無効にします。
+
+    書類ごとの集計は、filingで設定した範囲の計測、またはxbrl_idを
+    指定した計測が対象です。
+
+    Examples:
+        >>> with Instrumentation.filing("xbrl_id"):
+        ...     with Instrumentation.timer("fetch"):
+        ...         ...
+        ...     Instrumentation.count("rows", 100)
+        >>> Instrumentation.snapshot()
+        >>> Instrumentation.to_json("path/to/metrics.json")
+        >>> print(Instrumentation.to_prometheus())
+    """
+
+    ENV = "XBRL_INSTRUMENTATION"
+
+    # Prometheus形式で出力する際のメトリクス名の接頭辞
+    PREFIX = "pyxbrltools"
+
+    # 保持する書類ごとの集計の上限
+    MAX_FILINGS = 10_000
+
+    enabled = os.environ.get(ENV, "1").lower() not in ["0", "false", "off"]
+
+    _current = ContextVar("instrumentation_filing", default=None)
+
+    __lock = threading.Lock()
+    __null_timer = _NullTimer()
+
+    __started_at = datetime.now()
+    __run = {"timers": {}, "counters": {}}
+    __filings = OrderedDict()
+
+    @classmethod
+    def set_enabled(cls, enabled: bool):
+        """計測の有効・無効を切り替える"""
+        cls.enabled = enabled
+
+    @classmethod
+    def reset(cls):
+        """集計結果を破棄する"""
+        with cls.__lock:
+            cls.__started_at = datetime.now()
+            cls.__run = {"timers": {}, "counters": {}}
+            cls.__filings = OrderedDict()
+
+    @classmethod
+    def timer(cls, name, xbrl_id=None):
+        """処理時間を計測するコンテキストマネージャーを取得する
+
+        Args:
+            name (str): タイマー名
+            xbrl_id (str, optional): 集計先の書類
+                (filingの範囲内の場合はその書類)
+        """
+        if not cls.enabled:
+            return cls.__null_timer
+        return _Timer(name, xbrl_id)
+
+    @classmethod
+    def filing(cls, xbrl_id):
+        """書類単位の集計の範囲を設定するコンテキストマネージャーを取得する
+
+        範囲内の計測は実行全体に加えて、指定した書類に集計されます。
+        範囲全体の処理時間はタイマー"filing"に集計されます。
+        """
+        if not cls.enabled:
+            return cls.__null_timer
+        return _Filing(xbrl_id)
+
+    @classmethod
+    def __filing_stats(cls, xbrl_id):
+        """書類ごとの集計を取得する(ロックを取得して呼び出す)"""
+        key = cls._current.get() or xbrl_id
+        if key is None:
+            return None
+        stats = cls.__filings.get(key)
+        if stats is None:
+            stats = {"timers": {}, "counters": {}}
+            cls.__filings[key] = stats
+            while len(cls.__filings) > cls.MAX_FILINGS:
+                cls.__filings.popitem(last=False)
+        return stats
+
+    @classmethod
+    def record(cls, name, seconds, xbrl_id=None):
+        """処理時間を集計する
+
+        Args:
+            name (str): タイマー名
+            seconds (float): 処理時間(秒)
+            xbrl_id (str, optional): 集計先の書類
+        """
+        if not cls.enabled:
+            return
+        with cls.__lock:
+            filing = cls.__filing_stats(xbrl_id)
+            for stats in [cls.__run, filing]:
+                if stats is None:
+                    continue
+                # [呼び出し回数, 合計, 最大]
+                timer = stats["timers"].get(name)
+                if timer is None:
+                    stats["timers"][name] = [1, seconds, seconds]
+                else:
+                    timer[0] += 1
+                    timer[1] += seconds
+                    if seconds > timer[2]:
+                        timer[2] = seconds
+
+    @classmethod
+    def count(cls, name, value=1, xbrl_id=None):
+        """件数を集計する
+
+        Args:
+            name (str): カウンター名
+            value (int): 加算する値
+            xbrl_id (str, optional): 集計先の書類
+        """
+        if not cls.enabled:
+            return
+        with cls.__lock:
+            filing = cls.__filing_stats(xbrl_id)
+            for stats in [cls.__run, filing]:
+                if stats is not None:
+                    counters = stats["counters"]
+                    counters[name] = counters.get(name, 0) + value
+
+    @classmethod
+    def merge(cls, snapshot, xbrl_id=None):
+        """別のプロセスで集計した書類の集計結果を加算する
+
+        ワーカープロセスで処理した書類のsnapshot(xbrl_id)を、
+        呼び出し元のプロセスの実行全体と書類ごとの集計に加算します。
+
+        Args:
+            snapshot (dict): snapshot(xbrl_id)の集計結果
+            xbrl_id (str, optional): 集計先の書類
+        """
+        if not cls.enabled or not snapshot:
+            return
+        with cls.__lock:
+            filing = cls.__filing_stats(xbrl_id)
+            for stats in [cls.__run, filing]:
+                if stats is None:
+                    continue
+                for name, timer in snapshot["timers"].items():
+                    current = stats["timers"].get(name)
+                    if current is None:
+                        stats["timers"][name] = [
+                            timer["calls"],
+                            timer["seconds"],
+                            timer["max_seconds"],
+                        ]
+                    else:
+                        current[0] += timer["calls"]
+                        current[1] += timer["seconds"]
+                        current[2] = max(current[2], timer["max_seconds"])
+                counters = stats["counters"]
+                for name, value in snapshot["counters"].items():
+                    counters[name] = counters.get(name, 0) + value
+
+    @staticmethod
+    def __label(owner, func):
+        """計測の既定の名前(クラス名.メソッド名)を取得する"""
+        owner = owner if isinstance(owner, type) else type(owner)
+        return f"{owner.__name__}.{func.__name__}"
+
+    @classmethod
+    def timed(cls, name=None):
+        """メソッドの処理時間を計測するデコレーター
+
+        名前を省略した場合は「クラス名.メソッド名」で集計します。
+        戻り値がdataリストを持つ場合(パーサーの抽出メソッド)は、
+        その件数を「名前.rows」に集計します。
+        """
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not cls.enabled:
+                    return func(*args, **kwargs)
+                label = name or cls.__label(args[0], func)
+                start = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    cls.record(label, time.perf_counter() - start)
+                data = getattr(result, "data", None)
+                if isinstance(data, list):
+                    cls.count(f"{label}.rows", len(data))
+                return result
+
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def timed_generator(cls, name=None, per_xbrl_id=False):
+        """ジェネレーターの処理時間を計測するデコレーター
+
+        値を1つ生成するごとの処理時間を集計し、呼び出し側で値を
+        処理している時間は含めません。生成した件数は「名前.items」に
+        集計します。
+
+        Args:
+            name (str, optional): タイマー名
+            per_xbrl_id (bool): インスタンスのxbrl_idの書類にも集計する
+                (マネージャーのジェネレーター)
+        """
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not cls.enabled:
+                    return func(*args, **kwargs)
+                label = name or cls.__label(args[0], func)
+                xbrl_id = (
+                    getattr(args[0], "xbrl_id", None)
+                    if per_xbrl_id
+                    else None
+                )
+                return cls.__timed_iter(
+                    label, func(*args, **kwargs), xbrl_id
+                )
+
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def __timed_iter(cls, name, iterator, xbrl_id):
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    value = next(iterator)
+                except StopIteration:
+                    cls.record(name, time.perf_counter() - start, xbrl_id)
+                    return
+                cls.record(name, time.perf_counter() - start, xbrl_id)
+                cls.count(f"{name}.items", 1, xbrl_id)
+                yield value
+        finally:
+            iterator.close()
+
+    @staticmethod
+    def __to_dict(stats):
+        timers = {
+            name: {
+                "calls": calls,
+                "seconds": total,
+                "mean_seconds": total / calls,
+                "max_seconds": maximum,
+            }
+            for name, (calls, total, maximum) in sorted(
+                stats["timers"].items()
+            )
+        }
+        return {"timers": timers, "counters": dict(stats["counters"])}
+
+    @classmethod
+    def snapshot(cls, xbrl_id=None):
+        """集計結果を取得する
+
+        Args:
+            xbrl_id (str, optional): 指定した場合はその書類の集計のみ
+
+        Returns:
+            dict: run(実行全体)とfilings(書類ごと)の集計結果
+        """
+        with cls.__lock:
+            if xbrl_id is not None:
+                stats = cls.__filings.get(xbrl_id)
+                return cls.__to_dict(stats) if stats else None
+            run = cls.__to_dict(cls.__run)
+            run["started_at"] = cls.__started_at.isoformat(
+                timespec="seconds"
+            )
+            return {
+                "run": run,
+                "filings": {
+                    key: cls.__to_dict(stats)
+                    for key, stats in cls.__filings.items()
+                },
+            }
+
+    @classmethod
+    def to_json(cls, path=None):
+        """集計結果をJSON形式で出力する
+
+        Args:
+            path (str, optional): 保存先のファイルのパス
+
+        Returns:
+            str: JSON文字列
+        """
+        text = json.dumps(cls.snapshot(), ensure_ascii=False, indent=2)
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+        return text
+
+    @staticmethod
+    def __escape(value):
+        """Prometheusのラベル値をエスケープする"""
+        return (
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\n", "\\n")
+            .replace('"', '\\"')
+        )
+
+    @classmethod
+    def to_prometheus(cls, filings=False):
+        """集計結果をPrometheusのテキスト形式で出力する
+
+        Args:
+            filings (bool): 書類ごとの集計(filingラベル)も出力する
+
+        Returns:
+            str: Prometheusのテキスト形式
+        """
+        snapshot = cls.snapshot()
+        targets = [({}, snapshot["run"])]
+        if filings:
+            targets += [
+                ({"filing": key}, stats)
+                for key, stats in snapshot["filings"].items()
+            ]
+
+        metrics = {
+            "stage_seconds_total": ("counter", "処理段階ごとの処理時間"),
+            "stage_calls_total": ("counter", "処理段階ごとの呼び出し回数"),
+            "stage_max_seconds": ("gauge", "処理段階ごとの最大の処理時間"),
+            "events_total": ("counter", "件数"),
+        }
+        samples = {metric: [] for metric in metrics}
+        for labels, stats in targets:
+            for name, timer in stats["timers"].items():
+                label = {"stage": name, **labels}
+                samples["stage_seconds_total"].append(
+                    (label, timer["seconds"])
+                )
+                samples["stage_calls_total"].append(
+                    (label, timer["calls"])
+                )
+                samples["stage_max_seconds"].append(
+                    (label, timer["max_seconds"])
+                )
+            for name, value in stats["counters"].items():
+                samples["events_total"].append(
+                    ({"name": name, **labels}, value)
+                )
+
+        lines = []
+        for metric, (metric_type, help_text) in metrics.items():
+            metric_name = f"{cls.PREFIX}_{metric}"
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} {metric_type}")
+            for labels, value in samples[metric]:
+                label_text = ",".join(
+                    f'{key}="{cls.__escape(val)}"'
+                    for key, val in labels.items()
+                )
+                lines.append(f"{metric_name}{{{label_text}}} {value}")
+
+        return "\n".join(lines) + "\n"
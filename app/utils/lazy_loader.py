@@ -0,0 +1,39 @@
+from importlib import import_module
+
+
+def lazy_attributes(package, attributes):
+    """パッケージの属性を初回のアクセス時に読み込む関数を生成する
+
+    パッケージの__init__.pyで下記のように使用します(PEP 562)。
+    属性へのアクセス(from package import Name を含む)時に、
+    対応するモジュールを読み込みます。
+
+    Args:
+        package (str): パッケージ名(__name__)
+        attributes (dict): {属性名: (モジュール名, モジュール内の名前)}
+
+    Returns:
+        tuple[Callable, Callable]: __getattr__と__dir__
+
+    Examples:
+        >>> __getattr__, __dir__ = lazy_attributes(
+        ...     __name__, {"IxbrlParser": (".ixbrl_parser", "IxbrlParser")}
+        ... )
+    """
+    module_globals = vars(import_module(package))
+
+    def __getattr__(name):
+        if name not in attributes:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}"
+            )
+        module_name, attribute = attributes[name]
+        value = getattr(import_module(module_name, package), attribute)
+        # 2回目以降は通常の属性として参照する
+        module_globals[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(module_globals) | set(attributes))
+
+    return __getattr__, __dir__
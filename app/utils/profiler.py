@@ -0,0 +1,335 @@
+import cProfile
+import fcntl
+import fnmatch
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+
+class _NullSession:
+    """プロファイルの対象外の場合のコンテキストマネージャー(何もしない)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _ProfileSession:
+    """1つの書類の処理をcProfileとtracemallocで計測するセッション"""
+
+    def __init__(self, key, reason, output_dir) -> None:
+        self.key = key
+        self.reason = reason
+        self.output_dir = Path(output_dir)
+        self.elapsed = None
+        self.__profile = cProfile.Profile()
+        self.__started_tracemalloc = False
+        self.__skipped = False
+
+    def __enter__(self):
+        # 他の書類をプロファイル中の場合は何もしない
+        if not FilingProfiler._begin():
+            self.__skipped = True
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self.__start = time.perf_counter()
+        self.__profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.__skipped:
+            return False
+        try:
+            self.__profile.disable()
+            self.elapsed = time.perf_counter() - self.__start
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if self.__started_tracemalloc:
+                tracemalloc.stop()
+            FilingProfiler._finish(self, snapshot, current, peak)
+        except Exception as error:
+            # プロファイルの出力の失敗で書類の処理を失敗にしない
+            FilingProfiler._end()
+            warnings.warn(
+                f"プロファイルを出力できませんでした。[{self.key}] "
+                f"{type(error).__name__}: {error}",
+                RuntimeWarning,
+            )
+        return False
+
+    def paths(self):
+        """出力するファイルのパスを取得する
+
+        Returns:
+            tuple[Path, Path]: .pstatsとメモリ割り当てのレポート
+        """
+        name = re.sub(r"[^\w.-]", "_", self.key)
+        return (
+            self.output_dir / f"{name}.pstats",
+            self.output_dir / f"{name}.alloc.txt",
+        )
+
+    def dump(self, snapshot, current, peak, top):
+        """プロファイルとメモリ割り当ての上位をファイルに出力する"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        pstats_path, alloc_path = self.paths()
+        self.__profile.dump_stats(pstats_path.as_posix())
+
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        lines = [
+            f"filing: {self.key}",
+            f"reason: {self.reason}",
+            f"elapsed_seconds: {self.elapsed:.6f}",
+            f"traced_current_bytes: {current}",
+            f"traced_peak_bytes: {peak}",
+            "",
+            f"top {top} allocations (lineno):",
+        ]
+        for stat in snapshot.statistics("lineno")[:top]:
+            lines.append(
+                f"{stat.size:>12} B {stat.count:>8} blocks  "
+                f"{stat.traceback[0]}"
+            )
+        alloc_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class FilingProfiler:
+    """指定した書類の処理をcProfileとtracemallocで計測するクラス
+
+    バッチ処理の中で特定の書類だけが極端に遅い・メモリを消費する場合に、
+    その書類の処理のプロファイル(.pstats)とメモリ割り当ての上位の
+    レポート(.alloc.txt)を出力します。対象は下記で指定します。
+
+    * xbrl_id: 書類のID
+    * zip_pattern: zipファイル名のパターン(fnmatch形式)
+    * slowest: 処理時間の上位N件(全ての書類を計測し、上位N件のみ残す)
+      上位N件はプロセスごとに判定するため、複数のプロセス(バッチ処理の
+      ワーカー)で処理した場合は、最大でプロセス数×N件を出力します。
+
+    環境変数XBRL_PROFILEでも指定できます(例: "zip=*edjp*;slowest=5",
+    "xbrl_id=id1,id2")。出力先はconfigureのoutput_dir(環境変数
+    XBRL_PROFILE_DIR)、profileのoutput_dirの順に優先します。
+    無効の場合、profileは真偽値の判定のみで何もしないコンテキスト
+    マネージャーを返します。プロファイルの出力に失敗した場合は
+    警告(RuntimeWarning)のみで、処理中の例外は送出しません。
+
+    Examples:
+        >>> FilingProfiler.configure(zip_pattern="*edjp*", slowest=3)
+        >>> with FilingProfiler.profile(xbrl_id, "file.zip", "output"):
+        ...     process(xbrl_id)
+    """
+
+    ENV = "XBRL_PROFILE"
+
+    ENV_DIR = "XBRL_PROFILE_DIR"
+
+    # 出力先のディレクトリ名(出力先の配下に作成します)
+    DIR_NAME = "profiles"
+
+    INDEX = "index.json"
+
+    enabled = False
+
+    __lock = threading.Lock()
+    __null_session = _NullSession()
+    __active = False
+
+    __xbrl_ids = set()
+    __zip_pattern = None
+    __slowest = None
+    __output_dir = None
+    __top = 25
+    # 処理時間の上位N件 [(処理時間, 連番, セッション)]
+    __heap = []
+    __sequence = 0
+
+    @classmethod
+    def configure(
+        cls,
+        xbrl_ids=None,
+        zip_pattern=None,
+        slowest=None,
+        output_dir=None,
+        top=25,
+    ):
+        """プロファイルの対象を設定する
+
+        Args:
+            xbrl_ids (list[str], optional): 対象の書類のID
+            zip_pattern (str, optional): 対象のzipファイル名のパターン
+            slowest (int, optional): 処理時間の上位N件を対象にする
+            output_dir (str, optional): 出力先のディレクトリ
+            top (int): レポートに出力するメモリ割り当ての件数
+        """
+        with cls.__lock:
+            cls.__xbrl_ids = set(xbrl_ids or [])
+            cls.__zip_pattern = zip_pattern
+            cls.__slowest = int(slowest) if slowest else None
+            cls.__output_dir = output_dir
+            cls.__top = top
+            cls.__heap = []
+            cls.enabled = bool(
+                cls.__xbrl_ids or cls.__zip_pattern or cls.__slowest
+            )
+
+    @classmethod
+    def configure_from_env(cls):
+        """環境変数XBRL_PROFILEから対象を設定する"""
+        value = os.environ.get(cls.ENV, "")
+        options = {}
+        for item in value.split(";"):
+            key, _, option = item.partition("=")
+            if option:
+                options[key.strip()] = option.strip()
+        cls.configure(
+            xbrl_ids=[
+                xbrl_id
+                for xbrl_id in options.get("xbrl_id", "").split(",")
+                if xbrl_id
+            ],
+            zip_pattern=options.get("zip"),
+            slowest=options.get("slowest"),
+            output_dir=os.environ.get(cls.ENV_DIR),
+            top=int(options.get("top", 25)),
+        )
+
+    @classmethod
+    def disable(cls):
+        """プロファイルを無効にする"""
+        cls.configure()
+
+    @classmethod
+    def __reason(cls, xbrl_id, zip_name):
+        """書類がプロファイルの対象の場合はその理由を取得する"""
+        if xbrl_id is not None and xbrl_id in cls.__xbrl_ids:
+            return "xbrl_id"
+        if (
+            zip_name is not None
+            and cls.__zip_pattern is not None
+            and fnmatch.fnmatch(Path(zip_name).name, cls.__zip_pattern)
+        ):
+            return "zip_pattern"
+        if cls.__slowest:
+            return "slowest"
+        return None
+
+    @classmethod
+    def profile(cls, xbrl_id=None, zip_name=None, output_dir=None):
+        """書類の処理をプロファイルするコンテキストマネージャーを取得する
+
+        対象外の書類の場合は何もしないコンテキストマネージャーを
+        返します。他の書類をプロファイル中の場合も何もしません。
+
+        Args:
+            xbrl_id (str, optional): 書類のID
+            zip_name (str, optional): zipファイル名
+            output_dir (str, optional): 出力先(配下のprofilesに出力)
+        """
+        if not cls.enabled:
+            return cls.__null_session
+        with cls.__lock:
+            reason = cls.__reason(xbrl_id, zip_name)
+        if reason is None:
+            return cls.__null_session
+
+        output_dir = cls.__output_dir or output_dir or "."
+        key = xbrl_id or Path(zip_name or "filing").stem
+        return _ProfileSession(
+            key, reason, Path(output_dir) / cls.DIR_NAME
+        )
+
+    @classmethod
+    def _begin(cls):
+        """セッションの開始時に呼び出す(プロファイル中の場合はFalse)"""
+        with cls.__lock:
+            if cls.__active:
+                return False
+            cls.__active = True
+            return True
+
+    @classmethod
+    def _end(cls):
+        """プロファイル中の状態を解除する"""
+        with cls.__lock:
+            cls.__active = False
+
+    @classmethod
+    def _finish(cls, session, snapshot, current, peak):
+        """セッションの終了時に結果を出力する"""
+        with cls.__lock:
+            cls.__active = False
+            if session.reason == "slowest":
+                cls.__sequence += 1
+                item = (session.elapsed, cls.__sequence, session)
+                if len(cls.__heap) < cls.__slowest:
+                    heapq.heappush(cls.__heap, item)
+                elif session.elapsed > cls.__heap[0][0]:
+                    _, _, evicted = heapq.heapreplace(cls.__heap, item)
+                    for path in evicted.paths():
+                        path.unlink(missing_ok=True)
+                else:
+                    return
+            session.dump(snapshot, current, peak, cls.__top)
+            cls.__write_index(session)
+
+    @classmethod
+    def __write_index(cls, session):
+        """出力した書類の一覧(index.json)を更新する
+
+        複数のプロセスが同じ出力先に書き込むため、ロックファイルで
+        排他し、一時ファイルから置き換えます。
+        """
+        index_path = session.output_dir / cls.INDEX
+        lock_path = index_path.with_name(f"{cls.INDEX}.lock")
+        with open(lock_path, "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                index = {}
+                if index_path.exists():
+                    try:
+                        index = json.loads(
+                            index_path.read_text(encoding="utf-8")
+                        )
+                    except ValueError:
+                        # 読み込めない一覧は作成し直す
+                        index = {}
+                index[session.key] = {
+                    "reason": session.reason,
+                    "elapsed_seconds": session.elapsed,
+                    "pstats": session.paths()[0].name,
+                    "alloc": session.paths()[1].name,
+                }
+                # 上位N件から外れた書類を一覧から除く
+                index = {
+                    key: value
+                    for key, value in index.items()
+                    if (session.output_dir / value["pstats"]).exists()
+                }
+                tmp_path = index_path.with_name(
+                    f"{cls.INDEX}.{os.getpid()}.tmp"
+                )
+                tmp_path.write_text(
+                    json.dumps(index, ensure_ascii=False, indent=2),
+                    encoding="utf-8",
+                )
+                tmp_path.replace(index_path)
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+FilingProfiler.configure_from_env()
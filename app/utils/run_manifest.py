@@ -0,0 +1,265 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+
+from .utils import Utils
+
+
+class RunManifest:
+    """書類ごとの処理状況を記録するSQLiteのマニフェスト
+
+    zipファイルの内容のハッシュとパーサーのバージョンをキーに、
+    処理状況(running, completed, failed)、試行回数、処理時間、
+    出力先を記録します。大量の書類の処理が途中で止まった場合も、
+    再実行時に完了済みの書類をスキップして続きから処理できます。
+
+    * completed: スキップする
+    * failed, running(処理中に停止): max_attempts回まで再処理する
+    * zipファイルの内容またはパーサーのバージョンが変わった場合は、
+      キーが異なるため再処理する
+
+    Examples:
+        >>> with RunManifest("path/to/manifest.db") as manifest:
+        ...     content_hash = RunManifest.content_hash(zip_path)
+        ...     if manifest.should_process(content_hash):
+        ...         manifest.start(content_hash, zip_path)
+        ...         ...
+        ...         manifest.complete(content_hash, xbrl_id, seconds)
+    """
+
+    TABLE = "filings"
+
+    # パーサーのバージョンの算出に使用するパッケージ
+    VERSION_PACKAGES = ["parser", "manager", "models"]
+
+    __default_parser_version = None
+
+    def __init__(self, path, parser_version=None, max_attempts=3) -> None:
+        """
+        Parameters:
+            path (str): SQLiteのファイルのパス
+            parser_version (str): パーサーのバージョン
+                (省略時はdefault_parser_version)
+            max_attempts (int): 失敗した書類を処理する回数の上限
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.parser_version = (
+            parser_version or self.default_parser_version()
+        )
+        self.max_attempts = max_attempts
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(
+            self.path.as_posix(), check_same_thread=False
+        )
+        self.__connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+            "content_hash TEXT NOT NULL, "
+            "parser_version TEXT NOT NULL, "
+            "source TEXT, "
+            "status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "xbrl_id TEXT, "
+            "started_at TEXT, "
+            "finished_at TEXT, "
+            "seconds REAL, "
+            "outputs TEXT, "
+            "error TEXT, "
+            "PRIMARY KEY (content_hash, parser_version))"
+        )
+        self.__connection.commit()
+
+    @classmethod
+    def default_parser_version(cls):
+        """パッケージのバージョンと解析処理のソースのハッシュから
+        パーサーのバージョンを取得する
+
+        解析処理(parser, manager, models)のソースを変更した場合は
+        バージョンが変わり、書類を再処理します。
+        """
+        if cls.__default_parser_version is None:
+            try:
+                version = metadata.version("PyXBRLTools")
+            except metadata.PackageNotFoundError:
+                version = "0"
+            digest = hashlib.sha256()
+            root = Path(__file__).resolve().parents[1]
+            for package in cls.VERSION_PACKAGES:
+                for path in sorted((root / package).glob("*.py")):
+                    digest.update(path.name.encode())
+                    digest.update(path.read_bytes())
+            cls.__default_parser_version = (
+                f"{version}+{digest.hexdigest()[:12]}"
+            )
+        return cls.__default_parser_version
+
+    @staticmethod
+    def content_hash(zip_path):
+        """zipファイルの内容のハッシュ(SHA-256)を取得する"""
+        return Utils.file_hash(zip_path)
+
+    def __execute(self, query, parameters=()):
+        with self.__lock:
+            cursor = self.__connection.execute(query, parameters)
+            rows = cursor.fetchall()
+            self.__connection.commit()
+            return rows
+
+    def get(self, content_hash):
+        """書類の処理状況を取得する(記録がない場合はNone)"""
+        entries = self.entries(content_hash=content_hash)
+        return entries[0] if entries else None
+
+    def should_process(self, content_hash):
+        """書類を処理するかを判定する"""
+        entry = self.get(content_hash)
+        if entry is None:
+            return True
+        if entry["status"] == "completed":
+            return False
+        return entry["attempts"] < self.max_attempts
+
+    def skip_hashes(self):
+        """処理しない(完了済み、または試行回数の上限に達した)書類の
+        ハッシュの集合を取得する"""
+        rows = self.__execute(
+            f"SELECT content_hash FROM {self.TABLE} "
+            "WHERE parser_version = ? "
+            "AND (status = 'completed' OR attempts >= ?)",
+            (self.parser_version, self.max_attempts),
+        )
+        return {row[0] for row in rows}
+
+    def start(self, content_hash, source=None):
+        """書類の処理の開始を記録する(試行回数を加算する)"""
+        self.__execute(
+            f"INSERT INTO {self.TABLE} "
+            "(content_hash, parser_version, source, status, attempts, "
+            "started_at) VALUES (?, ?, ?, 'running', 1, ?) "
+            "ON CONFLICT (content_hash, parser_version) DO UPDATE SET "
+            "source = excluded.source, status = 'running', "
+            "attempts = attempts + 1, started_at = excluded.started_at, "
+            "finished_at = NULL, error = NULL",
+            (
+                content_hash,
+                self.parser_version,
+                None if source is None else str(source),
+                self.__now(),
+            ),
+        )
+
+    def complete(
+        self, content_hash, xbrl_id=None, seconds=None, outputs=None
+    ):
+        """書類の処理の完了を記録する
+
+        処理中(running)の書類のみ完了とします。呼び出し側が先に
+        失敗を記録した書類は失敗のままです。
+
+        Args:
+            content_hash (str): zipファイルの内容のハッシュ
+            xbrl_id (str, optional): 書類のxbrl_id
+            seconds (float, optional): 処理時間(秒)
+            outputs (dict, optional): 出力先(JSONで保存する)
+        """
+        self.__finish(
+            content_hash,
+            "completed",
+            xbrl_id,
+            seconds,
+            outputs,
+            None,
+            running_only=True,
+        )
+
+    def fail(self, content_hash, error, xbrl_id=None, seconds=None):
+        """書類の処理の失敗を記録する"""
+        self.__finish(
+            content_hash, "failed", xbrl_id, seconds, None, str(error)
+        )
+
+    def __finish(
+        self,
+        content_hash,
+        status,
+        xbrl_id,
+        seconds,
+        outputs,
+        error,
+        running_only=False,
+    ):
+        self.__execute(
+            f"UPDATE {self.TABLE} SET status = ?, xbrl_id = ?, "
+            "finished_at = ?, seconds = ?, outputs = ?, error = ? "
+            "WHERE content_hash = ? AND parser_version = ?"
+            + (" AND status = 'running'" if running_only else ""),
+            (
+                status,
+                xbrl_id,
+                self.__now(),
+                seconds,
+                (
+                    None
+                    if outputs is None
+                    else json.dumps(outputs, ensure_ascii=False)
+                ),
+                error,
+                content_hash,
+                self.parser_version,
+            ),
+        )
+
+    def entries(self, status=None, content_hash=None):
+        """現在のパーサーのバージョンの処理状況を取得する
+
+        Args:
+            status (str, optional): 処理状況で絞り込む
+            content_hash (str, optional): ハッシュで絞り込む
+
+        Returns:
+            list[dict]: 処理状況
+        """
+        query = f"SELECT * FROM {self.TABLE} WHERE parser_version = ?"
+        parameters = [self.parser_version]
+        if status is not None:
+            query += " AND status = ?"
+            parameters.append(status)
+        if content_hash is not None:
+            query += " AND content_hash = ?"
+            parameters.append(content_hash)
+        with self.__lock:
+            cursor = self.__connection.execute(query, parameters)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+        entries = [dict(zip(columns, row)) for row in rows]
+        for entry in entries:
+            if entry["outputs"] is not None:
+                entry["outputs"] = json.loads(entry["outputs"])
+        return entries
+
+    def summary(self):
+        """現在のパーサーのバージョンの処理状況ごとの件数を取得する"""
+        rows = self.__execute(
+            f"SELECT status, COUNT(*) FROM {self.TABLE} "
+            "WHERE parser_version = ? GROUP BY status",
+            (self.parser_version,),
+        )
+        return dict(rows)
+
+    @staticmethod
+    def __now():
+        return datetime.now().isoformat(timespec="seconds")
+
+    def close(self):
+        self.__connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
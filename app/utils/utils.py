@@ -1,3 +1,4 @@
+import hashlib
 import os
 import re
 import shutil
@@ -5,14 +6,15 @@ import unicodedata
 import zipfile
 from datetime import datetime
 from urllib.parse import urlparse
-
-import requests
-from datetimejp import JDate
+from uuid import UUID, uuid5
 
 
 class Utils:
     """ユーティリティクラス"""
 
+    # ファイルの内容から決定的なxbrl_idを生成する際の名前空間
+    XBRL_ID_NAMESPACE = UUID("52ee3329-9d31-5164-9468-3ccb82d7204f")
+
     def extract_zip(zip_path, extract_to=None):
         """
         ZIPファイルを指定されたディレクトリに展開します。
@@ -66,6 +68,8 @@ class Utils:
 
         # "元号yy年MM月DD日"のフォーマット
         try:
+            from datetimejp import JDate
+
             jd = JDate.strptime(date_str, "%g%e年%m月%d日")
             result = jd.strftime("%Y-%m-%d")
             date_obj = result
@@ -170,6 +174,8 @@ class Utils:
             os.makedirs(directory)
 
         # ファイルをダウンロードして保存
+        import requests
+
         with requests.get(url, stream=True) as response:
             response.raise_for_status()
             with open(file_path, "wb") as file:
@@ -178,6 +184,40 @@ class Utils:
 
         return file_path  # ダウンロードしたファイルのパスを返す
 
+    def file_hash(path, chunk_size=1024 * 1024):
+        """
+        ファイルの内容のハッシュ(SHA-256)を取得します。
+
+        Args:
+            path (str): ファイルのパス
+            chunk_size (int): 1回に読み込むバイト数
+
+        Returns:
+            str: 16進数のハッシュ
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def content_xbrl_id(*paths):
+        """
+        ファイルの内容から決定的なxbrl_idを生成します。
+
+        同じ内容のファイルからは常に同じxbrl_idを生成するため、
+        同じ書類を再処理しても同じxbrl_idになります。
+        形式はuuid4と同じ36文字のUUID(uuid5)です。
+
+        Args:
+            paths (str): ファイルのパス(複数の場合は指定した順に結合)
+
+        Returns:
+            str: xbrl_id
+        """
+        hashes = ":".join(Utils.file_hash(path) for path in paths)
+        return str(uuid5(Utils.XBRL_ID_NAMESPACE, hashes))
+
     def is_element_text(element):
         if element is not None:
             return element.text
@@ -205,6 +245,8 @@ class Utils:
             format_str = "dateyearmonthday"
             return text, format_str
         elif "dateerayearmonthdayjp" in format_str:
+            from datetimejp import JDate
+
             jd = JDate.strptime(text, "%g%e年%m月%d日")
             text = jd.strftime("%Y-%m-%d")
             # textの数字部分を0埋め